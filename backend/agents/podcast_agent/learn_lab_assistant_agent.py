@@ -1,24 +1,39 @@
 import os
 import json
+import asyncio
+import functools
+import inspect
+import contextvars
+import time
+import random
+import tempfile
 import requests
-import io
-from typing import List, Dict, Any, Optional, TypedDict, Annotated, Sequence, Union, Literal
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, TypedDict, Annotated, Sequence, Union, Literal, Callable, Iterator, AsyncIterator, Awaitable, Tuple
 from pydantic import BaseModel, Field
-from pydub import AudioSegment
 from dotenv import load_dotenv
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langgraph.graph import Graph, StateGraph, START, END
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain.output_parsers import PydanticOutputParser
 from agents.utils.rag_application import RAGApplication
 from datetime import datetime
 from agents.utils.podcast_s3_storage import S3Storage
-from agents.utils.upstash_cache import PodcastCache
+from agents.utils.upstash_cache import ContentCache, PodcastCache
 from agents.utils.flashcard_agent import ContentEngine, FlashcardSet, Flashcard
 from agents.utils.qna_agent import QuizGenerator, QuizSet
 from agents.utils.tweet_agent import TweetAgent, TweetContent
 from agents.utils.blog_agent import BlogAgent, BlogContent
+from agents.utils.model_router import get_model_router
+from agents.utils.tts_cache import TTSCache
+from agents.utils.metrics import metrics
+from agents.utils.mp3_frames import Mp3Assembler
+from agents.utils.frame_index import FrameIndex, index_key
+from agents.utils.hls_segmenter import HlsSegmenter
+from agents.utils.transcript_cues import TranscriptCue, to_txt, to_vtt
 
 load_dotenv()
 
@@ -33,6 +48,52 @@ class PodcastSegment(BaseModel):
     text: str
     expression: Optional[str] = None
 
+class ScriptLineStream:
+    """
+    Incremental parser for "Speaker N: ..." scripts arriving in chunks.
+
+    feed() returns the segments completed by a chunk (a line is complete
+    once its newline arrives), so each speaker turn can be synthesised
+    while the rest of the script is still being written. Lines are parsed
+    exactly as parse_unstructured_script would parse the finished text.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self.structured = None  # decided from the first non-blank character
+
+    def feed(self, text: str) -> List[PodcastSegment]:
+        self._buffer += text
+        if self.structured is None and self._buffer.strip():
+            # JSON (or fenced) output is parsed as a whole once it is complete
+            self.structured = self._buffer.lstrip()[0] in "{[`"
+        if self.structured is not False:
+            return []
+        *lines, self._buffer = self._buffer.split("\n")
+        return [segment for segment in map(parse_script_line, lines) if segment]
+
+    def close(self) -> List[PodcastSegment]:
+        if self.structured:
+            return []
+        segment = parse_script_line(self._buffer)
+        self._buffer = ""
+        return [segment] if segment else []
+
+
+def parse_script_line(line: str) -> Optional[PodcastSegment]:
+    if line.strip() == "":
+        return None
+    if line.startswith("Speaker 1:"):
+        speaker = "Speaker 1"
+        text = line.replace("Speaker 1:", "").strip()
+    elif line.startswith("Speaker 2:"):
+        speaker = "Speaker 2"
+        text = line.replace("Speaker 2:", "").strip()
+    else:
+        speaker = "Speaker 1"
+        text = line.strip()
+    return PodcastSegment(speaker=speaker, text=text)
+
 class CacheResult(BaseModel):
     found: bool
     data: Optional[Dict[str, Any]] = None
@@ -54,12 +115,59 @@ class EnhancedGraphState(BaseModel):
     script: Optional[str] = None
     blog_content: Optional[BlogContent] = None
     tweet_content: Optional[TweetContent] = None
+    progressive: bool = False  # publish the podcast as HLS-style segments while generating
+    tts_futures: Optional[List[Any]] = None  # (segment, future) per line, started during script streaming
+    playlist_url: Optional[str] = None
+    script_url: Optional[str] = None  # script text stored next to the audio
+    episode_key: Optional[str] = None  # S3 key stem of the audio, its sidecars and stream folder
+    transcript_txt_url: Optional[str] = None  # transcripts timed from the assembled audio
+    transcript_vtt_url: Optional[str] = None
+
+OUTPUT_TYPES = ("podcast", "quiz", "flashcards", "blog", "tweet")
+
+# Parameters that change what a generator produces; part of the content cache key
+GENERATION_PARAMS: Dict[str, Dict[str, Any]] = {
+    "flashcards": {"num": 5},
+    "quiz": {"num_questions": 5},
+}
+
+# Blocking client calls made by async nodes (Upstash, Pinecone, S3, file
+# writes) run here instead of on the event loop. The pool is bounded, so the
+# thread count stays flat however many generations are in flight.
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GENERATION_IO_WORKERS", 32)),
+    thread_name_prefix="generation-io"
+)
+
+
+async def run_blocking(func: Callable, *args: Any) -> Any:
+    context = contextvars.copy_context()  # keep callbacks/tracing context, as asyncio.to_thread does
+    return await asyncio.get_running_loop().run_in_executor(
+        _blocking_executor, functools.partial(context.run, func, *args)
+    )
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    return {**(left or {}), **(right or {})}
+
+
+class MultiOutputState(BaseModel):
+    """State of a multi-output run; each branch adds its own key to results/errors."""
+    question: str
+    pdf_title: str
+    output_types: List[str]
+    progressive: bool = False
+    pregenerated: bool = False  # background warm-up rather than a user request
+    rag_context: Optional[RAGContext] = None
+    cache_results: Dict[str, CacheResult] = {}
+    results: Annotated[Dict[str, Any], merge_dicts] = {}
+    errors: Annotated[Dict[str, Any], merge_dicts] = {}
 
 class IntegratedContentGenerator:
     def __init__(self):
         self.content_engine = ContentEngine()
         self.rag_app = RAGApplication()
-        self.podcast_cache = PodcastCache()
+        self.podcast_cache = PodcastCache(resolve_document_hash=self.rag_app.pdf_processor.get_document_hash)
         self.s3_storage = S3Storage(bucket_name=os.getenv("AWS_BUCKET_NAME"))
 
 def route_by_output_type(state: EnhancedGraphState) -> str:
@@ -132,29 +240,103 @@ Current script:
 Return only the enhanced script in the same format, applying all improvements.
 """
 
+class PodcastAudioWriter:
+    """
+    Writes synthesised lines to the full episode file and, in progressive
+    mode, to the HLS-style segment stream as they arrive.
+    """
+
+    def __init__(self, generator: "PodcastGenerator", state: EnhancedGraphState, on_progress=None):
+        self.state = state
+        state.episode_key = generator.s3_storage.episode_key(state.topic, state.pdf_title)
+        self.segmenter = generator._create_segmenter(state, on_progress) if state.progressive else None
+        # Concatenate MP3 frames straight to disk as segments arrive; no
+        # decode, no re-encode and no growing in-memory buffer. A unique file
+        # per episode: concurrent generations must never share one.
+        fd, self.temp_file = tempfile.mkstemp(prefix="temp_podcast_", suffix=".mp3")
+        os.close(fd)
+        self.assembler = Mp3Assembler(self.temp_file)
+        self.frame_index: Optional[FrameIndex] = None
+        self.cues: List[TranscriptCue] = []  # exact offsets of each line in the episode
+
+    def add(self, audio_bytes: bytes, segment: Optional[PodcastSegment] = None):
+        start, end = self.assembler.append(audio_bytes)
+        if segment is not None:
+            self.cues.append(TranscriptCue(start, end, segment.speaker, segment.text))
+        self.assembler.append_silence(500)
+        if self.segmenter:
+            try:
+                self.segmenter.append(audio_bytes)
+                self.segmenter.end_line(500)
+            except Exception as e:
+                # The full file is still produced; only early playback is lost
+                print(f"Warning: progressive upload failed, continuing without it - {str(e)}")
+                self.segmenter = None
+
+    def abort(self):
+        """Close and delete the partial file; nothing is published."""
+        self.assembler.close()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
+
+    def finish(self):
+        self.assembler.close()
+        if self.assembler.frame_count:
+            # Seek table for byte-range playback, straight from the offsets just written
+            self.frame_index = FrameIndex.from_offsets(
+                self.assembler.frame_offsets,
+                self.assembler.sample_rate,
+                self.assembler.samples_per_frame,
+                os.path.getsize(self.temp_file)
+            )
+        print(f"Assembled {len(self.assembler.segments)} segments ({self.assembler.duration_seconds:.1f}s of audio)")
+        if self.segmenter:
+            try:
+                self.state.playlist_url = self.segmenter.finish()
+            except Exception as e:
+                print(f"Warning: failed to finalise podcast playlist - {str(e)}")
+
+
 class PodcastGenerator:
     def __init__(self):
         print("------------------------------------------\n")
         print("Initializing Content Generator............")
-        self.llm = ChatOpenAI(
-            model="learnlm-1.5-pro-experimental",
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/", 
-            temperature=0.7, 
-            api_key=os.getenv("GEMINI_API_KEY")
-        )
+        model_router = get_model_router()
+        self.outline_llm = model_router.get_llm("podcast_outline", api_key=os.getenv("GEMINI_API_KEY"))
+        self.script_llm = model_router.get_llm("podcast_script", api_key=os.getenv("GEMINI_API_KEY"))
         self.rag_app = RAGApplication()
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
         self.voice_ids = {
             "Speaker 1": os.getenv("ELEVENLABS_VOICE_ID_1"),
             "Speaker 2": os.getenv("ELEVENLABS_VOICE_ID_2")
         }
+        # Segments are synthesised concurrently over a pooled session; the
+        # executor size caps in-flight ElevenLabs requests for the whole process
+        self.tts_max_concurrency = int(os.getenv("TTS_MAX_CONCURRENCY", 4))
+        self.tts_max_retries = int(os.getenv("TTS_MAX_RETRIES", 3))
+        self.tts_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.tts_max_concurrency)
+        self.tts_session.mount("https://", adapter)
+        self.tts_executor = ThreadPoolExecutor(
+            max_workers=self.tts_max_concurrency,
+            thread_name_prefix="tts"
+        )
+        self.tts_model_id = "eleven_turbo_v2_5"
+        self.tts_output_format = "mp3_44100_128"
+        self.tts_voice_settings = {"stability": 0.5, "similarity_boost": 0.75}
+        self.tts_cache = TTSCache.from_env()
         self.s3_storage = S3Storage(bucket_name=os.getenv("AWS_BUCKET_NAME"))
-        self.cache = PodcastCache()
+        self.cache = ContentCache(resolve_document_hash=self.rag_app.pdf_processor.get_document_hash)
         self.content_engine = ContentEngine()
         self.quiz_generator = QuizGenerator(api_key=os.getenv("GEMINI_API_KEY"))
         
         self._validate_config()
 
+        # Compile the workflow once; the compiled graph holds no per-run state,
+        # so concurrent invocations can share it safely.
+        self.graph = self.create_graph()
+        self.multi_graph = self.create_multi_graph()
+
     def _validate_config(self):
         if not self.elevenlabs_api_key:
             raise ValueError("ELEVENLABS_API_KEY is not set")
@@ -176,16 +358,18 @@ class PodcastGenerator:
         workflow = StateGraph(EnhancedGraphState)
 
         # Add nodes for all content types
-        workflow.add_node("check_cache", self.check_cache)
-        workflow.add_node("rag_retrieval", self.retrieve_context)
-        workflow.add_node("topic_expansion", self.expand_topic)
-        workflow.add_node("script_generation", self.generate_script)
-        workflow.add_node("tts_generation", self.generate_tts)
-        workflow.add_node("generate_flashcards", self.generate_flashcards)
-        workflow.add_node("generate_quiz", self.generate_quiz)
+        # Every node has a sync and an async form, so the same graph serves
+        # invoke() and ainvoke()
+        workflow.add_node("check_cache", self._node(self.check_cache))
+        workflow.add_node("rag_retrieval", self._node(self.retrieve_context))
+        workflow.add_node("topic_expansion", self._node(self.expand_topic, self.aexpand_topic))
+        workflow.add_node("script_generation", self._node(self.generate_script, self.agenerate_script))
+        workflow.add_node("tts_generation", self._node(self.generate_tts, self.agenerate_tts))
+        workflow.add_node("generate_flashcards", self._node(self.generate_flashcards))
+        workflow.add_node("generate_quiz", self._node(self.generate_quiz))
         workflow.add_node("route_content", self.route_content)
-        workflow.add_node("blog_generation", self.generate_blog)
-        workflow.add_node("tweet_generation", self.generate_tweet)
+        workflow.add_node("blog_generation", self._node(self.generate_blog))
+        workflow.add_node("tweet_generation", self._node(self.generate_tweet))
 
         # Set up the base flow
         workflow.add_edge(START, "route_content")
@@ -328,7 +512,7 @@ class PodcastGenerator:
             quiz_set = self.quiz_generator.generate_quiz(
                 context=context,
                 question=state.topic,
-                num_questions=5
+                num_questions=GENERATION_PARAMS["quiz"]["num_questions"]
             )
             
             state.quiz = quiz_set
@@ -358,7 +542,7 @@ class PodcastGenerator:
         try:
             flashcard_set = self.content_engine.generate_flashcards(
                 topic=state.topic,
-                num=5,
+                num=GENERATION_PARAMS["flashcards"]["num"],
                 custom_instructions=f"Use this context to generate accurate flashcards:\n{context}"
             )
             
@@ -373,204 +557,489 @@ class PodcastGenerator:
         return state
 
     
-    def generate_content(self, question: str, pdf_title: str, output_type: str = "podcast") -> Dict[str, Any]:
-        """Generate either a podcast or flashcards based on the specified output type"""
-        # First retrieve RAG context regardless of output type
+    def generate_content(
+        self,
+        question: str,
+        pdf_title: str,
+        output_type: str = "podcast",
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate either a podcast or flashcards based on the specified output type.
+
+        For podcasts, `progressive` also publishes the audio as segments plus a
+        playlist while it is generated, and `on_progress` is called with
+        {"event": "first_segment_ready", ...} as soon as playback can start.
+        """
         print(f"Content Generation Starts for: {output_type}")
         print(f"DEBUG: Generating content for query: {question}")
         print(f"DEBUG: Using PDF Title: {pdf_title}")
-        rag_response = self.rag_app.query_document(question, pdf_title)
 
-        
-        # Check for errors in RAG response
+        if output_type not in OUTPUT_TYPES:
+            raise ValueError(f"Unsupported output type: {output_type}")
+
+        rag_context, cache_results = self.prepare_shared_context(question, pdf_title, [output_type])
+        return self.generate_output(
+            output_type,
+            question,
+            pdf_title,
+            rag_context,
+            cache_results.get(output_type),
+            progressive=progressive,
+            on_progress=on_progress
+        )
+
+    def generate_contents(
+        self,
+        question: str,
+        pdf_title: str,
+        output_types: Sequence[str],
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pregenerated: bool = False
+    ) -> Iterator[Tuple[str, Union[Dict[str, Any], Exception]]]:
+        """
+        Generate several output types from one retrieval in a single graph run.
+
+        The branches run in parallel; (output_type, result) pairs are yielded
+        as each one finishes. A failed branch yields its exception instead of
+        a result and does not stop the others. `pregenerated` marks the
+        cached results as background warm-up so later hits on them are counted.
+        """
+        output_types = list(dict.fromkeys(output_types))
+        unsupported = [t for t in output_types if t not in OUTPUT_TYPES]
+        if unsupported:
+            raise ValueError(f"Unsupported output type: {', '.join(unsupported)}")
+
+        print(f"Content Generation Starts for: {', '.join(output_types)}")
+        initial_state = MultiOutputState(
+            question=question,
+            pdf_title=pdf_title,
+            output_types=output_types,
+            progressive=progressive,
+            pregenerated=pregenerated
+        )
+        for update in self.multi_graph.stream(
+            initial_state,
+            config={"configurable": {"on_progress": on_progress}},
+            stream_mode="updates"
+        ):
+            for node_update in update.values():
+                for output_type, result in (node_update or {}).get("results", {}).items():
+                    yield output_type, result
+                for output_type, error in (node_update or {}).get("errors", {}).items():
+                    yield output_type, error
+
+    async def agenerate_content(
+        self,
+        question: str,
+        pdf_title: str,
+        output_type: str = "podcast",
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of generate_content. Runs the graph with ainvoke, so
+        many generations can share one event loop instead of a thread each.
+        """
+        print(f"Content Generation Starts for: {output_type}")
+        if output_type not in OUTPUT_TYPES:
+            raise ValueError(f"Unsupported output type: {output_type}")
+
+        rag_context, cache_results = await run_blocking(
+            self.prepare_shared_context, question, pdf_title, [output_type]
+        )
+        return await self.agenerate_output(
+            output_type,
+            question,
+            pdf_title,
+            rag_context,
+            cache_results.get(output_type),
+            progressive=progressive,
+            on_progress=on_progress
+        )
+
+    async def agenerate_contents(
+        self,
+        question: str,
+        pdf_title: str,
+        output_types: Sequence[str],
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pregenerated: bool = False,
+        between_nodes: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> AsyncIterator[Tuple[str, Union[Dict[str, Any], Exception]]]:
+        """
+        Async counterpart of generate_contents, driven by astream.
+
+        `between_nodes()` is awaited before every node starts, so a background
+        run can pause at node boundaries (e.g. while users are generating)
+        without losing the work of nodes that already ran.
+        """
+        output_types = list(dict.fromkeys(output_types))
+        unsupported = [t for t in output_types if t not in OUTPUT_TYPES]
+        if unsupported:
+            raise ValueError(f"Unsupported output type: {', '.join(unsupported)}")
+
+        print(f"Content Generation Starts for: {', '.join(output_types)}")
+        initial_state = MultiOutputState(
+            question=question,
+            pdf_title=pdf_title,
+            output_types=output_types,
+            progressive=progressive,
+            pregenerated=pregenerated
+        )
+        async for update in self.multi_graph.astream(
+            initial_state,
+            config={"configurable": {"on_progress": on_progress, "between_nodes": between_nodes}},
+            stream_mode="updates"
+        ):
+            for node_update in update.values():
+                for output_type, result in (node_update or {}).get("results", {}).items():
+                    yield output_type, result
+                for output_type, error in (node_update or {}).get("errors", {}).items():
+                    yield output_type, error
+
+    def prepare_shared_context(
+        self,
+        question: str,
+        pdf_title: str,
+        output_types: Sequence[str]
+    ) -> Tuple[RAGContext, Dict[str, CacheResult]]:
+        """
+        Do the work every requested output shares, exactly once.
+
+        Every output type checks the content cache first; retrieval is skipped
+        only when all requested outputs were found there.
+        """
+        rag_context = RAGContext(question=question, pdf_title=pdf_title)
+        # Cache first: every requested type is checked in one batched lookup
+        cached_results = self.cache.get_many([
+            (question, pdf_title, output_type, self._generation_params(output_type))
+            for output_type in output_types
+        ])
+        cache_results = {
+            output_type: CacheResult(found=bool(cached_result), data=cached_result)
+            for output_type, cached_result in zip(output_types, cached_results)
+        }
+        if all(result.found for result in cache_results.values()):
+            return rag_context, cache_results
+
+        rag_response = self.rag_app.query_document(question, pdf_title)
         if "error" in rag_response:
             print(f"ERROR: {rag_response['error']}")
             raise ValueError(f"Failed to retrieve context: {rag_response['error']}")
-        
-        if output_type == "quiz":
-            graph = self.create_graph()
-            
-            initial_state = EnhancedGraphState(
-                messages=[HumanMessage(content=f"Create {output_type} about: {question}")],
-                topic=question,
-                output_type=output_type,
-                rag_context=RAGContext(
-                    question=question,
-                    pdf_title=pdf_title,
-                    answer=rag_response["answer"],
-                    evidence=rag_response["relevant_chunks"]
-                ),
-                pdf_title=pdf_title,
-                cache_result=None,
-                s3_url=None,
-                quiz=None
+        rag_context.answer = rag_response["answer"]
+        rag_context.evidence = rag_response["relevant_chunks"]
+        return rag_context, cache_results
+
+    def invalidate_document(self, pdf_title: str, doc_hash: Optional[str] = None) -> bool:
+        """
+        Drop cached content for a re-indexed (pass the previous `doc_hash`)
+        or deleted document, including this process's local cache tier, and
+        forget the remembered hash so later lookups use the current one.
+        """
+        invalidated = self.cache.invalidate_document(pdf_title=pdf_title, doc_hash=doc_hash)
+        self.rag_app.pdf_processor.forget_document_hash(pdf_title)
+        return invalidated
+
+    def _generation_params(self, output_type: str) -> Dict[str, Any]:
+        if output_type == "podcast":
+            return {"tts_model": self.tts_model_id, "output_format": self.tts_output_format}
+        return GENERATION_PARAMS.get(output_type, {})
+
+    def _cached_output(
+        self,
+        output_type: str,
+        cache_result: Optional[CacheResult],
+        pregenerated: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """A previously generated result, for the types that are served straight from the cache."""
+        # Podcasts still go through the graph: the cached script feeds TTS/playlist handling
+        if output_type == "podcast" or cache_result is None or not cache_result.found:
+            return None
+        data = cache_result.data
+        if (output_type == "quiz" and not (data.get("quiz") or {}).get("questions")) or \
+                (output_type == "flashcards" and not (data.get("flashcards") or {}).get("flashcards")):
+            return None  # an empty set cached before empty results were rejected; regenerate it
+        if cache_result.data.get("pregenerated") and not pregenerated:
+            metrics.incr(f"pregeneration.{output_type}.hits")
+        return {**cache_result.data, "cached": True}
+
+    def _cache_output(
+        self,
+        output_type: str,
+        question: str,
+        pdf_title: str,
+        result: Dict[str, Any],
+        pregenerated: bool = False
+    ):
+        if output_type != "podcast":  # podcasts are cached by _publish_podcast once uploaded
+            data = {**result, "pregenerated": True} if pregenerated else dict(result)
+            self.cache.set(question, pdf_title, output_type, data, self._generation_params(output_type))
+
+    def generate_output(
+        self,
+        output_type: str,
+        question: str,
+        pdf_title: str,
+        rag_context: RAGContext,
+        cache_result: Optional[CacheResult] = None,
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pregenerated: bool = False
+    ) -> Dict[str, Any]:
+        """Run one output type through the content graph using already-retrieved context."""
+        cached_output = self._cached_output(output_type, cache_result, pregenerated)
+        if cached_output is not None:
+            return cached_output
+
+        initial_state = self._output_state(output_type, question, pdf_title, rag_context, cache_result, progressive)
+        try:
+            final_state = self.graph.invoke(
+                initial_state,
+                config={"configurable": {"on_progress": on_progress}}
             )
-            
-            try:
-                final_state = graph.invoke(initial_state)
-                
-                if final_state.get("quiz") is None:
-                    raise ValueError("No quiz was generated")
-                    
-                quiz_dict = self.quiz_generator.format_quiz_for_display(final_state["quiz"])
-                
-                return {
-                    "topic": question,
-                    "quiz": quiz_dict,
-                    "conversation_history": [m.content for m in final_state["messages"]],
-                    "source_pdf": pdf_title,
-                    "rag_context": {
-                        "answer": rag_response["answer"],
-                        "evidence": rag_response["relevant_chunks"]
-                    }
-                }
-            except Exception as e:
-                print(f"Error generating quiz: {str(e)}")
-                raise
-        
-        if output_type == "flashcards":
-            graph = self.create_graph()
-            
-            initial_state = EnhancedGraphState(
-                messages=[HumanMessage(content=f"Create {output_type} about: {question}")],
-                topic=question,
-                output_type=output_type,
-                rag_context=RAGContext(
-                    question=question,
-                    pdf_title=pdf_title,
-                    answer=rag_response["answer"],
-                    evidence=rag_response["relevant_chunks"]
-                ),
-                pdf_title=pdf_title,
-                cache_result=None,
-                s3_url=None,
-                flashcards=None
+            result = self._format_output(output_type, question, pdf_title, final_state)
+            self._cache_output(output_type, question, pdf_title, result, pregenerated)
+            return result
+        except Exception as e:
+            print(f"Error generating {output_type}: {str(e)}")
+            raise
+
+    async def agenerate_output(
+        self,
+        output_type: str,
+        question: str,
+        pdf_title: str,
+        rag_context: RAGContext,
+        cache_result: Optional[CacheResult] = None,
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        pregenerated: bool = False,
+        between_nodes: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Async counterpart of generate_output, driven by ainvoke."""
+        cached_output = self._cached_output(output_type, cache_result, pregenerated)
+        if cached_output is not None:
+            return cached_output
+
+        initial_state = self._output_state(output_type, question, pdf_title, rag_context, cache_result, progressive)
+        try:
+            final_state = await self.graph.ainvoke(
+                initial_state,
+                config={"configurable": {"on_progress": on_progress, "between_nodes": between_nodes}}
             )
-            
-            try:
-                final_state = graph.invoke(initial_state)
-                # print(f"DEBUG: Final State: {final_state}")
-                if final_state.get("flashcards") is None:
-                    raise ValueError("No flashcards were generated")
-                    
-                # Convert flashcards to dictionary format
-                flashcards_dict = {
-                    "title": final_state["flashcards"].title,
-                    "flashcards": [
-                        {
-                            "front": card.front,
-                            "back": card.back,
-                            "explanation": card.explanation if hasattr(card, "explanation") else None
-                        }
-                        for card in final_state["flashcards"].flashcards
-                    ]
-                }
-                
-                return {
-                    "topic": question,
-                    "flashcards": flashcards_dict,
-                    "conversation_history": [m.content for m in final_state["messages"]],
-                    "source_pdf": pdf_title,
-                    "rag_context": {
-                        "answer": rag_response["answer"],
-                        "evidence": rag_response["relevant_chunks"]
+            result = self._format_output(output_type, question, pdf_title, final_state)
+            await run_blocking(self._cache_output, output_type, question, pdf_title, result, pregenerated)
+            return result
+        except Exception as e:
+            print(f"Error generating {output_type}: {str(e)}")
+            raise
+
+    def _output_state(
+        self,
+        output_type: str,
+        question: str,
+        pdf_title: str,
+        rag_context: RAGContext,
+        cache_result: Optional[CacheResult],
+        progressive: bool
+    ) -> EnhancedGraphState:
+        return EnhancedGraphState(
+            messages=[HumanMessage(content=f"Create {output_type} about: {question}")],
+            topic=question,
+            output_type=output_type,
+            # Each branch gets its own copy; parallel branches must not share mutable state
+            rag_context=rag_context.model_copy(deep=True),
+            pdf_title=pdf_title,
+            cache_result=cache_result if output_type == "podcast" else None,
+            s3_url=None,
+            current_stage="start",
+            progressive=progressive
+        )
+
+    def _format_output(self, output_type: str, question: str, pdf_title: str, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        rag_context = final_state["rag_context"]
+        rag_context_dict = {
+            "answer": rag_context.answer,
+            "evidence": rag_context.evidence
+        }
+        conversation_history = [m.content for m in final_state["messages"]]
+
+        if output_type == "podcast":
+            cached = final_state["cache_result"].found if final_state["cache_result"] else False
+            return {
+                "topic": question,
+                "script": final_state.get("script"),
+                "conversation_history": conversation_history,
+                "source_pdf": pdf_title,
+                "s3_url": final_state.get("s3_url"),
+                "playlist_url": final_state.get("playlist_url"),
+                "script_url": final_state.get("script_url"),
+                "transcript_txt_url": final_state.get("transcript_txt_url"),
+                "transcript_vtt_url": final_state.get("transcript_vtt_url"),
+                "cached": cached,
+                "rag_context": rag_context_dict if not cached else None
+            }
+
+        if output_type == "quiz":
+            # Never hand an empty result to the caller (or the content cache)
+            if final_state.get("quiz") is None or not final_state["quiz"].questions:
+                raise ValueError("No quiz was generated")
+            return {
+                "topic": question,
+                "quiz": self.quiz_generator.format_quiz_for_display(final_state["quiz"]),
+                "conversation_history": conversation_history,
+                "source_pdf": pdf_title,
+                "rag_context": rag_context_dict
+            }
+
+        if output_type == "flashcards":
+            if final_state.get("flashcards") is None or not final_state["flashcards"].flashcards:
+                raise ValueError("No flashcards were generated")
+            # Convert flashcards to dictionary format
+            flashcards_dict = {
+                "title": final_state["flashcards"].title,
+                "flashcards": [
+                    {
+                        "front": card.front,
+                        "back": card.back,
+                        "explanation": card.explanation if hasattr(card, "explanation") else None
                     }
-                }
-            except Exception as e:
-                print(f"Error generating flashcards: {str(e)}")
-                raise
+                    for card in final_state["flashcards"].flashcards
+                ]
+            }
+            return {
+                "topic": question,
+                "flashcards": flashcards_dict,
+                "conversation_history": conversation_history,
+                "source_pdf": pdf_title,
+                "rag_context": rag_context_dict
+            }
 
         if output_type == "blog":
-            graph = self.create_graph()
-            
-            initial_state = EnhancedGraphState(
-                messages=[HumanMessage(content=f"Create {output_type} about: {question}")],
-                topic=question,
-                output_type=output_type,
-                rag_context=RAGContext(
-                    question=question,
-                    pdf_title=pdf_title,
-                    answer=rag_response["answer"],
-                    evidence=rag_response["relevant_chunks"]
-                ),
-                pdf_title=pdf_title,
-                cache_result=None
-            )
-            
+            blog_content = final_state.get("blog_content")
+            if not blog_content:
+                raise ValueError("No blog was generated")
+            return {
+                "topic": question,
+                "blog_content": {
+                    "title": blog_content.title,
+                    "body": blog_content.body
+                },
+                "rag_context": rag_context_dict
+            }
+
+        if output_type == "tweet":
+            tweet_content = final_state.get("tweet_content")
+            if not tweet_content:
+                raise ValueError("No tweet was generated")
+            return {
+                "topic": question,
+                "tweet_content": tweet_content.tweet,  # Explicitly access .tweet
+                "rag_context": rag_context_dict
+            }
+
+        raise ValueError(f"Unsupported output type: {output_type}")
+
+    @staticmethod
+    def _node(func, afunc=None) -> RunnableLambda:
+        """
+        Wrap a node with its async implementation. Nodes without one (a single
+        blocking client call) run on the shared blocking-call pool under
+        ainvoke, so the event loop is never blocked. Under ainvoke every node
+        first awaits the run's `between_nodes` hook, if it has one.
+        """
+        takes_config = afunc is not None and "config" in inspect.signature(afunc).parameters
+
+        async def run_node(state, config: Optional[RunnableConfig] = None):
+            between_nodes = ((config or {}).get("configurable") or {}).get("between_nodes")
+            if between_nodes is not None:
+                await between_nodes()
+            if afunc is None:
+                return await run_blocking(func, state)
+            return await (afunc(state, config) if takes_config else afunc(state))
+        return RunnableLambda(func, afunc=run_node, name=func.__name__)
+
+    def create_multi_graph(self):
+        """
+        Fan-out workflow: shared preparation once, then one parallel branch per
+        requested output type. Branches only write their own key of `results`
+        (or `errors`), so they never conflict.
+        """
+        workflow = StateGraph(MultiOutputState)
+        workflow.add_node("prepare_shared_context", self._node(self._prepare_node))
+        for output_type in OUTPUT_TYPES:
+            workflow.add_node(f"{output_type}_branch", self._branch_node(output_type))
+            workflow.add_edge(f"{output_type}_branch", END)
+
+        workflow.add_edge(START, "prepare_shared_context")
+        workflow.add_conditional_edges(
+            "prepare_shared_context",
+            lambda state: [f"{output_type}_branch" for output_type in state.output_types],
+            [f"{output_type}_branch" for output_type in OUTPUT_TYPES]
+        )
+        return workflow.compile()
+
+    def _prepare_node(self, state: MultiOutputState) -> Dict[str, Any]:
+        rag_context, cache_results = self.prepare_shared_context(
+            state.question,
+            state.pdf_title,
+            state.output_types
+        )
+        return {"rag_context": rag_context, "cache_results": cache_results}
+
+    def _branch_node(self, output_type: str) -> RunnableLambda:
+        def run_branch(state: MultiOutputState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+            on_progress = ((config or {}).get("configurable") or {}).get("on_progress")
             try:
-                final_state = graph.invoke(initial_state)
-                
-                # Explicitly extract blog content
-                blog_content = final_state.get("blog_content")
-                
-                if not blog_content:
-                    raise ValueError("No blog was generated")
-
-                return {
-                    "topic": question,
-                    "blog_content": {
-                        "title": blog_content.title,
-                        "body": blog_content.body
-                    },
-                    "rag_context": {
-                        "answer": rag_response["answer"],
-                        "evidence": rag_response["relevant_chunks"]
-                    }
-                }
+                result = self.generate_output(
+                    output_type,
+                    state.question,
+                    state.pdf_title,
+                    state.rag_context,
+                    state.cache_results.get(output_type),
+                    progressive=state.progressive,
+                    on_progress=on_progress,
+                    pregenerated=state.pregenerated
+                )
             except Exception as e:
-                print(f"Error generating blog: {str(e)}")
+                return {"errors": {output_type: e}}
+            return {"results": {output_type: result}}
 
-
-        if output_type == "tweet":
-            graph = self.create_graph()
-            print(f"DEBUG: Generating tweet for query: {question}, RAG Response: {rag_response}")
-            initial_state = EnhancedGraphState(
-                messages=[HumanMessage(content=f"Create {output_type} about: {question}")],
-                topic=question,
-                output_type=output_type,
-                rag_context=RAGContext(
-                    question=question,
-                    pdf_title=pdf_title,
-                    answer=rag_response["answer"],
-                    evidence=rag_response["relevant_chunks"]
-                ),
-                pdf_title=pdf_title,
-                cache_result=None,
-                tweet_content=None
-            )
-            
+        async def arun_branch(state: MultiOutputState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+            configurable = (config or {}).get("configurable") or {}
             try:
-                final_state = graph.invoke(initial_state)
-                
-                # Ensure tweet content is returned
-                tweet_content = final_state.get("tweet_content")
-                
-                if not tweet_content:
-                    raise ValueError("No tweet was generated")
-
-                return {
-                    "topic": question,
-                    "tweet_content": tweet_content.tweet,  # Explicitly access .tweet
-                    "rag_context": {
-                        "answer": rag_response["answer"],
-                        "evidence": rag_response["relevant_chunks"]
-                    }
-                }
+                result = await self.agenerate_output(
+                    output_type,
+                    state.question,
+                    state.pdf_title,
+                    state.rag_context,
+                    state.cache_results.get(output_type),
+                    progressive=state.progressive,
+                    on_progress=configurable.get("on_progress"),
+                    pregenerated=state.pregenerated,
+                    between_nodes=configurable.get("between_nodes")
+                )
             except Exception as e:
-                print(f"Error generating tweet: {str(e)}")
-                raise
+                return {"errors": {output_type: e}}
+            return {"results": {output_type: result}}
 
-        else:  # podcast generation
-            return self.generate_podcast(question=question, pdf_title=pdf_title)
-        
-        
-       
+        return RunnableLambda(run_branch, afunc=arun_branch, name=f"{output_type}_branch")
 
     def check_cache(self, state: EnhancedGraphState) -> EnhancedGraphState:
-        cached_result = self.cache.get_cached_podcast(
-            state.rag_context.question, 
-            state.rag_context.pdf_title
-        )
+        # generate_podcast already looked the question up; don't pay for a second round-trip
+        if state.cache_result is not None:
+            cached_result = state.cache_result.data if state.cache_result.found else None
+        else:
+            cached_result = self.cache.get(
+                state.rag_context.question,
+                state.rag_context.pdf_title,
+                "podcast",
+                self._generation_params("podcast")
+            )
         
         if cached_result:
             state.cache_result = CacheResult(
@@ -578,7 +1047,11 @@ class PodcastGenerator:
                 data=cached_result
             )
             state.s3_url = cached_result.get("s3_url")
-            state.script = cached_result.get("script")
+            state.script = cached_result.get("script")  # entries cached before scripts moved to S3
+            state.script_url = cached_result.get("script_url")
+            state.transcript_txt_url = cached_result.get("transcript_txt_url")
+            state.transcript_vtt_url = cached_result.get("transcript_vtt_url")
+            state.playlist_url = cached_result.get("playlist_url")
             state.messages.append(
                 AIMessage(content=f"Retrieved cached podcast: {state.s3_url}")
             )
@@ -596,17 +1069,21 @@ class PodcastGenerator:
         if not state.rag_context or not state.pdf_title:
             raise ValueError("RAG context or PDF title not provided")
             
-        rag_response = self.rag_app.query_document(
-            state.rag_context.question, 
-            state.pdf_title
-        )
-        
-        state.rag_context.answer = rag_response["answer"]
-        state.rag_context.evidence = rag_response["relevant_chunks"]
+        # Reuse a retrieval carried in through the initial state instead of querying again
+        if state.rag_context.answer is None:
+            rag_response = self.rag_app.query_document(
+                state.rag_context.question, 
+                state.pdf_title
+            )
+            if "error" in rag_response:
+                raise ValueError(f"Failed to retrieve context: {rag_response['error']}")
+            
+            state.rag_context.answer = rag_response["answer"]
+            state.rag_context.evidence = rag_response["relevant_chunks"]
         
         context_message = f"""Research Context:
-        Answer: {rag_response['answer']}
-        Evidence: {' '.join(rag_response['relevant_chunks'])}"""
+        Answer: {state.rag_context.answer}
+        Evidence: {' '.join(state.rag_context.evidence)}"""
         
         state.messages.append(AIMessage(content=context_message))
         state.current_stage = "rag_retrieval"
@@ -614,47 +1091,91 @@ class PodcastGenerator:
             
 
     def expand_topic(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        response = self.outline_llm.invoke(self._outline_prompt(state))
+        state.messages.append(AIMessage(content=response.content))
+        state.current_stage = "topic_expansion"
+        return state
+
+    async def aexpand_topic(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        response = await self.outline_llm.ainvoke(self._outline_prompt(state))
+        state.messages.append(AIMessage(content=response.content))
+        state.current_stage = "topic_expansion"
+        return state
+
+    def _outline_prompt(self, state: EnhancedGraphState):
         prompt = ChatPromptTemplate.from_template(TOPIC_EXPANSION_PROMPT)
         
         rag_context = f"""Answer: {state.rag_context.answer}
         Evidence: {' '.join(state.rag_context.evidence)}"""
         
-        formatted_prompt = prompt.format_messages(
+        return prompt.format_messages(
             topic=state.topic,
             rag_context=rag_context,
             messages="\n".join([msg.content for msg in state.messages])
         )
-        
-        response = self.llm.invoke(formatted_prompt)
-        state.messages.append(AIMessage(content=response.content))
-        state.current_stage = "topic_expansion"
-        return state
 
     def generate_script(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        # Stream the script and start synthesising each speaker turn as soon
+        # as it is complete, so TTS overlaps with the rest of the generation
+        line_stream = ScriptLineStream()
+        tts_futures = []
+        content = ""
+        try:
+            for chunk in self.script_llm.stream(self._script_prompt(state)):
+                content += chunk.content
+                for segment in line_stream.feed(chunk.content):
+                    tts_futures.append((segment, self._submit_tts(segment)))
+            for segment in line_stream.close():
+                tts_futures.append((segment, self._submit_tts(segment)))
+        except Exception:
+            self._cancel_tts(tts_futures)
+            raise
+        return self._finish_script(state, content, line_stream, tts_futures)
+
+    async def agenerate_script(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        line_stream = ScriptLineStream()
+        tts_futures = []
+        content = ""
+        try:
+            async for chunk in self.script_llm.astream(self._script_prompt(state)):
+                content += chunk.content
+                for segment in line_stream.feed(chunk.content):
+                    tts_futures.append((segment, self._submit_tts(segment)))
+            for segment in line_stream.close():
+                tts_futures.append((segment, self._submit_tts(segment)))
+        except BaseException:
+            self._cancel_tts(tts_futures)
+            raise
+        return self._finish_script(state, content, line_stream, tts_futures)
+
+    def _script_prompt(self, state: EnhancedGraphState):
         prompt = ChatPromptTemplate.from_template(SCRIPT_GENERATION_PROMPT)
         
         rag_context = f"""Answer: {state.rag_context.answer}
         Evidence: {' '.join(state.rag_context.evidence)}"""
         
-        formatted_prompt = prompt.format_messages(
+        return prompt.format_messages(
             rag_context=rag_context,
             messages="\n".join([msg.content for msg in state.messages]),
             outline=state.messages[-1].content
         )
-        
-        response = self.llm.invoke(formatted_prompt)
-        
+
+    def _finish_script(self, state: EnhancedGraphState, content: str, line_stream: ScriptLineStream, tts_futures: List[Any]) -> EnhancedGraphState:
         try:
-            script_structured = PodcastScript.parse_raw(response.content)
+            script_structured = PodcastScript.parse_raw(content)
             state.script = script_structured.json()
         except:
-            state.script = response.content
+            state.script = content
+        state.tts_futures = tts_futures if not line_stream.structured else None
             
-        state.messages.append(AIMessage(content=response.content))
+        state.messages.append(AIMessage(content=content))
         state.current_stage = "script_generation"
         return state
 
-    def generate_tts(self, state: EnhancedGraphState) -> EnhancedGraphState:
+    def _submit_tts(self, segment: PodcastSegment):
+        return self.tts_executor.submit(self.synthesize_speech, segment.text, self.voice_ids.get(segment.speaker))
+
+    def generate_tts(self, state: EnhancedGraphState, config: Optional[RunnableConfig] = None) -> EnhancedGraphState:
         if state.cache_result and state.cache_result.found:
             state.current_stage = "complete"
             return state
@@ -662,80 +1183,200 @@ class PodcastGenerator:
         if not state.script:
             raise ValueError("No script available for TTS generation.")
         
+        on_progress = ((config or {}).get("configurable") or {}).get("on_progress")
+        writer = PodcastAudioWriter(self, state, on_progress)
+        tts_futures = self._tts_futures(state)
         try:
-            script = PodcastScript.parse_raw(state.script)
-        except:
-            script = self.parse_unstructured_script(state.script)
-        
-        audio_segments = []
-        for segment in script.segments:
-            voice_id = self.voice_ids.get(segment.speaker)
-            audio_data = self.synthesize_speech(segment.text, voice_id)
-            audio_segments.append(audio_data)
+            # Futures are consumed in script order regardless of completion order
+            for segment, future in tts_futures:
+                writer.add(future.result(), segment)
+        except BaseException:
+            self._cancel_tts(tts_futures)
+            writer.abort()
+            raise
+        writer.finish()
         
-        combined_audio = AudioSegment.empty()
-        for audio in audio_segments:
-            combined_audio += audio + AudioSegment.silent(duration=500)
+        self._publish_podcast(state, writer.temp_file, writer.frame_index, writer.cues)
+        state.current_stage = "complete"
+        return state
+
+    async def agenerate_tts(self, state: EnhancedGraphState, config: Optional[RunnableConfig] = None) -> EnhancedGraphState:
+        """
+        Async TTS node. Synthesis still runs on the shared TTS pool, which caps
+        ElevenLabs concurrency for the whole process; the event loop only
+        awaits it, and file/S3 work goes to the shared blocking-call pool.
+        """
+        if state.cache_result and state.cache_result.found:
+            state.current_stage = "complete"
+            return state
+            
+        if not state.script:
+            raise ValueError("No script available for TTS generation.")
         
-        temp_file = f"temp_podcast_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-        combined_audio.export(temp_file, format="mp3")
+        on_progress = ((config or {}).get("configurable") or {}).get("on_progress")
+        writer = PodcastAudioWriter(self, state, on_progress)
+        tts_futures = self._tts_futures(state)
+        try:
+            for segment, future in tts_futures:
+                audio_bytes = await asyncio.wrap_future(future)
+                await run_blocking(writer.add, audio_bytes, segment)
+        except BaseException:
+            self._cancel_tts(tts_futures)
+            writer.abort()
+            raise
+        await run_blocking(writer.finish)
         
+        await run_blocking(self._publish_podcast, state, writer.temp_file, writer.frame_index, writer.cues)
+        state.current_stage = "complete"
+        return state
+
+    def _tts_futures(self, state: EnhancedGraphState) -> List[Any]:
+        if state.tts_futures is not None:
+            # Synthesis was started line by line while the script streamed in
+            return state.tts_futures
+        try:
+            script = PodcastScript.parse_raw(state.script)
+        except:
+            script = self.parse_unstructured_script(state.script)
+        return [(segment, self._submit_tts(segment)) for segment in script.segments]
+
+    @staticmethod
+    def _cancel_tts(tts_futures: List[Any]):
+        """Drop synthesis that hasn't started, so a failed or cancelled episode stops billing TTS calls."""
+        for _, future in tts_futures:
+            future.cancel()
+
+    def _publish_podcast(
+        self,
+        state: EnhancedGraphState,
+        temp_file: str,
+        frame_index: Optional[FrameIndex] = None,
+        cues: Optional[List[TranscriptCue]] = None
+    ):
+        """Upload the assembled episode with its frame index, script and transcripts, and cache it."""
         try:
             s3_url = self.s3_storage.upload_file(
                 file_path=temp_file,
                 podcast_title=state.topic,
-                pdf_title=state.pdf_title
+                pdf_title=state.pdf_title,
+                episode_key=state.episode_key
             )
             
-            self.cache.cache_podcast(
+            state.s3_url = s3_url
+            if frame_index is not None:
+                self._upload_frame_index(s3_url, frame_index)
+            state.script_url = self._upload_script(state, s3_url)
+            if cues:
+                state.transcript_txt_url, state.transcript_vtt_url = self._upload_transcripts(s3_url, cues)
+
+            # The cache entry only references the stored artefacts, keeping hits small
+            self.cache.set(
                 state.rag_context.question,
                 state.pdf_title,
+                "podcast",
                 {
                     "topic": state.topic,
-                    "script": state.script,
-                    "conversation_history": [m.content for m in state.messages],
                     "source_pdf": state.pdf_title,
                     "s3_url": s3_url,
-                    "rag_context": {
-                        "answer": state.rag_context.answer,
-                        "evidence": state.rag_context.evidence
-                    }
-                }
+                    "playlist_url": state.playlist_url,
+                    "script_url": state.script_url,
+                    "transcript_txt_url": state.transcript_txt_url,
+                    "transcript_vtt_url": state.transcript_vtt_url
+                },
+                self._generation_params("podcast")
             )
             
-            state.s3_url = s3_url
             state.messages.append(
                 AIMessage(content=f"Podcast audio generated and uploaded to S3: {s3_url}")
             )
             
         except Exception as e:
             print(f"Warning: S3 upload failed - {str(e)}")
+            # upload_file only removes the file once it is stored
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
             state.messages.append(
-                AIMessage(content=f"Warning: S3 upload failed. Podcast saved locally as {temp_file}")
+                AIMessage(content="Warning: S3 upload failed. Podcast audio was not saved")
             )
-        
-        state.current_stage = "complete"
-        return state
 
-    def parse_unstructured_script(self, script_text: str) -> PodcastScript:
-        segments = []
-        for line in script_text.split('\n'):
-            if line.strip() == "":
-                continue
-            if line.startswith("Speaker 1:"):
-                speaker = "Speaker 1"
-                text = line.replace("Speaker 1:", "").strip()
-            elif line.startswith("Speaker 2:"):
-                speaker = "Speaker 2"
-                text = line.replace("Speaker 2:", "").strip()
-            else:
-                speaker = "Speaker 1"
-                text = line.strip()
-            segments.append(PodcastSegment(speaker=speaker, text=text))
-        return PodcastScript(segments=segments)
+    def _upload_frame_index(self, s3_url: str, frame_index: FrameIndex):
+        """Store the seek table next to the episode; the API rebuilds it if this fails."""
+        try:
+            self.s3_storage.upload_bytes(
+                index_key(self.s3_storage.key_from_url(s3_url)),
+                frame_index.to_bytes(),
+                "application/octet-stream"
+            )
+        except Exception as e:
+            print(f"Warning: frame index upload failed - {str(e)}")
 
-    def synthesize_speech(self, text: str, voice_id: str) -> AudioSegment:
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream"
+    def _upload_script(self, state: EnhancedGraphState, s3_url: str) -> Optional[str]:
+        """Store the script as text next to the episode; returns its URL."""
+        if not state.script:
+            return None
+        try:
+            script_key = self.s3_storage.key_from_url(s3_url).rsplit(".", 1)[0] + "_script.txt"
+            return self.s3_storage.upload_bytes(script_key, state.script.encode("utf-8"), "text/plain; charset=utf-8")
+        except Exception as e:
+            print(f"Warning: script upload failed - {str(e)}")
+            return None
+
+    def _upload_transcripts(self, s3_url: str, cues: List[TranscriptCue]) -> Tuple[Optional[str], Optional[str]]:
+        """Store TXT and VTT transcripts timed from the assembled audio next to the episode; returns their URLs."""
+        base_key = self.s3_storage.key_from_url(s3_url).rsplit(".", 1)[0]
+        try:
+            txt_url = self.s3_storage.upload_bytes(base_key + "_transcript.txt", to_txt(cues).encode("utf-8"), "text/plain; charset=utf-8")
+            vtt_url = self.s3_storage.upload_bytes(base_key + "_transcript.vtt", to_vtt(cues).encode("utf-8"), "text/vtt; charset=utf-8")
+            return txt_url, vtt_url
+        except Exception as e:
+            print(f"Warning: transcript upload failed - {str(e)}")
+            return None, None
+
+    def _create_segmenter(self, state: EnhancedGraphState, on_progress) -> HlsSegmenter:
+        """Segmenter that uploads each piece under the podcast's stream folder."""
+        prefix = self.s3_storage.stream_prefix(state.episode_key)
+
+        def publish(name: str, data: bytes, content_type: str) -> str:
+            # The playlist changes while generating; segments never do
+            cache_control = "no-cache" if name.endswith(".m3u8") else "max-age=31536000, immutable"
+            return self.s3_storage.upload_bytes(prefix + name, data, content_type, cache_control)
+
+        def on_segment(index: int, segment_url: str, playlist_url: str):
+            if index == 0 and on_progress:
+                on_progress({
+                    "event": "first_segment_ready",
+                    "topic": state.topic,
+                    "playlist_url": playlist_url,
+                    "segment_url": segment_url
+                })
+
+        return HlsSegmenter(
+            publish=publish,
+            target_duration=float(os.getenv("PODCAST_SEGMENT_SECONDS", 10)),
+            on_segment=on_segment
+        )
+
+    def parse_unstructured_script(self, script_text: str) -> PodcastScript:
+        segments = [parse_script_line(line) for line in script_text.split('\n')]
+        return PodcastScript(segments=[segment for segment in segments if segment])
+
+    def synthesize_speech(self, text: str, voice_id: str) -> bytes:
+        """Synthesise one line as MP3 bytes, reusing cached audio for identical voice/model/text."""
+        cache_key = self.tts_cache.make_key(
+            voice_id,
+            self.tts_model_id,
+            text,
+            {**self.tts_voice_settings, "output_format": self.tts_output_format}
+        )
+        audio_bytes = self.tts_cache.get(cache_key)
+        if audio_bytes is None:
+            audio_bytes = self._fetch_speech_bytes(text, voice_id)
+            self.tts_cache.put(cache_key, audio_bytes)
+        return audio_bytes
+
+    def _fetch_speech_bytes(self, text: str, voice_id: str) -> bytes:
+        # Pin the output format so every segment shares one MP3 stream layout
+        url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream?output_format={self.tts_output_format}"
         headers = {
             "Accept": "audio/mpeg",
             "Content-Type": "application/json",
@@ -743,58 +1384,46 @@ class PodcastGenerator:
         }
         data = {
             "text": text,
-            "model_id": "eleven_turbo_v2_5",
-            "voice_settings": {
-                "stability": 0.5,
-                "similarity_boost": 0.75
-            }
+            "model_id": self.tts_model_id,
+            "voice_settings": self.tts_voice_settings
         }
         
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code != 200:
-            raise ValueError(f"ElevenLabs API Error: {response.status_code} - {response.text}")
-        
-        audio = AudioSegment.from_file(io.BytesIO(response.content), format="mp3")
-        return audio
+        response = self._post_with_retries(url, headers, data)
+        return response.content
+
+    def _post_with_retries(self, url: str, headers: Dict[str, str], data: Dict[str, Any]) -> requests.Response:
+        """POST to ElevenLabs, retrying rate limits, server errors and dropped connections."""
+        retryable_statuses = {429, 500, 502, 503, 504}
+        for attempt in range(self.tts_max_retries + 1):
+            try:
+                response = self.tts_session.post(url, headers=headers, json=data, timeout=60)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.tts_max_retries:
+                    raise
+                print(f"TTS request failed ({str(e)}), retrying...")
+            else:
+                if response.status_code == 200:
+                    return response
+                if response.status_code not in retryable_statuses or attempt == self.tts_max_retries:
+                    raise ValueError(f"ElevenLabs API Error: {response.status_code} - {response.text}")
+                print(f"TTS request returned {response.status_code}, retrying...")
+            time.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.25))
     
-    def generate_podcast(self, question: str, pdf_title: str) -> Dict[str, Any]:
+    def generate_podcast(
+        self,
+        question: str,
+        pdf_title: str,
+        progressive: bool = False,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """Generate a podcast based on the provided question and PDF"""
-        initial_state = EnhancedGraphState(
-            messages=[HumanMessage(content=f"Create a podcast about: {question}")],
-            topic=question,
+        return self.generate_content(
+            question,
+            pdf_title,
             output_type="podcast",
-            rag_context=RAGContext(
-                question=question,
-                pdf_title=pdf_title
-            ),
-            pdf_title=pdf_title,
-            cache_result=None,
-            s3_url=None,
-            current_stage="start"
+            progressive=progressive,
+            on_progress=on_progress
         )
-        
-        try:
-            graph = self.create_graph()
-            final_state = graph.invoke(initial_state)
-            
-            return {
-                "topic": question,
-                "script": final_state["script"],
-                "conversation_history": [m.content for m in final_state["messages"]],
-                "source_pdf": pdf_title,
-                "s3_url": final_state["s3_url"],
-                "cached": final_state["cache_result"].found if final_state["cache_result"] else False,
-                "rag_context": {
-                    "answer": final_state["rag_context"].answer,
-                    "evidence": final_state["rag_context"].evidence
-                } if not final_state["cache_result"].found else None
-            }
-        except Exception as e:
-            print(f"Error in podcast generation: {str(e)}")
-            raise
-
-    
 
     def process_document(self, pdf_path: str) -> bool:
         return self.rag_app.process_document(pdf_path)
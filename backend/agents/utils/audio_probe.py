@@ -0,0 +1,142 @@
+import os
+import struct
+from typing import Optional
+
+from agents.utils.mp3_frames import id3v2_length, parse_header, side_info_length_with_crc
+
+# Bytes read from each end of a file; enough for every header we look at
+PROBE_BYTES = 64 * 1024
+
+
+def probe_duration(head: bytes, tail: bytes = b"", total_size: Optional[int] = None) -> Optional[float]:
+    """
+    Duration in seconds from container/frame headers alone, without decoding.
+
+    `head` is the start of the file, `tail` its last few KB (only needed for
+    Ogg, and for MP4 files whose moov box is at the end) and `total_size` the
+    full length in bytes (needed for CBR MP3 and streamed WAV). Returns None
+    when the headers don't give a duration, so callers can fall back to
+    decoding.
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return _wav_duration(head, total_size)
+    if head[:4] == b"OggS":
+        return _ogg_duration(head, tail, total_size)
+    if head[4:8] == b"ftyp":
+        return _mp4_duration(head) or (_mp4_duration(tail) if tail else None)
+    return _mp3_duration(head, tail, total_size)
+
+
+def probe_file(path: str) -> Optional[float]:
+    """probe_duration for a local file, reading only its first and last PROBE_BYTES."""
+    total_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(PROBE_BYTES)
+        tag_length = id3v2_length(head)
+        if tag_length + 4 > len(head) and total_size > len(head):
+            # Large ID3 tag (cover art): read past it to reach the first frame
+            f.seek(0)
+            head = f.read(tag_length + PROBE_BYTES)
+        tail = b""
+        if total_size > len(head):
+            f.seek(max(0, total_size - PROBE_BYTES))
+            tail = f.read()
+    return probe_duration(head, tail, total_size)
+
+
+def _mp3_duration(head: bytes, tail: bytes, total_size: Optional[int]) -> Optional[float]:
+    offset = _first_frame(head, id3v2_length(head))
+    if offset is None:
+        return None
+    header = parse_header(head, offset)
+    samples_per_second = header.sample_rate / header.samples_per_frame
+
+    # Xing/Info (VBR, or CBR written by LAME and Mp3Assembler) and VBRI carry the frame count
+    xing = offset + 4 + side_info_length_with_crc(header)
+    if head[xing:xing + 4] in (b"Xing", b"Info") and len(head) >= xing + 12:
+        flags, frames = struct.unpack(">II", head[xing + 4:xing + 12])
+        if flags & 0x01 and frames:
+            return frames / samples_per_second
+    vbri = offset + 36
+    if head[vbri:vbri + 4] == b"VBRI" and len(head) >= vbri + 18:
+        frames = struct.unpack(">I", head[vbri + 14:vbri + 18])[0]
+        if frames:
+            return frames / samples_per_second
+
+    # No tag: assume constant bitrate over the rest of the file
+    if total_size is None:
+        return None
+    audio_bytes = total_size - offset
+    if tail[-128:-125] == b"TAG":
+        audio_bytes -= 128  # ID3v1
+    return max(0, audio_bytes) * 8 / (header.bitrate * 1000)
+
+
+def _first_frame(data: bytes, start: int) -> Optional[int]:
+    """Offset of the first frame header that is followed by another (or ends the data)."""
+    for offset in range(start, len(data) - 3):
+        header = parse_header(data, offset)
+        if header is None:
+            continue
+        following = offset + header.frame_length
+        if following + 4 > len(data) or parse_header(data, following) is not None:
+            return offset
+    return None
+
+
+def _wav_duration(head: bytes, total_size: Optional[int]) -> Optional[float]:
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        size = struct.unpack("<I", head[offset + 4:offset + 8])[0]
+        if chunk_id == b"fmt " and offset + 20 <= len(head):
+            byte_rate = struct.unpack("<I", head[offset + 16:offset + 20])[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            if total_size is not None and (size in (0, 0xFFFFFFFF) or offset + 8 + size > total_size):
+                size = total_size - offset - 8  # streamed writers leave the size unset
+            return size / byte_rate
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def _ogg_duration(head: bytes, tail: bytes, total_size: Optional[int]) -> Optional[float]:
+    opus = head.find(b"OpusHead")
+    vorbis = head.find(b"\x01vorbis")
+    if opus != -1 and opus + 12 <= len(head):
+        rate = 48000  # Opus granule positions always count 48 kHz samples
+        pre_skip = struct.unpack("<H", head[opus + 10:opus + 12])[0]
+    elif vorbis != -1 and vorbis + 16 <= len(head):
+        rate = struct.unpack("<I", head[vorbis + 12:vorbis + 16])[0]
+        pre_skip = 0
+    else:
+        return None
+
+    if not tail and total_size is not None and total_size > len(head):
+        return None  # the last page is past the head; the caller has to read the tail
+
+    # Granule position of the last page that completes a packet
+    data = tail or head
+    page = data.rfind(b"OggS")
+    while page != -1:
+        if page + 14 <= len(data) and data[page + 4] == 0:
+            granule = struct.unpack("<q", data[page + 6:page + 14])[0]
+            if granule >= 0 and rate:
+                return max(0, granule - pre_skip) / rate
+        page = data.rfind(b"OggS", 0, page)
+    return None
+
+
+def _mp4_duration(data: bytes) -> Optional[float]:
+    mvhd = data.find(b"mvhd")
+    if mvhd == -1 or mvhd + 32 > len(data):
+        return None
+    if data[mvhd + 4] == 1:
+        if mvhd + 36 > len(data):
+            return None
+        timescale, duration = struct.unpack(">IQ", data[mvhd + 24:mvhd + 36])
+    else:
+        timescale, duration = struct.unpack(">II", data[mvhd + 16:mvhd + 24])
+    return duration / timescale if timescale else None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from agents.utils.model_router import get_model_router
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -13,12 +13,7 @@ class BlogAgent:
     def __init__(self, api_key: str = os.getenv("GEMINI_API_KEY")):
         if not api_key:
             raise ValueError("GEMINI_API_KEY is missing. Check your environment variables.")
-        self.llm = ChatOpenAI(
-            model="learnlm-1.5-pro-experimental",
-            base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-            api_key=api_key,
-            temperature=0.7,
-        )
+        self.llm = get_model_router().get_llm("blog", api_key=api_key)
 
     def generate_blog(self, query: str,rag_context: dict) -> BlogContent:
         """
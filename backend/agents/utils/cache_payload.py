@@ -0,0 +1,67 @@
+import base64
+import json
+import zlib
+from typing import Any, Dict
+
+# orjson and zstandard normally come in with langsmith; fall back to the stdlib without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PAYLOAD_VERSION = "c1"
+# Upstash Vector caps metadata at 48 KB per vector; the payload is the bulk of it
+MAX_PAYLOAD_BYTES = 48 * 1024 - 1024
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Dict[str, Any]:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def encode_payload(data: Dict[str, Any]) -> str:
+    """
+    Serialise and compress a cache entry into an ASCII string for vector metadata.
+
+    Format: "c1:<codec>:<base64 body>", codec "z" for zstd or "d" for zlib
+    deflate. Raises PayloadTooLarge when the result would not fit in metadata.
+    """
+    raw = _dumps(data)
+    if zstandard is not None:
+        codec, body = "z", zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        codec, body = "d", zlib.compress(raw, 6)
+    payload = f"{PAYLOAD_VERSION}:{codec}:{base64.b64encode(body).decode('ascii')}"
+    if len(payload) > MAX_PAYLOAD_BYTES:
+        raise PayloadTooLarge(f"Cache payload is {len(payload)} bytes (limit {MAX_PAYLOAD_BYTES})")
+    return payload
+
+
+def decode_payload(value: str) -> Dict[str, Any]:
+    """Inverse of encode_payload; plain JSON written before compact payloads is still accepted."""
+    if not value.startswith(f"{PAYLOAD_VERSION}:"):
+        return json.loads(value)
+    _, codec, body = value.split(":", 2)
+    compressed = base64.b64decode(body)
+    if codec == "z":
+        if zstandard is None:
+            raise ValueError("zstd-compressed cache payload but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(compressed)
+    elif codec == "d":
+        raw = zlib.decompress(compressed)
+    else:
+        raise ValueError(f"Unknown cache payload codec: {codec}")
+    return _loads(raw)
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+from agents.utils.metrics import metrics
+
+
+class DiskLRUStore:
+    """
+    Directory of named byte blobs bounded to `max_bytes`, evicting the least
+    recently used first.
+
+    Files are `<dir>/<name[:2]>/<name><suffix>`. The LRU order lives in memory
+    and is rebuilt from file mtimes on start, and reads touch the file, so
+    it survives restarts. Writes go to a temporary file that is renamed into
+    place, so concurrent readers never see a partial blob. Thread-safe.
+
+    Counters: <metric_prefix>.evictions, <metric_prefix>.errors
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str, metric_prefix: str):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.metric_prefix = metric_prefix
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # name -> size, oldest first
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name[:2], f"{name}{self.suffix}")
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from files left by earlier processes (oldest access first)."""
+        found = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file_name in files:
+                if not file_name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, file_name[:-len(self.suffix)], stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def get(self, name: str) -> Optional[bytes]:
+        """The stored bytes, or None if `name` isn't on disk."""
+        path = self._path(name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if name in self._entries:
+                self._entries.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, name: str, data: bytes) -> bool:
+        """Store `data` under `name`; False if it is larger than the whole store or the write failed."""
+        if len(data) > self.max_bytes:
+            return False
+        path = self._path(name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            metrics.incr(f"{self.metric_prefix}.errors")
+            print(f"Error writing {self.metric_prefix} entry: {str(e)}")
+            return False
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+        return True
+
+    def usage(self) -> Tuple[int, int]:
+        """(entries, bytes) currently stored."""
+        with self._lock:
+            return len(self._entries), self._total_bytes
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes. Caller holds the lock (or is __init__)."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+            metrics.incr(f"{self.metric_prefix}.evictions")
@@ -4,6 +4,8 @@ from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain.output_parsers import PydanticOutputParser
+from agents.utils.model_router import get_model_router, RoutedLLM, GEMINI_BASE_URL
+from agents.utils.structured_output import parse_structured_output
 import os
 import json
 from dotenv import load_dotenv 
@@ -22,8 +24,8 @@ class FlashcardSet(BaseModel):
     flashcards: List[Flashcard]
 
 class LLMConfig(BaseModel):
-    model: str = "learnlm-1.5-pro-experimental"
-    base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai/"
+    model: Optional[str] = None  # None uses the "flashcards" route from the routing table
+    base_url: str = GEMINI_BASE_URL
     temperature: float = 0.7
     api_key: Optional[str] = gemini_api_key
 
@@ -33,17 +35,19 @@ class ContentEngine:
         print("Initializing ContentEngine...")
         self.llm_config = llm_config or LLMConfig()
         self.llm = self._initialize_llm()
+        self.fixup_llm = get_model_router().get_llm("json_fixup", api_key=self.llm_config.api_key)
         print("ContentEngine initialized successfully")
 
-    def _initialize_llm(self) -> ChatOpenAI:
-        print(f"Setting up LLM with model: {self.llm_config.model}")
+    def _initialize_llm(self) -> RoutedLLM:
+        print(f"Setting up LLM with model: {self.llm_config.model or 'routed'}")
         if not (self.llm_config.api_key or os.getenv("OPENAI_API_KEY")):
             raise ValueError("No API key provided. Please set OPENAI_API_KEY environment variable or provide it in LLMConfig")
         
-        return ChatOpenAI(
+        return get_model_router().get_llm(
+            "flashcards",
+            api_key=self.llm_config.api_key,
             model=self.llm_config.model,
             base_url=self.llm_config.base_url,
-            api_key=self.llm_config.api_key,
             temperature=self.llm_config.temperature,
         )
     
@@ -129,7 +133,13 @@ class ContentEngine:
                 {"num": num, "topic": topic, "context": context}
             )
             print("Parsing results...")
-            flashcard_set = parser.parse(results.content)
+            flashcard_set = parse_structured_output(
+                parser,
+                results.content,
+                name="flashcards",
+                fixup_llm=self.fixup_llm,
+                defaults=lambda data: {"title": topic}
+            )
             print("Flashcards generated successfully!")
             
             self.display_flashcards(flashcard_set)
@@ -141,7 +151,7 @@ class ContentEngine:
                 print("\nRaw output:", results.content)
             else:
                 print("No results generated")
-            return FlashcardSet(title=topic, flashcards=[])
+            raise
 
 # Example usage
 if __name__ == "__main__":
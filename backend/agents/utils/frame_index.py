@@ -0,0 +1,125 @@
+import itertools
+import math
+import mmap
+import struct
+import sys
+from array import array
+from typing import Iterable, Optional, Tuple
+from agents.utils.mp3_frames import iter_frame_offsets
+
+INDEX_SUFFIX = ".idx"
+_MAGIC = b"MFX1"
+_HEADER = struct.Struct("<4sIIIIQ")  # magic, sample rate, samples/frame, stride, frames, total bytes
+
+
+def index_key(audio_key: str) -> str:
+    """Storage key of the frame index kept next to an audio object."""
+    return audio_key + INDEX_SUFFIX
+
+
+class FrameIndex:
+    """
+    Seek table for an MP3 file: the byte offset of every `stride`-th frame.
+
+    Every frame of a stream holds the same number of samples, so the entry
+    covering a timestamp is a division away and any time window maps to a
+    byte range in constant time, without decoding. Ranges start on a frame
+    boundary and can be served as-is. With the default stride of 4 an hour
+    of 44.1 kHz audio needs about 140 KB.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        samples_per_frame: int,
+        frame_count: int,
+        total_bytes: int,
+        offsets: array,
+        stride: int = 4,
+    ):
+        self.sample_rate = sample_rate
+        self.samples_per_frame = samples_per_frame
+        self.frame_count = frame_count
+        self.total_bytes = total_bytes
+        self.offsets = offsets
+        self.stride = stride
+
+    @classmethod
+    def from_offsets(
+        cls,
+        frame_offsets: Iterable[int],
+        sample_rate: int,
+        samples_per_frame: int,
+        total_bytes: int,
+        stride: int = 4,
+    ) -> "FrameIndex":
+        """Build from the offset of every frame, e.g. Mp3Assembler.frame_offsets."""
+        offsets = array("I")
+        frame_count = 0
+        for frame_count, offset in enumerate(frame_offsets, start=1):
+            if (frame_count - 1) % stride == 0:
+                offsets.append(offset)
+        return cls(sample_rate, samples_per_frame, frame_count, total_bytes, offsets, stride)
+
+    @classmethod
+    def build(cls, path: str, stride: int = 4) -> Optional["FrameIndex"]:
+        """Scan an MP3 file's frame headers (mmap'd, nothing decoded); None if it has no MPEG frames."""
+        with open(path, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                frames = iter_frame_offsets(data)
+                first = next(frames, None)
+                if first is None:
+                    return None
+                header, offset = first
+                return cls.from_offsets(
+                    itertools.chain([offset], (offset for _, offset in frames)),
+                    header.sample_rate,
+                    header.samples_per_frame,
+                    len(data),
+                    stride
+                )
+
+    @property
+    def entry_seconds(self) -> float:
+        return self.stride * self.samples_per_frame / self.sample_rate
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frame_count * self.samples_per_frame / self.sample_rate
+
+    def byte_range(self, start_seconds: float, end_seconds: Optional[float] = None) -> Tuple[int, int, float]:
+        """
+        Bytes covering [start_seconds, end_seconds) as (start, end exclusive,
+        actual start time); the range may begin up to one entry early.
+        """
+        if not self.offsets:
+            return 0, self.total_bytes, 0.0
+        entry = min(max(0, int(start_seconds / self.entry_seconds)), len(self.offsets) - 1)
+        end = self.total_bytes
+        if end_seconds is not None:
+            end_entry = math.ceil(end_seconds / self.entry_seconds)
+            if end_entry < len(self.offsets):
+                end = max(self.offsets[end_entry], self.offsets[entry] + 1)
+        return self.offsets[entry], end, entry * self.entry_seconds
+
+    def to_bytes(self) -> bytes:
+        offsets = array("I", self.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        header = _HEADER.pack(
+            _MAGIC, self.sample_rate, self.samples_per_frame, self.stride, self.frame_count, self.total_bytes
+        )
+        return header + offsets.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FrameIndex":
+        magic, sample_rate, samples_per_frame, stride, frame_count, total_bytes = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a frame index")
+        offsets = array("I")
+        offsets.frombytes(data[_HEADER.size:])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        return cls(sample_rate, samples_per_frame, frame_count, total_bytes, offsets, stride)
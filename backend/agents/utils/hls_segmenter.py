@@ -0,0 +1,121 @@
+import math
+from typing import Callable, List, Optional, Tuple
+from agents.utils.mp3_frames import FrameHeader, iter_frames, silence_frame
+
+PLAYLIST_NAME = "playlist.m3u8"
+
+
+def timestamp_tag(seconds: float) -> bytes:
+    """
+    ID3v2.4 tag carrying the HLS packed-audio timestamp.
+
+    Packed audio segments (raw MP3 rather than MPEG-TS) must start with a
+    PRIV frame giving the 33-bit, 90 kHz presentation time of their first
+    sample, so players can place each segment on the timeline.
+    """
+    pts = int(round(seconds * 90000)) & ((1 << 33) - 1)
+    payload = b"com.apple.streaming.transportStreamTimestamp\x00" + pts.to_bytes(8, "big")
+    frame = b"PRIV" + _syncsafe(len(payload)) + b"\x00\x00" + payload
+    return b"ID3\x04\x00\x00" + _syncsafe(len(frame)) + frame
+
+
+def _syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+
+class HlsSegmenter:
+    """
+    Cuts a podcast into short MP3 segments and publishes them as they are ready.
+
+    Each speaker line (plus its trailing pause) becomes one segment, split
+    further if it runs past `target_duration`. After every segment the EVENT
+    playlist is republished, so a player can start on the first line while
+    the rest of the episode is still being synthesised. `publish(name, data,
+    content_type)` uploads one object and returns its URL.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[str, bytes, str], str],
+        target_duration: float = 10.0,
+        on_segment: Optional[Callable[[int, str, str], None]] = None,
+    ):
+        self.publish = publish
+        self.target_duration = target_duration
+        self.on_segment = on_segment
+        self.playlist_url: Optional[str] = None
+        self.segments: List[Tuple[str, float]] = []  # (name, duration)
+        self._template: Optional[FrameHeader] = None
+        self._silence: Optional[bytes] = None
+        self._buffer = bytearray()
+        self._buffer_frames = 0
+        self._elapsed = 0.0  # start time of the buffered segment
+
+    @property
+    def frame_seconds(self) -> float:
+        return self._template.samples_per_frame / self._template.sample_rate
+
+    def append(self, data: bytes) -> None:
+        """Add one line of encoded speech."""
+        for header, frame in iter_frames(data):
+            if self._template is None:
+                self._template = header
+                self._silence = silence_frame(header)
+            if (self._buffer_frames + 1) * self.frame_seconds > self.target_duration:
+                self.flush()
+            self._buffer += frame
+            self._buffer_frames += 1
+
+    def end_line(self, silence_ms: int) -> None:
+        """Close the current line with a pause and publish it."""
+        if self._template is None:
+            return
+        frames = -(-silence_ms * self._template.sample_rate // (1000 * self._template.samples_per_frame))
+        for _ in range(frames):
+            if (self._buffer_frames + 1) * self.frame_seconds > self.target_duration:
+                self.flush()
+            self._buffer += self._silence
+            self._buffer_frames += 1
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer_frames:
+            return
+        index = len(self.segments)
+        name = f"segment_{index:05d}.mp3"
+        duration = self._buffer_frames * self.frame_seconds
+        url = self.publish(name, timestamp_tag(self._elapsed) + bytes(self._buffer), "audio/mpeg")
+
+        self.segments.append((name, duration))
+        self._elapsed += duration
+        self._buffer = bytearray()
+        self._buffer_frames = 0
+
+        self.playlist_url = self.publish(PLAYLIST_NAME, self.playlist().encode(), "application/vnd.apple.mpegurl")
+        if self.on_segment:
+            self.on_segment(index, url, self.playlist_url)
+
+    def finish(self) -> Optional[str]:
+        """Publish any buffered audio and the final playlist; returns the playlist URL."""
+        self.flush()
+        if self.segments:
+            self.playlist_url = self.publish(
+                PLAYLIST_NAME, self.playlist(complete=True).encode(), "application/vnd.apple.mpegurl"
+            )
+        return self.playlist_url
+
+    def playlist(self, complete: bool = False) -> str:
+        target = max([math.ceil(self.target_duration)] + [math.ceil(d) for _, d in self.segments])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for name, duration in self.segments:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(name)
+        if complete:
+            lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,276 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Optional, Dict, Deque, Iterator, AsyncIterator
+from pydantic import BaseModel
+from langchain_core.runnables import Runnable, RunnableConfig
+from agents.utils.metrics import metrics, percentile
+
+
+class HedgingPolicy(BaseModel):
+    """
+    Controls when a slow LLM call gets a duplicate ("hedge") request.
+
+    A hedge is only sent once a call has been running longer than the rolling
+    `percentile` latency of its route, and only while the budget allows it.
+    """
+    enabled: bool = False
+    percentile: float = 0.95
+    min_samples: int = 20            # observations needed before hedging kicks in
+    window_size: int = 200           # rolling window used for the percentile
+    min_delay_seconds: float = 2.0   # never hedge calls faster than this
+    max_hedge_ratio: float = 0.10    # at most 10% of calls may be hedged
+    max_inflight_hedges: int = 4     # cap on concurrent duplicate requests
+
+    @classmethod
+    def from_env(cls) -> "HedgingPolicy":
+        return cls(
+            enabled=os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+            percentile=float(os.getenv("LLM_HEDGING_PERCENTILE", 0.95)),
+            min_samples=int(os.getenv("LLM_HEDGING_MIN_SAMPLES", 20)),
+            min_delay_seconds=float(os.getenv("LLM_HEDGING_MIN_DELAY_SECONDS", 2.0)),
+            max_hedge_ratio=float(os.getenv("LLM_HEDGING_MAX_RATIO", 0.10)),
+            max_inflight_hedges=int(os.getenv("LLM_HEDGING_MAX_INFLIGHT", 4)),
+        )
+
+
+class _RouteStats:
+    """Rolling latency window and hedge budget for one named route."""
+
+    def __init__(self, window_size: int):
+        self.latencies: Deque[float] = deque(maxlen=window_size)
+        self.calls = 0
+        self.hedges = 0
+        self.inflight_hedges = 0
+        self.lock = threading.Lock()
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_HEDGING_MAX_WORKERS", 32)),
+    thread_name_prefix="llm-hedge"
+)
+_route_stats: Dict[str, _RouteStats] = {}
+_route_stats_lock = threading.Lock()
+
+
+def _stats_for(name: str, window_size: int) -> _RouteStats:
+    with _route_stats_lock:
+        if name not in _route_stats:
+            _route_stats[name] = _RouteStats(window_size)
+        return _route_stats[name]
+
+
+class HedgedLLM(Runnable):
+    """
+    Wraps a chat model and hedges slow calls.
+
+    When hedging is disabled the wrapper only records latencies, so the
+    rolling percentiles are warm by the time the policy is switched on.
+    Every call records:
+      - llm.<name>.latency          latency the caller actually observed
+      - llm.<name>.primary_latency  latency of the first attempt (unhedged baseline)
+      - llm.<name>.calls / .hedged / .hedge_wins
+    """
+
+    def __init__(self, llm: Runnable, name: str, policy: Optional[HedgingPolicy] = None):
+        self.llm = llm
+        self.name = name
+        self.policy = policy or HedgingPolicy.from_env()
+        self.stats = _stats_for(name, self.policy.window_size)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        start = time.monotonic()
+        with self.stats.lock:
+            self.stats.calls += 1
+        metrics.incr(f"llm.{self.name}.calls")
+
+        delay = self._hedge_delay()
+        if delay is None:
+            result = self.llm.invoke(input, config, **kwargs)
+            elapsed = time.monotonic() - start
+            self._record_primary(elapsed)
+            self._record_observed(elapsed)
+            return result
+
+        primary = _executor.submit(self.llm.invoke, input, config, **kwargs)
+        primary.add_done_callback(lambda f: self._record_primary(time.monotonic() - start))
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._acquire_hedge():
+            result = primary.result()
+            self._record_observed(time.monotonic() - start)
+            return result
+
+        print(f"Hedging {self.name} LLM call after {delay:.2f}s")
+        hedge = _executor.submit(self.llm.invoke, input, config, **kwargs)
+        hedge.add_done_callback(lambda f: self._release_hedge())
+
+        result = self._first_successful(primary, hedge)
+        self._record_observed(time.monotonic() - start)
+        return result
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """Async invoke with the same hedging policy, using tasks instead of threads."""
+        start = time.monotonic()
+        with self.stats.lock:
+            self.stats.calls += 1
+        metrics.incr(f"llm.{self.name}.calls")
+
+        delay = self._hedge_delay()
+        if delay is None:
+            result = await self.llm.ainvoke(input, config, **kwargs)
+            elapsed = time.monotonic() - start
+            self._record_primary(elapsed)
+            self._record_observed(elapsed)
+            return result
+
+        # The losing request is left to finish (as in invoke) so its latency
+        # still lands in the rolling window
+        primary = asyncio.ensure_future(self.llm.ainvoke(input, config, **kwargs))
+        primary.add_done_callback(lambda f: self._record_primary(time.monotonic() - start))
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._acquire_hedge():
+            result = await primary
+            self._record_observed(time.monotonic() - start)
+            return result
+
+        print(f"Hedging {self.name} LLM call after {delay:.2f}s")
+        hedge = asyncio.ensure_future(self.llm.ainvoke(input, config, **kwargs))
+        hedge.add_done_callback(lambda f: self._release_hedge())
+
+        result = await self._afirst_successful(primary, hedge)
+        self._record_observed(time.monotonic() - start)
+        return result
+
+    async def _afirst_successful(self, primary: "asyncio.Future", hedge: "asyncio.Future") -> Any:
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.incr(f"llm.{self.name}.hedge_wins")
+                    # Retrieve the loser's outcome when it lands so a late error isn't reported as unhandled
+                    for other in pending:
+                        other.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        """Async counterpart of stream(); never hedged."""
+        start = time.monotonic()
+        with self.stats.lock:
+            self.stats.calls += 1
+        metrics.incr(f"llm.{self.name}.calls")
+
+        first_chunk = True
+        async for chunk in self.llm.astream(input, config, **kwargs):
+            if first_chunk:
+                metrics.observe(f"llm.{self.name}.first_chunk_latency", time.monotonic() - start)
+                first_chunk = False
+            yield chunk
+
+        elapsed = time.monotonic() - start
+        self._record_primary(elapsed)
+        self._record_observed(elapsed)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        """
+        Stream from the wrapped model. Streams are never hedged (a duplicate
+        would have to be spliced mid-response), but their latency still feeds
+        the route's window; time to first chunk is recorded separately.
+        """
+        start = time.monotonic()
+        with self.stats.lock:
+            self.stats.calls += 1
+        metrics.incr(f"llm.{self.name}.calls")
+
+        first_chunk = True
+        for chunk in self.llm.stream(input, config, **kwargs):
+            if first_chunk:
+                metrics.observe(f"llm.{self.name}.first_chunk_latency", time.monotonic() - start)
+                first_chunk = False
+            yield chunk
+
+        elapsed = time.monotonic() - start
+        self._record_primary(elapsed)
+        self._record_observed(elapsed)
+
+    def _first_successful(self, primary: Future, hedge: Future) -> Any:
+        """Return the first response that succeeds; raise only if both fail."""
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.incr(f"llm.{self.name}.hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging should not apply."""
+        if not self.policy.enabled:
+            return None
+        with self.stats.lock:
+            samples = list(self.stats.latencies)
+        if len(samples) < self.policy.min_samples:
+            return None
+        threshold = percentile(samples, self.policy.percentile)
+        return max(threshold, self.policy.min_delay_seconds)
+
+    def _acquire_hedge(self) -> bool:
+        """Reserve hedge budget; False when the ratio or in-flight cap is exhausted."""
+        with self.stats.lock:
+            over_ratio = self.stats.hedges + 1 > self.policy.max_hedge_ratio * self.stats.calls
+            over_inflight = self.stats.inflight_hedges >= self.policy.max_inflight_hedges
+            if over_ratio or over_inflight:
+                metrics.incr(f"llm.{self.name}.hedge_budget_exhausted")
+                return False
+            self.stats.hedges += 1
+            self.stats.inflight_hedges += 1
+        metrics.incr(f"llm.{self.name}.hedged")
+        return True
+
+    def _release_hedge(self) -> None:
+        with self.stats.lock:
+            self.stats.inflight_hedges -= 1
+
+    def _record_primary(self, elapsed: float) -> None:
+        with self.stats.lock:
+            self.stats.latencies.append(elapsed)
+        metrics.observe(f"llm.{self.name}.primary_latency", elapsed)
+
+    def _record_observed(self, elapsed: float) -> None:
+        metrics.observe(f"llm.{self.name}.latency", elapsed)
+
+
+def hedging_report(name: str) -> Dict[str, Any]:
+    """
+    Summarise hedging for a route: how often it fired and how much it moved p99.
+
+    `p99_primary` is the tail latency the first attempt alone would have had;
+    `p99_observed` is what callers actually waited.
+    """
+    p99_primary = metrics.percentile(f"llm.{name}.primary_latency", 0.99)
+    p99_observed = metrics.percentile(f"llm.{name}.latency", 0.99)
+    return {
+        "route": name,
+        "calls": metrics.counter(f"llm.{name}.calls"),
+        "hedge_rate": metrics.ratio(f"llm.{name}.hedged", f"llm.{name}.calls"),
+        "hedge_win_rate": metrics.ratio(f"llm.{name}.hedge_wins", f"llm.{name}.hedged"),
+        "p99_primary": p99_primary,
+        "p99_observed": p99_observed,
+        "p99_improvement": (
+            p99_primary - p99_observed
+            if p99_primary is not None and p99_observed is not None else None
+        ),
+    }
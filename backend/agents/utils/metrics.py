@@ -0,0 +1,87 @@
+import math
+import threading
+from collections import deque
+from typing import Dict, Deque, Optional, Any
+
+
+class MetricsRegistry:
+    """
+    Small in-process registry for counters and latency samples.
+
+    Counters are monotonically increasing totals; histograms keep a bounded
+    window of recent observations so percentiles reflect current behaviour.
+    """
+
+    def __init__(self, window_size: int = 1024):
+        self.window_size = window_size
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter by the given value."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a single observation (e.g. a latency in seconds)."""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = deque(maxlen=self.window_size)
+            self._histograms[name].append(value)
+
+    def counter(self, name: str) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def percentile(self, name: str, p: float) -> Optional[float]:
+        """Return the p-th percentile (0-1) of a histogram, or None if empty."""
+        with self._lock:
+            samples = list(self._histograms.get(name, ()))
+        return percentile(samples, p)
+
+    def ratio(self, numerator: str, denominator: str) -> Optional[float]:
+        """Return counter(numerator) / counter(denominator), or None if no data."""
+        total = self.counter(denominator)
+        if not total:
+            return None
+        return self.counter(numerator) / total
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and summary statistics for every histogram."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {name: list(samples) for name, samples in self._histograms.items()}
+
+        return {
+            "counters": counters,
+            "histograms": {
+                name: {
+                    "count": len(samples),
+                    "p50": percentile(samples, 0.50),
+                    "p95": percentile(samples, 0.95),
+                    "p99": percentile(samples, 0.99),
+                }
+                for name, samples in histograms.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """Drop all recorded counters and samples."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def percentile(samples, p: float) -> Optional[float]:
+    """Nearest-rank percentile of a sequence of numbers."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+    return ordered[rank]
+
+
+# Process-wide registry shared by the agents
+metrics = MetricsRegistry()
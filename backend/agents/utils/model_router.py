@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from pydantic import BaseModel
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import Runnable, RunnableConfig
+from agents.utils.llm_hedging import HedgedLLM
+from agents.utils.metrics import metrics
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+
+class ModelRoute(BaseModel):
+    """Which model serves a task, what to fall back to, and the SLOs it should meet."""
+    model: str
+    fallbacks: List[str] = []
+    temperature: float = 0.7
+    latency_slo_seconds: float
+    cost_slo_usd: float  # target upper bound on the estimated cost of one call
+
+
+# USD per 1M tokens (input, output); used for cost estimates only
+MODEL_PRICING: Dict[str, Dict[str, float]] = {
+    "gemini-1.5-flash-8b": {"input": 0.0375, "output": 0.15},
+    "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+    "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+    "learnlm-1.5-pro-experimental": {"input": 1.25, "output": 5.00},
+}
+
+# Short outputs go to fast, cheap models; long-form scripts keep the heavier model.
+DEFAULT_ROUTES: Dict[str, ModelRoute] = {
+    "rag_answer": ModelRoute(
+        model="gemini-1.5-flash",
+        fallbacks=["learnlm-1.5-pro-experimental"],
+        latency_slo_seconds=8,
+        cost_slo_usd=0.002,
+    ),
+    "tweet": ModelRoute(
+        model="gemini-1.5-flash-8b",
+        fallbacks=["gemini-1.5-flash", "learnlm-1.5-pro-experimental"],
+        latency_slo_seconds=6,
+        cost_slo_usd=0.001,
+    ),
+    "blog": ModelRoute(
+        model="gemini-1.5-flash",
+        fallbacks=["learnlm-1.5-pro-experimental"],
+        latency_slo_seconds=30,
+        cost_slo_usd=0.005,
+    ),
+    "quiz": ModelRoute(
+        model="gemini-1.5-flash",
+        fallbacks=["learnlm-1.5-pro-experimental"],
+        latency_slo_seconds=25,
+        cost_slo_usd=0.005,
+    ),
+    "flashcards": ModelRoute(
+        model="gemini-1.5-flash",
+        fallbacks=["learnlm-1.5-pro-experimental"],
+        latency_slo_seconds=20,
+        cost_slo_usd=0.005,
+    ),
+    "json_fixup": ModelRoute(
+        model="gemini-1.5-flash-8b",
+        fallbacks=["gemini-1.5-flash"],
+        temperature=0.0,
+        latency_slo_seconds=8,
+        cost_slo_usd=0.001,
+    ),
+    "podcast_outline": ModelRoute(
+        model="learnlm-1.5-pro-experimental",
+        fallbacks=["gemini-1.5-pro", "gemini-1.5-flash"],
+        latency_slo_seconds=30,
+        cost_slo_usd=0.02,
+    ),
+    "podcast_script": ModelRoute(
+        model="learnlm-1.5-pro-experimental",
+        fallbacks=["gemini-1.5-pro", "gemini-1.5-flash"],
+        latency_slo_seconds=60,
+        cost_slo_usd=0.04,
+    ),
+}
+
+
+def load_routes() -> Dict[str, ModelRoute]:
+    """
+    Default routing table, overridden per task by LLM_ROUTING_TABLE.
+
+    LLM_ROUTING_TABLE may be inline JSON or a path to a JSON file of the form
+    {"tweet": {"model": "...", "fallbacks": [...], "latency_slo_seconds": 5, ...}}.
+    """
+    routes = dict(DEFAULT_ROUTES)
+    override = os.getenv("LLM_ROUTING_TABLE")
+    if not override:
+        return routes
+
+    try:
+        if os.path.exists(override):
+            with open(override) as f:
+                table = json.load(f)
+        else:
+            table = json.loads(override)
+        for task, route in table.items():
+            routes[task] = ModelRoute(**route)
+    except Exception as e:
+        print(f"Invalid LLM_ROUTING_TABLE, using defaults: {str(e)}")
+    return routes
+
+
+def estimate_cost(model: str, response: Any) -> Optional[float]:
+    """Estimate the USD cost of a response from its token usage, if known."""
+    usage = getattr(response, "usage_metadata", None)
+    pricing = MODEL_PRICING.get(model)
+    if not usage or not pricing:
+        return None
+    return (
+        usage.get("input_tokens", 0) * pricing["input"]
+        + usage.get("output_tokens", 0) * pricing["output"]
+    ) / 1_000_000
+
+
+class RoutedLLM(Runnable):
+    """
+    Runs a task on its routed model, falling back down the chain on errors.
+
+    Each attempt is logged as one JSON line (task, model, latency, cost, SLO
+    status) so the routing table can be tuned from real traffic.
+    """
+
+    def __init__(self, task: str, route: ModelRoute, candidates: List[tuple]):
+        self.task = task
+        self.route = route
+        self.candidates = candidates  # [(model_name, runnable), ...]
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        last_error = None
+        for attempt, (model, llm) in enumerate(self.candidates):
+            start = time.monotonic()
+            try:
+                response = llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                last_error = e
+                self._log(model, attempt, time.monotonic() - start, None, error=str(e))
+                continue
+            self._log(model, attempt, time.monotonic() - start, estimate_cost(model, response))
+            return response
+        raise last_error
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        """
+        Stream from the routed model. A candidate that fails before producing
+        any output falls back like invoke(); once chunks have been yielded the
+        error is raised, since the caller has already consumed partial output.
+        """
+        last_error = None
+        for attempt, (model, llm) in enumerate(self.candidates):
+            start = time.monotonic()
+            response = None
+            try:
+                for chunk in llm.stream(input, config, **kwargs):
+                    response = chunk if response is None else response + chunk
+                    yield chunk
+            except Exception as e:
+                self._log(model, attempt, time.monotonic() - start, None, error=str(e))
+                if response is not None:
+                    raise
+                last_error = e
+                continue
+            self._log(model, attempt, time.monotonic() - start, estimate_cost(model, response))
+            return
+        raise last_error
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        last_error = None
+        for attempt, (model, llm) in enumerate(self.candidates):
+            start = time.monotonic()
+            try:
+                response = await llm.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                last_error = e
+                self._log(model, attempt, time.monotonic() - start, None, error=str(e))
+                continue
+            self._log(model, attempt, time.monotonic() - start, estimate_cost(model, response))
+            return response
+        raise last_error
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        """Async counterpart of stream(), with the same fallback rules."""
+        last_error = None
+        for attempt, (model, llm) in enumerate(self.candidates):
+            start = time.monotonic()
+            response = None
+            try:
+                async for chunk in llm.astream(input, config, **kwargs):
+                    response = chunk if response is None else response + chunk
+                    yield chunk
+            except Exception as e:
+                self._log(model, attempt, time.monotonic() - start, None, error=str(e))
+                if response is not None:
+                    raise
+                last_error = e
+                continue
+            self._log(model, attempt, time.monotonic() - start, estimate_cost(model, response))
+            return
+        raise last_error
+
+    def _log(self, model: str, attempt: int, latency: float, cost: Optional[float], error: Optional[str] = None):
+        latency_ok = latency <= self.route.latency_slo_seconds
+        cost_ok = cost is None or cost <= self.route.cost_slo_usd
+
+        metrics.incr(f"route.{self.task}.{model}.calls")
+        metrics.observe(f"route.{self.task}.{model}.latency", latency)
+        if error:
+            metrics.incr(f"route.{self.task}.{model}.errors")
+        if attempt > 0:
+            metrics.incr(f"route.{self.task}.fallbacks")
+        if not latency_ok:
+            metrics.incr(f"route.{self.task}.latency_slo_breaches")
+        if not cost_ok:
+            metrics.incr(f"route.{self.task}.cost_slo_breaches")
+
+        logger.info(json.dumps({
+            "event": "llm_route",
+            "task": self.task,
+            "model": model,
+            "attempt": attempt,
+            "latency_seconds": round(latency, 3),
+            "latency_slo_seconds": self.route.latency_slo_seconds,
+            "latency_slo_met": latency_ok,
+            "estimated_cost_usd": cost,
+            "cost_slo_usd": self.route.cost_slo_usd,
+            "cost_slo_met": cost_ok,
+            "error": error,
+        }))
+
+
+class ModelRouter:
+    """Builds the chat model for each agent task from the routing table."""
+
+    def __init__(self, routes: Optional[Dict[str, ModelRoute]] = None):
+        self.routes = routes or load_routes()
+
+    def get_llm(
+        self,
+        task: str,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        base_url: str = GEMINI_BASE_URL,
+        temperature: Optional[float] = None,
+    ) -> RoutedLLM:
+        """
+        Return a runnable for `task`. Passing `model` pins the primary model
+        while keeping the route's fallbacks and SLOs.
+        """
+        if task not in self.routes:
+            raise ValueError(f"No model route configured for task '{task}'")
+
+        route = self.routes[task]
+        if model and model != route.model:
+            route = route.model_copy(update={"model": model})
+
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        candidates = []
+        for model_name in [route.model] + [m for m in route.fallbacks if m != route.model]:
+            chat_model = ChatOpenAI(
+                model=model_name,
+                base_url=base_url,
+                api_key=api_key,
+                temperature=route.temperature if temperature is None else temperature,
+            )
+            candidates.append((model_name, HedgedLLM(chat_model, name=f"{task}/{model_name}")))
+
+        print(f"Routing '{task}' to {route.model} (fallbacks: {', '.join(route.fallbacks) or 'none'})")
+        return RoutedLLM(task, route, candidates)
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router so the routing table is loaded once."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
@@ -0,0 +1,305 @@
+import io
+import struct
+from array import array
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+# Bitrates in kbps indexed by [version_is_mpeg1][layer][bitrate_index]
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+_LAYERS = {3: 1, 2: 2, 1: 3}  # header layer bits -> layer number
+
+
+class FrameHeader(NamedTuple):
+    version_bits: int    # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer: int           # 1, 2 or 3
+    protected: bool      # CRC follows the header
+    bitrate: int         # kbps
+    sample_rate: int
+    padding: int
+    channel_mode: int    # 3 = mono
+    raw: bytes           # the 4 header bytes
+
+    @property
+    def is_mpeg1(self) -> bool:
+        return self.version_bits == 3
+
+    @property
+    def samples_per_frame(self) -> int:
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and not self.is_mpeg1:
+            return 576
+        return 1152
+
+    @property
+    def frame_length(self) -> int:
+        if self.layer == 1:
+            return (12 * self.bitrate * 1000 // self.sample_rate + self.padding) * 4
+        coefficient = 72 if self.layer == 3 and not self.is_mpeg1 else 144
+        return coefficient * self.bitrate * 1000 // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self) -> int:
+        if self.layer != 3:
+            return 0
+        mono = self.channel_mode == 3
+        if self.is_mpeg1:
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+    def stream_format(self) -> Tuple[int, int, int, bool]:
+        """Parameters that must match for frames to be concatenated into one stream."""
+        return (self.version_bits, self.layer, self.sample_rate, self.channel_mode == 3)
+
+
+def parse_header(data: bytes, offset: int = 0) -> Optional[FrameHeader]:
+    """Decode the 4-byte frame header at `offset`, or None if it is not a valid header."""
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset:offset + 4]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    rate_index = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format which we do not support
+    layer = _LAYERS[layer_bits]
+    return FrameHeader(
+        version_bits=version_bits,
+        layer=layer,
+        protected=not (b1 & 0x01),
+        bitrate=_BITRATES[(version_bits == 3, layer)][bitrate_index],
+        sample_rate=_SAMPLE_RATES[version_bits][rate_index],
+        padding=(b2 >> 1) & 0x01,
+        channel_mode=(b3 >> 6) & 0x03,
+        raw=bytes(data[offset:offset + 4]),
+    )
+
+
+def id3v2_length(data: bytes) -> int:
+    """Size of a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def is_info_frame(header: FrameHeader, frame: bytes) -> bool:
+    """True for a Xing/Info or VBRI metadata frame (carries no audio of its own)."""
+    xing_offset = 4 + side_info_length_with_crc(header)
+    if frame[xing_offset:xing_offset + 4] in (b"Xing", b"Info"):
+        return True
+    return frame[36:40] == b"VBRI"
+
+
+def side_info_length_with_crc(header: FrameHeader) -> int:
+    return header.side_info_length + (2 if header.protected else 0)
+
+
+def iter_frames(data: bytes) -> Iterator[Tuple[FrameHeader, memoryview]]:
+    """
+    Yield (header, frame bytes) for every audio frame in an MP3 byte string.
+
+    ID3v2 tags, Xing/Info/VBRI frames and trailing ID3v1 tags are skipped;
+    garbage between frames is stepped over by resyncing on the next header
+    that is followed by another valid header (or the end of the data).
+    """
+    view = memoryview(data)
+    for header, offset in iter_frame_offsets(data):
+        yield header, view[offset:offset + header.frame_length]
+
+
+def iter_frame_offsets(data: bytes) -> Iterator[Tuple[FrameHeader, int]]:
+    """
+    Like iter_frames, but yields (header, byte offset) without slicing the
+    frames, so it can scan an mmap'd file cheaply.
+    """
+    offset = id3v2_length(data)
+    end = len(data)
+    first = True
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or offset + header.frame_length > end:
+            if header is not None and offset + header.frame_length > end:
+                break  # truncated final frame
+            offset += 1
+            continue
+        length = header.frame_length
+        following = offset + length
+        if following + 4 <= end and parse_header(data, following) is None and data[following:following + 3] != b"TAG":
+            offset += 1  # false sync inside garbage
+            continue
+        if not (first and header.layer == 3 and is_info_frame(header, data[offset:following])):
+            yield header, offset
+        first = False
+        offset = following
+
+
+def silence_frame(template: FrameHeader) -> bytes:
+    """
+    One Layer III frame of digital silence matching `template`'s stream parameters.
+
+    With all-zero side info (main_data_begin = 0, part2_3_length = 0) the
+    decoder produces zero samples without touching the bit reservoir, so the
+    frame can sit between independently encoded segments.
+    """
+    b1 = template.raw[1] | 0x01          # no CRC
+    b2 = template.raw[2] & ~0x02 & 0xFF  # no padding
+    header = FrameHeader(
+        version_bits=template.version_bits,
+        layer=template.layer,
+        protected=False,
+        bitrate=template.bitrate,
+        sample_rate=template.sample_rate,
+        padding=0,
+        channel_mode=template.channel_mode,
+        raw=bytes([0xFF, b1, b2, template.raw[3]]),
+    )
+    return header.raw + bytes(header.frame_length - 4)
+
+
+class Mp3Assembler:
+    """
+    Streams MP3 segments and gaps of silence into one file without decoding.
+
+    Frames are copied straight to disk, so memory stays flat however long
+    the episode is. The first frame written is a placeholder Xing/Info frame
+    that `close()` fills in with the final frame count, byte count and seek
+    table, giving players an exact duration even when segments differ in
+    bitrate. Segments whose sample rate or channel layout differ from the
+    first one are re-encoded to match (the only path that touches ffmpeg).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "wb")
+        self._format: Optional[Tuple[int, int, int, bool]] = None
+        self._template: Optional[FrameHeader] = None
+        self._silence: Optional[bytes] = None
+        self._info_frame_length = 0
+        self._bitrates = set()
+        self.samples_per_frame = 0
+        self.sample_rate = 0
+        self.frame_offsets = array("Q")  # byte offset of every audio frame
+        self.segments: List[Tuple[float, float]] = []  # (start, end) seconds of each appended segment
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frame_offsets)
+
+    @property
+    def duration_seconds(self) -> float:
+        if not self.sample_rate:
+            return 0.0
+        return self.frame_count * self.samples_per_frame / self.sample_rate
+
+    def append(self, data: bytes) -> Tuple[float, float]:
+        """Append one encoded segment; returns its (start, end) time in seconds."""
+        start = self.duration_seconds
+        first_frame = self.frame_count
+        for header, frame in iter_frames(data):
+            if self._format is None:
+                self._start_stream(header)
+            elif header.stream_format() != self._format:
+                return self._append_conformed(data, start, first_frame)
+            self._write_frame(header, frame)
+        self.segments.append((start, self.duration_seconds))
+        return self.segments[-1]
+
+    def append_silence(self, duration_ms: int) -> None:
+        """Append at least `duration_ms` of silence at the stream's bitrate."""
+        if self._template is None:
+            return  # nothing to match yet; leading silence is dropped
+        frames = -(-duration_ms * self.sample_rate // (1000 * self.samples_per_frame))
+        for _ in range(frames):
+            self._write_frame(self._template, self._silence)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self._info_frame_length:
+            info_frame = self._build_info_frame()
+            self._file.seek(0)
+            self._file.write(info_frame)
+        self._file.close()
+
+    def __enter__(self) -> "Mp3Assembler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start_stream(self, header: FrameHeader) -> None:
+        self._format = header.stream_format()
+        self._template = header
+        self._silence = silence_frame(header)
+        self.samples_per_frame = header.samples_per_frame
+        self.sample_rate = header.sample_rate
+        if header.layer == 3 and len(self._silence) >= 4 + header.side_info_length + 120:
+            self._info_frame_length = len(self._silence)
+            self._file.write(bytes(self._info_frame_length))  # filled in by close()
+
+    def _write_frame(self, header: FrameHeader, frame) -> None:
+        self.frame_offsets.append(self._file.tell())
+        self._bitrates.add(header.bitrate)
+        self._file.write(frame)
+
+    def _append_conformed(self, data: bytes, start: float, first_frame: int) -> Tuple[float, float]:
+        """Re-encode a segment whose stream parameters differ, then append it."""
+        from pydub import AudioSegment
+
+        # Drop whatever frames of this segment were already written
+        if first_frame < self.frame_count:
+            self._file.seek(self.frame_offsets[first_frame])
+            self._file.truncate()
+            del self.frame_offsets[first_frame:]
+
+        audio = AudioSegment.from_file(io.BytesIO(data), format="mp3")
+        audio = audio.set_frame_rate(self.sample_rate).set_channels(1 if self._format[3] else 2)
+        buffer = io.BytesIO()
+        audio.export(buffer, format="mp3", bitrate=f"{self._template.bitrate}k")
+
+        for header, frame in iter_frames(buffer.getvalue()):
+            if header.stream_format() == self._format:
+                self._write_frame(header, frame)
+        self.segments.append((start, self.duration_seconds))
+        return self.segments[-1]
+
+    def _build_info_frame(self) -> bytes:
+        header = self._template
+        total_bytes = self._file.seek(0, io.SEEK_END)
+        tag = b"Info" if len(self._bitrates) <= 1 else b"Xing"
+
+        toc = bytearray(100)
+        if self.frame_count:
+            for i in range(100):
+                offset = self.frame_offsets[min(self.frame_count - 1, i * self.frame_count // 100)]
+                toc[i] = min(255, offset * 256 // total_bytes)
+
+        body = (
+            tag
+            + struct.pack(">I", 0x0007)  # frames, bytes and TOC present
+            + struct.pack(">I", self.frame_count)
+            + struct.pack(">I", total_bytes)
+            + bytes(toc)
+        )
+        frame = bytearray(self._silence)
+        position = 4 + header.side_info_length
+        frame[position:position + len(body)] = body
+        return bytes(frame)
@@ -40,6 +40,10 @@ class PDFProcessor:
         self.index = None
         self.create_index(index_name=pinecone_index_name)
 
+        # pdf_title -> (doc_hash, looked up at); hashes only change on re-index
+        self._doc_hash_cache: Dict[str, Tuple[str, float]] = {}
+        self.doc_hash_ttl = float(os.getenv("DOC_HASH_CACHE_TTL_SECONDS", 300))
+
     def create_index(self, index_name: str = "pdf-semantic-chunking1"):
         """Create and initialize Pinecone index."""
         print(f"----------------------Index Creation----------------------\n")
@@ -129,6 +133,30 @@ class PDFProcessor:
         
         return False, []
 
+    def get_document_hash(self, pdf_title: str) -> Optional[str]:
+        """Content hash of the indexed document with this title, or None if it is not indexed."""
+        cached = self._doc_hash_cache.get(pdf_title)
+        if cached is not None and time.monotonic() - cached[1] < self.doc_hash_ttl:
+            return cached[0]
+        if not self.index:
+            raise ValueError("Index not initialized. Call create_index() first.")
+
+        query_response = self.index.query(
+            vector=[0] * self.dims,  # Dummy vector for metadata-only query
+            top_k=1,
+            filter={"title": pdf_title},
+            include_metadata=True
+        )
+        if not query_response.matches:
+            return None  # not indexed yet; don't remember the miss
+        doc_hash = query_response.matches[0].metadata.get("doc_hash")
+        self._doc_hash_cache[pdf_title] = (doc_hash, time.monotonic())
+        return doc_hash
+
+    def forget_document_hash(self, pdf_title: str) -> None:
+        """Drop the remembered hash so the next lookup sees a re-indexed or deleted document."""
+        self._doc_hash_cache.pop(pdf_title, None)
+
     def delete_document_chunks(self, chunk_ids: List[str]) -> bool:
         """Delete specific chunks from the index."""
         try:
@@ -214,6 +242,7 @@ class PDFProcessor:
         # Add document hash
         for m in metadata:
             m["doc_hash"] = doc_hash
+        self._doc_hash_cache[doc_info["title"]] = (doc_hash, time.monotonic())
         
         # Process in batches
         for i in range(0, len(splits), batch_size):
@@ -5,6 +5,8 @@ from botocore.exceptions import ClientError
 import os
 from datetime import datetime
 import re
+import uuid
+from urllib.parse import urlparse
 
 class S3Storage:
     def __init__(self, bucket_name: str):
@@ -19,19 +21,14 @@ class S3Storage:
         # Convert to lowercase for consistency
         return sanitized.lower()
 
-    def upload_file(self, file_path: str, podcast_title: str, pdf_title: str) -> str:
+    def upload_file(self, file_path: str, podcast_title: str, pdf_title: str, episode_key: str = None) -> str:
         """
         Upload a file to S3 with organized folder structure
         Returns the S3 URL of the uploaded file
         """
         try:
-            # Sanitize the podcast and PDF titles
-            safe_podcast_title = self.sanitize_filename(podcast_title)
-            safe_pdf_title = self.sanitize_filename(pdf_title)
-            
-            # Create the S3 key with folder structure: podcast/{pdf_title}/{podcast_title}_{timestamp}.mp3
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            s3_key = f"podcast/{safe_pdf_title}/{safe_podcast_title}_{timestamp}.mp3"
+            # Create the S3 key with folder structure: podcast/{pdf_title}/{podcast_title}_{timestamp}_{id}.mp3
+            s3_key = (episode_key or self.episode_key(podcast_title, pdf_title)) + ".mp3"
             
             # Upload the file
             extra_args = {}
@@ -50,6 +47,40 @@ class S3Storage:
             print(f"Error uploading to S3: {str(e)}")
             raise
 
+    def episode_key(self, podcast_title: str, pdf_title: str) -> str:
+        """
+        Key stem shared by everything stored for one episode: the audio
+        (<stem>.mp3), its sidecars (<stem>_script.txt, ...) and the
+        progressive stream folder (<stem>_stream/)
+        """
+        safe_podcast_title = self.sanitize_filename(podcast_title)
+        safe_pdf_title = self.sanitize_filename(pdf_title)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"podcast/{safe_pdf_title}/{safe_podcast_title}_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+    def stream_prefix(self, episode_key: str) -> str:
+        """S3 folder for the progressive (segmented) version of a podcast"""
+        return f"{episode_key}_stream/"
+
+    def upload_bytes(self, s3_key: str, data: bytes, content_type: str, cache_control: str = None) -> str:
+        """
+        Upload an in-memory object (e.g. a stream segment or playlist)
+        Returns the S3 URL of the uploaded object
+        """
+        try:
+            extra_args = {'ContentType': content_type}
+            if cache_control:
+                extra_args['CacheControl'] = cache_control
+            self.s3_client.put_object(Bucket=self.bucket_name, Key=s3_key, Body=data, **extra_args)
+            return f"https://{self.bucket_name}.s3.amazonaws.com/{s3_key}"
+        except ClientError as e:
+            print(f"Error uploading to S3: {str(e)}")
+            raise
+
+    def key_from_url(self, url: str) -> str:
+        """S3 key of an object URL returned by upload_file/upload_bytes"""
+        return urlparse(url).path.lstrip('/')
+
     def list_podcasts(self, pdf_title: str = None) -> list:
         """
         List all podcasts in the bucket, optionally filtered by PDF title
@@ -1,8 +1,9 @@
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
+from agents.utils.model_router import get_model_router, GEMINI_BASE_URL
+from agents.utils.structured_output import parse_structured_output
 
 class QuizQuestion(BaseModel):
     question: str = Field(description="The question text")
@@ -19,13 +20,15 @@ class QuizSet(BaseModel):
     recommended_time: int = Field(description="Recommended time in minutes")
 
 class QuizGenerator:
-    def __init__(self, api_key: str, model: str = "learnlm-1.5-pro-experimental", base_url: str = "https://generativelanguage.googleapis.com/v1beta/openai/"):
-        self.llm = ChatOpenAI(
+    def __init__(self, api_key: str, model: Optional[str] = None, base_url: str = GEMINI_BASE_URL):
+        # model=None uses the "quiz" route from the routing table
+        self.llm = get_model_router().get_llm(
+            "quiz",
+            api_key=api_key,
             model=model,
-            base_url=base_url,
-            temperature=0.7,
-            api_key=api_key
+            base_url=base_url
         )
+        self.fixup_llm = get_model_router().get_llm("json_fixup", api_key=api_key, base_url=base_url)
         
         self.quiz_generation_prompt = """
         Create a quiz based on the following context and question. The quiz should test understanding
@@ -95,8 +98,14 @@ class QuizGenerator:
             # Generate quiz content
             response = self.llm.invoke(formatted_prompt)
             
-            # Parse into QuizSet
-            quiz_set = parser.parse(response.content)
+            # Parse into QuizSet, repairing malformed or truncated output locally
+            quiz_set = parse_structured_output(
+                parser,
+                response.content,
+                name="quiz",
+                fixup_llm=self.fixup_llm,
+                defaults=lambda data: self._quiz_defaults(question, data)
+            )
             
             # Validate question count
             if len(quiz_set.questions) != num_questions:
@@ -108,6 +117,16 @@ class QuizGenerator:
             print(f"Error generating quiz: {str(e)}")
             raise
 
+    def _quiz_defaults(self, question: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Fallback values for QuizSet fields lost when the output was truncated."""
+        num_questions = len(data.get("questions", []))
+        return {
+            "title": f"Quiz: {question}",
+            "description": f"Questions about {question}",
+            "total_points": num_questions,
+            "recommended_time": max(1, 2 * num_questions)
+        }
+
     def grade_quiz(self, quiz: Dict[str, Any], user_answers: List[str]) -> Dict[str, Any]:
         """
         Grade a completed quiz and provide feedback.
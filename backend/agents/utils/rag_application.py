@@ -2,9 +2,9 @@
 import os
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from agents.utils.pdf_processor import PDFProcessor
+from agents.utils.model_router import get_model_router
 from typing import List, Dict, Any, Optional  
 
 load_dotenv()
@@ -22,7 +22,7 @@ class RAGApplication:
         if not openai_api_key or not pinecone_api_key or not pinecone_index_name:
             raise ValueError("Missing API keys. Check your .env file.")
 
-        self.llm = ChatOpenAI(model="learnlm-1.5-pro-experimental",base_url="https://generativelanguage.googleapis.com/v1beta/openai/", temperature=0.7, api_key=gemini_api_key)
+        self.llm = get_model_router().get_llm("rag_answer", api_key=gemini_api_key)
         self.pdf_processor = PDFProcessor(
             openai_api_key=openai_api_key,
             pinecone_api_key=pinecone_api_key,
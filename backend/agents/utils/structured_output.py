@@ -0,0 +1,294 @@
+import re
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from agents.utils.metrics import metrics
+
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+
+FIXUP_PROMPT = """The following text was supposed to be a JSON object matching the schema below, but it could not be parsed.
+Return ONLY the corrected JSON object. Keep every piece of content that is present; do not invent new content.
+
+Schema:
+{format_instructions}
+
+Broken output:
+{text}
+"""
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the body of the first fenced code block, or the text unchanged."""
+    match = FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def _scan(text: str) -> Tuple[List[Tuple[int, str]], str, bool]:
+    """
+    Walk a (possibly truncated) JSON document.
+
+    Returns the safe cut points as (position, closers) pairs, the closers
+    needed at the end of the text, and whether the text ends inside a string.
+    A cut point sits right after a complete value, so text[:position] + closers
+    is valid JSON as long as everything before it was.
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    in_string = False
+    escaped = False
+    string_is_value = False
+    after_colon = False
+    in_literal = False  # inside a bare number/true/false/null
+
+    def is_value_position() -> bool:
+        return bool(stack) and (stack[-1] == "]" or after_colon)
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+                if string_is_value:
+                    cuts.append((i + 1, "".join(reversed(stack))))
+            continue
+
+        if in_literal and not (ch.isalnum() or ch in "+-."):
+            in_literal = False
+            cuts.append((i, "".join(reversed(stack))))
+
+        if ch == '"':
+            string_is_value = is_value_position()
+            after_colon = False
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            after_colon = False
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, "".join(reversed(stack))))
+            if not stack:
+                break
+        elif ch == ":":
+            after_colon = True
+        elif ch == ",":
+            after_colon = False
+        elif (ch.isalnum() or ch == "-") and not in_literal:
+            in_literal = is_value_position()
+            after_colon = False
+
+    return cuts, "".join(reversed(stack)), in_string
+
+
+def _remove_trailing_commas(text: str) -> str:
+    """Drop commas that directly precede a closing bracket (outside strings)."""
+    out = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == ",":
+            rest = text[i + 1:].lstrip()
+            if not rest or rest[0] in "}]":
+                continue
+        out.append(ch)
+    return "".join(out)
+
+
+# Candidate starts tried before giving up; each try is a linear decode
+MAX_JSON_STARTS = 20
+
+# A trailing `, "key":` (or bare `"key"`) whose value never arrived
+DANGLING_KEY = re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+
+# A trailing `, {` (or `[`) left empty once its dangling key is dropped
+EMPTY_OPENER = re.compile(r",?\s*[\[{]\s*$")
+
+
+def _json_starts(text: str) -> List[int]:
+    """Positions of every `{` and `[`, in order, so prose like "[result]" before the JSON is skipped."""
+    return [i for i, ch in enumerate(text) if ch in "{["][:MAX_JSON_STARTS]
+
+
+def _trim_incomplete_token(body: str, in_string: bool) -> str:
+    """
+    Drop a token cut off mid-way: a dangling backslash escape inside an open
+    string (which is then closed), or a partial bare literal such as `tru`
+    or `1.` after the last complete value.
+    """
+    if in_string:
+        match = re.search(r"(\\+)(u[0-9a-fA-F]{0,3})?$", body)
+        if match and len(match.group(1)) % 2 == 1:
+            body = body[:match.end(1) - 1]
+        return body + '"'
+    body = body.rstrip()
+    match = re.search(r"[A-Za-z0-9+\-.]+$", body)
+    if match:
+        try:
+            json.loads(match.group(0))
+        except ValueError:
+            body = body[:match.start()]
+    return body
+
+
+def _close_truncated(body: str) -> Optional[Any]:
+    """Close the open string and brackets of a truncated document."""
+    _, _, in_string = _scan(body)
+    trimmed = _trim_incomplete_token(body, in_string).rstrip()
+    without_key = DANGLING_KEY.sub("", trimmed)
+    for candidate in (trimmed, EMPTY_OPENER.sub("", without_key), without_key):
+        candidate = _remove_trailing_commas(candidate.rstrip().rstrip(":").rstrip())
+        _, closers, _ = _scan(candidate)
+        try:
+            return json.loads(_remove_trailing_commas(candidate + closers))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    Best-effort local repair of LLM JSON output.
+
+    Handles code fences, prose before/after the JSON (including prose with
+    brackets of its own), trailing commas and a truncated tail (unterminated
+    strings, partial literals and unclosed objects/arrays).
+
+    Each `{`/`[` outside an earlier value is decoded whole, or else closed as
+    a truncated document (which then runs to the end of the text). Of the
+    objects/arrays found, the longest wins, the earliest on ties: an outer
+    array beats the elements inside it, and a real payload beats a short
+    bracketed aside such as "[1]" in the preamble.
+    Returns the decoded value, or None if nothing usable could be recovered.
+    """
+    body = strip_code_fences(text)
+    decoder = json.JSONDecoder()
+    best, best_length = None, 0
+    consumed = 0
+    for start in _json_starts(body):
+        if start < consumed:
+            continue  # inside a value already decoded
+        rest = _remove_trailing_commas(body[start:])
+        try:
+            # Complete document followed by stray prose
+            value, length = decoder.raw_decode(rest)
+        except json.JSONDecodeError:
+            value, length = _close_truncated(rest), len(rest)
+            if value is None:
+                continue
+        if not isinstance(value, (dict, list)):
+            continue
+        # Offsets in `rest` can run short of `body` by removed commas; only a lower bound is needed
+        consumed = start + length
+        if length > best_length:
+            best, best_length = value, length
+    return best
+
+
+def salvage_json(text: str, max_attempts: int = 50) -> List[Any]:
+    """
+    Partial salvage of truncated JSON.
+
+    Builds progressively shorter documents cut at the last complete values,
+    so a half-written trailing array element is dropped rather than guessed.
+    Returned candidates are ordered from most to least content.
+    """
+    text = strip_code_fences(text)
+    for start in _json_starts(text):
+        body = _remove_trailing_commas(text[start:])
+        cuts, _, _ = _scan(body)
+
+        candidates = []
+        for position, closers in reversed(cuts[-max_attempts:]):
+            snippet = _remove_trailing_commas(body[:position].rstrip().rstrip(",") + closers)
+            try:
+                candidates.append(json.loads(snippet))
+            except json.JSONDecodeError:
+                continue
+        if candidates:
+            return candidates
+    return []
+
+
+def _validate(model: Type[Any], data: Any, defaults: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]):
+    if defaults and isinstance(data, dict):
+        data = {**defaults(data), **data}
+    return model.model_validate(data)
+
+
+def parse_structured_output(
+    parser: Any,
+    text: str,
+    name: str,
+    fixup_llm: Optional[Any] = None,
+    defaults: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Any:
+    """
+    Parse LLM output with a PydanticOutputParser, repairing instead of regenerating.
+
+    Order of attempts, cheapest first:
+      1. parser.parse on the raw text
+      2. local JSON repair (fences, prose, trailing commas, truncated tail)
+      3. partial salvage, dropping incomplete trailing elements
+      4. one targeted fix-up call on `fixup_llm`, if provided
+    `defaults(data)` can supply values for required fields lost to truncation.
+    Outcomes are counted under parse.<name>.<outcome>.
+    """
+    model = parser.pydantic_object
+    metrics.incr(f"parse.{name}.attempts")
+
+    try:
+        result = parser.parse(text)
+        metrics.incr(f"parse.{name}.direct")
+        return result
+    except Exception as e:
+        first_error = e
+
+    repaired = repair_json(text)
+    if repaired is not None:
+        try:
+            result = _validate(model, repaired, defaults)
+            print(f"Repaired malformed {name} output locally")
+            metrics.incr(f"parse.{name}.repaired")
+            return result
+        except Exception:
+            pass
+
+    for candidate in salvage_json(text):
+        try:
+            result = _validate(model, candidate, defaults)
+            print(f"Salvaged partial {name} output locally")
+            metrics.incr(f"parse.{name}.salvaged")
+            return result
+        except Exception:
+            continue
+
+    if fixup_llm is not None:
+        try:
+            response = fixup_llm.invoke(FIXUP_PROMPT.format(
+                format_instructions=parser.get_format_instructions(),
+                text=text
+            ))
+            fixed = repair_json(response.content)
+            if fixed is not None:
+                result = _validate(model, fixed, defaults)
+                print(f"Fixed malformed {name} output with a fix-up call")
+                metrics.incr(f"parse.{name}.fixup")
+                return result
+        except Exception as e:
+            print(f"Fix-up call for {name} output failed: {str(e)}")
+
+    metrics.incr(f"parse.{name}.failed")
+    raise first_error
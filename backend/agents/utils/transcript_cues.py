@@ -0,0 +1,78 @@
+import re
+from typing import Iterable, List, NamedTuple
+
+# Longest cue text shown at once (two caption lines of ~42 characters)
+CUE_MAX_CHARS = 84
+
+
+class TranscriptCue(NamedTuple):
+    start: float  # seconds into the episode
+    end: float
+    speaker: str
+    text: str
+
+
+def format_timestamp(seconds: float) -> str:
+    """WebVTT timestamp, HH:MM:SS.mmm"""
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def split_cue(cue: TranscriptCue, max_chars: int = CUE_MAX_CHARS) -> List[TranscriptCue]:
+    """
+    Break a long speaker turn into caption-sized cues at sentence (then
+    word) boundaries. The turn's start and end are exact; time inside it is
+    shared out by character count.
+    """
+    if len(cue.text) <= max_chars:
+        return [cue]
+
+    pieces: List[str] = []
+    for sentence in re.split(r"(?<=[.!?;:])\s+", cue.text.strip()):
+        current = ""
+        for word in sentence.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            if pieces and len(pieces[-1]) + 1 + len(current) <= max_chars:
+                pieces[-1] = f"{pieces[-1]} {current}"
+            else:
+                pieces.append(current)
+
+    total_chars = sum(len(piece) for piece in pieces)
+    cues = []
+    position, chars_so_far = cue.start, 0
+    for piece in pieces:
+        chars_so_far += len(piece)
+        end = cue.start + (cue.end - cue.start) * chars_so_far / total_chars
+        cues.append(TranscriptCue(position, end, cue.speaker, piece))
+        position = end
+    return cues
+
+
+def to_vtt(cues: Iterable[TranscriptCue]) -> str:
+    """WebVTT with a voice tag per speaker turn"""
+    lines = ["WEBVTT", ""]
+    for cue in cues:
+        for part in split_cue(cue):
+            lines.extend([
+                f"{format_timestamp(part.start)} --> {format_timestamp(part.end)}",
+                f"<v {part.speaker}>{part.text}",
+                ""
+            ])
+    return "\n".join(lines)
+
+
+def to_txt(cues: Iterable[TranscriptCue]) -> str:
+    """Plain transcript, one "[MM:SS] Speaker: text" line per turn"""
+    lines = []
+    for cue in cues:
+        minutes, seconds = divmod(int(cue.start), 60)
+        lines.append(f"[{minutes:02d}:{seconds:02d}] {cue.speaker}: {cue.text}")
+    return "\n".join(lines) + "\n"
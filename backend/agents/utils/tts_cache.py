@@ -0,0 +1,117 @@
+import os
+import re
+import hashlib
+import tempfile
+import unicodedata
+from typing import Any, Dict, Optional
+from agents.utils.disk_lru import DiskLRUStore
+from agents.utils.metrics import metrics
+
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form of a line for cache keys: NFC, collapsed whitespace, trimmed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesised speech.
+
+    Entries are encoded audio bytes keyed by sha256(voice_id, model, settings,
+    normalised text), so identical lines are synthesised once regardless of
+    which podcast they appear in. Audio lives in a local DiskLRUStore bounded
+    to `max_bytes`; when an S3 bucket is given, entries are also written
+    there and local misses fall back to it.
+
+    Counters: tts_cache.hits, .s3_hits, .misses, .evictions, .errors
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        s3_client: Optional[Any] = None,
+        bucket_name: Optional[str] = None,
+        s3_prefix: str = "tts-cache/",
+    ):
+        self.max_bytes = max_bytes
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.s3_prefix = s3_prefix
+        self.store = DiskLRUStore(cache_dir, max_bytes, suffix=".mp3", metric_prefix="tts_cache")
+
+    @classmethod
+    def from_env(cls) -> "TTSCache":
+        s3_client = None
+        bucket_name = None
+        if os.getenv("TTS_CACHE_S3_ENABLED", "false").lower() == "true":
+            import boto3
+            s3_client = boto3.client("s3")
+            bucket_name = os.getenv("AWS_BUCKET_NAME")
+        return cls(
+            cache_dir=os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "learnlab_tts_cache")),
+            max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", 512)) * 1024 * 1024),
+            s3_client=s3_client,
+            bucket_name=bucket_name,
+        )
+
+    @staticmethod
+    def make_key(voice_id: str, model: str, text: str, settings: Optional[Dict[str, Any]] = None) -> str:
+        settings_part = ",".join(f"{k}={settings[k]}" for k in sorted(settings)) if settings else ""
+        raw = "\x1f".join([voice_id, model, settings_part, normalize_tts_text(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio bytes, or None on a miss."""
+        data = self.store.get(key)
+        if data is not None:
+            metrics.incr("tts_cache.hits")
+            return data
+
+        data = self._get_s3(key)
+        if data is not None:
+            metrics.incr("tts_cache.s3_hits")
+            self.store.put(key, data)
+            return data
+
+        metrics.incr("tts_cache.misses")
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store audio bytes locally (and in S3 when configured)."""
+        self.store.put(key, data)
+        if self.s3_client is not None and self.bucket_name:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=f"{self.s3_prefix}{key}.mp3",
+                    Body=data,
+                    ContentType="audio/mpeg",
+                )
+            except Exception as e:
+                metrics.incr("tts_cache.errors")
+                print(f"Error writing TTS cache entry to S3: {str(e)}")
+
+    def _get_s3(self, key: str) -> Optional[bytes]:
+        if self.s3_client is None or not self.bucket_name:
+            return None
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=f"{self.s3_prefix}{key}.mp3")
+            return response["Body"].read()
+        except Exception as e:
+            # A missing key is the normal miss path; anything else is worth a log line
+            if getattr(e, "response", {}).get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                metrics.incr("tts_cache.errors")
+                print(f"Error reading TTS cache entry from S3: {str(e)}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        hits = metrics.counter("tts_cache.hits") + metrics.counter("tts_cache.s3_hits")
+        lookups = hits + metrics.counter("tts_cache.misses")
+        entries, total_bytes = self.store.usage()
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": hits / lookups if lookups else None,
+        }
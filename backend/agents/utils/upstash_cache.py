@@ -1,67 +1,278 @@
 import os
-from typing import Optional, Dict, Any
+import hashlib
+from typing import Optional, Dict, Any, Callable, List, Sequence, Tuple
+from agents.utils.metrics import metrics
+from agents.utils.cache_payload import encode_payload, decode_payload
 from agents.utils.upstash_semantic_cache.semantic_cache import SemanticCache
+from agents.utils.upstash_semantic_cache.local_tier import LocalCacheTier
 from datetime import datetime
 import json
 
-class PodcastCache:
-    def __init__(self):
-        """Initialize the semantic cache for podcast queries"""
+NAMESPACE_PREFIX = "content:"
+
+# output type -> (similarity threshold, TTL in hours; None keeps entries until invalidated)
+# Podcasts are expensive and pinned to stored audio, so they match strictly and never
+# expire; short text outputs can be looser but should be regenerated now and then.
+CONTENT_CACHE_POLICIES: Dict[str, Tuple[float, Optional[float]]] = {
+    "podcast": (0.97, None),
+    "flashcards": (0.95, 24 * 7),
+    "quiz": (0.95, 24 * 7),
+    "blog": (0.96, 24 * 3),
+    "tweet": (0.96, 24),
+}
+
+# Only useful while generating; a cache hit never needs them
+UNCACHED_FIELDS = ("conversation_history", "rag_context")
+
+class ContentCache:
+    def __init__(self, resolve_document_hash: Optional[Callable[[str], Optional[str]]] = None):
+        """
+        Initialize the semantic cache for generated content.
+
+        Entries live in one Upstash namespace per (document, output type,
+        generation parameters) and are keyed by the question alone, so a
+        lookup only searches comparable entries and dropping a document's
+        cache is a handful of namespace resets. `resolve_document_hash(pdf_title)`
+        returns the indexed content hash; without it (or before the PDF is
+        indexed) the title is hashed instead.
+
+        Thresholds and TTLs per output type come from CONTENT_CACHE_POLICIES
+        and can be overridden with CONTENT_CACHE_<TYPE>_MIN_SIMILARITY and
+        CONTENT_CACHE_<TYPE>_TTL_HOURS (0 disables expiry). Expired entries
+        are never served; start_sweeper() also deletes them in the background
+        and keeps every namespace within its entry and size budget.
+        """
+        self.resolve_document_hash = resolve_document_hash
         self.cache = SemanticCache(
             url=os.getenv("UPSTASH_VECTOR_REST_URL"),
             token=os.getenv("UPSTASH_VECTOR_REST_TOKEN"),
-            min_proximity=0.97  # Adjust similarity threshold as needed
+            min_proximity=0.97,  # Adjust similarity threshold as needed
+            # Hot questions are answered in-process; only true misses reach Upstash
+            local_tier=LocalCacheTier(
+                max_entries=int(os.getenv("SEMANTIC_CACHE_LOCAL_ENTRIES", 1024)),
+                # A floor: near-duplicates must also clear the output type's policy threshold
+                min_similarity=float(os.getenv("SEMANTIC_CACHE_LOCAL_MIN_SIMILARITY", 0.95)),
+                ttl_seconds=float(os.getenv("SEMANTIC_CACHE_LOCAL_TTL_SECONDS", 300)),
+                negative_ttl_seconds=float(os.getenv("SEMANTIC_CACHE_NEGATIVE_TTL_SECONDS", 30))
+            )
         )
+        self.policies = {}
+        for output_type, (min_similarity, ttl_hours) in CONTENT_CACHE_POLICIES.items():
+            prefix = f"CONTENT_CACHE_{output_type.upper()}"
+            min_similarity = float(os.getenv(f"{prefix}_MIN_SIMILARITY", min_similarity))
+            ttl_hours = float(os.getenv(f"{prefix}_TTL_HOURS", ttl_hours or 0))
+            self.policies[output_type] = (min_similarity, ttl_hours or None)
 
-    def generate_cache_key(self, query: str, pdf_title: str) -> str:
-        """Generate a unique cache key for the query-document pair"""
-        return f"{pdf_title}:{query}"
+    def generate_cache_key(self, query: str) -> str:
+        """The embedded key is the question alone; everything else is the namespace"""
+        return query.strip()
 
-    def get_cached_podcast(self, query: str, pdf_title: str) -> Optional[Dict[str, Any]]:
+    def document_namespace(
+        self,
+        pdf_title: Optional[str] = None,
+        doc_hash: Optional[str] = None,
+        output_type: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Namespace holding one document's cached content of one type and
+        parameter set. Without an output type, the prefix shared by all of
+        the document's namespaces.
         """
-        Try to retrieve a cached podcast for a similar query
-        Returns None if no similar query is found
+        if doc_hash is None and pdf_title is not None and self.resolve_document_hash is not None:
+            try:
+                doc_hash = self.resolve_document_hash(pdf_title)
+            except Exception as e:
+                print(f"Document hash lookup error: {str(e)}")
+        if not doc_hash:
+            doc_hash = hashlib.sha256(f"title:{pdf_title}".encode("utf-8")).hexdigest()
+        namespace = f"{NAMESPACE_PREFIX}{doc_hash[:32]}:"
+        if output_type is None:
+            return namespace
+        params_part = "default"
+        if params:
+            params_part = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return f"{namespace}{output_type}:{params_part}"
+
+    def get(
+        self,
+        query: str,
+        pdf_title: str,
+        output_type: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Try to retrieve cached content for a similar query
+        Returns None if no similar, unexpired entry is found
+        """
+        return self.get_many([(query, pdf_title, output_type, params)])[0]
+
+    def get_many(
+        self,
+        requests: Sequence[Tuple[str, str, str, Optional[Dict[str, Any]]]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Look up several (query, pdf_title, output_type, params) entries at once,
+        e.g. every output type requested for one question. Results come back
+        in request order; misses and errors are None.
         """
         try:
-            cache_key = self.generate_cache_key(query, pdf_title)
-            cached_data = self.cache.get(cache_key)
-            
-            if cached_data:
-                # Parse the cached string back into a dictionary
-                return json.loads(cached_data)
-            return None
-            
+            keys, namespaces, thresholds = [], [], []
+            for query, pdf_title, output_type, params in requests:
+                keys.append(self.generate_cache_key(query))
+                namespaces.append(self.document_namespace(pdf_title, output_type=output_type, params=params))
+                thresholds.append(self.policies.get(output_type, (self.cache.min_proximity, None))[0])
+            cached_values = self.cache.get_many(keys, namespace=namespaces, min_proximity=thresholds)
         except Exception as e:
             print(f"Cache retrieval error: {str(e)}")
-            return None
+            return [None] * len(requests)
 
-    def cache_podcast(self, query: str, pdf_title: str, podcast_data: Dict[str, Any]) -> bool:
+        results = []
+        for (_, _, output_type, _), cached_data in zip(requests, cached_values):
+            try:
+                data = decode_payload(cached_data) if cached_data else None
+            except Exception as e:
+                print(f"Cache payload error: {str(e)}")
+                data = None
+            metrics.incr(f"content_cache.{output_type}.{'hits' if data else 'misses'}")
+            results.append(data)
+        return results
+
+    def set(
+        self,
+        query: str,
+        pdf_title: str,
+        output_type: str,
+        data: Dict[str, Any],
+        params: Optional[Dict[str, Any]] = None
+    ) -> bool:
         """
-        Cache the podcast data for future retrieval
+        Cache generated content for future retrieval
+        Returns True if caching was successful
+        """
+        return self.set_many([(query, pdf_title, output_type, data, params)])
+
+    def set_many(
+        self,
+        entries: Sequence[Tuple[str, str, str, Dict[str, Any], Optional[Dict[str, Any]]]]
+    ) -> bool:
+        """
+        Cache several (query, pdf_title, output_type, data, params) entries in
+        batched upserts, e.g. when warming or migrating the cache.
         Returns True if caching was successful
         """
         try:
-            cache_key = self.generate_cache_key(query, pdf_title)
-            
-            # Add timestamp to podcast data
-            podcast_data['cached_at'] = datetime.now().isoformat()
-            
-            # Convert dictionary to string for caching
-            cache_value = json.dumps(podcast_data)
-            
-            self.cache.set(cache_key, cache_value)
+            keys, values, namespaces, ttls = [], [], [], []
+            for query, pdf_title, output_type, data, params in entries:
+                _, ttl_hours = self.policies.get(output_type, (None, None))
+
+                # Keep only what a hit needs, plus a timestamp
+                data = {k: v for k, v in data.items() if k not in UNCACHED_FIELDS}
+                data['cached_at'] = datetime.now().isoformat()
+
+                # Compact, compressed string for the vector metadata
+                cache_value = encode_payload(data)
+                metrics.observe("content_cache.payload_bytes", len(cache_value))
+
+                keys.append(self.generate_cache_key(query))
+                values.append(cache_value)
+                namespaces.append(self.document_namespace(pdf_title, output_type=output_type, params=params))
+                ttls.append(ttl_hours * 3600 if ttl_hours else None)
+
+            self.cache.set_many(keys, values, namespace=namespaces, ttl_seconds=ttls)
             return True
-            
+
         except Exception as e:
             print(f"Cache storage error: {str(e)}")
             return False
 
+    def invalidate_document(self, pdf_title: Optional[str] = None, doc_hash: Optional[str] = None) -> bool:
+        """Drop every cached output for one document"""
+        try:
+            for namespace in self.cache.namespaces(prefix=self.document_namespace(pdf_title, doc_hash)):
+                self.cache.flush(namespace=namespace)
+            return True
+        except Exception as e:
+            print(f"Cache invalidation error: {str(e)}")
+            return False
+
+    def invalidate_matching(
+        self,
+        pdf_title: str,
+        output_type: str,
+        predicate: Callable[[Dict[str, Any]], bool]
+    ) -> int:
+        """
+        Drop a document's cached outputs of one type (any params) whose data
+        satisfies `predicate`, e.g. the podcast entry pointing at deleted audio.
+        Returns how many entries were dropped.
+        """
+        def matches(value: str) -> bool:
+            try:
+                return predicate(decode_payload(value))
+            except Exception:
+                return False
+
+        dropped = 0
+        try:
+            prefix = f"{self.document_namespace(pdf_title)}{output_type}:"
+            for namespace in self.cache.namespaces(prefix=prefix):
+                dropped += self.cache.delete_where(matches, namespace=namespace)
+        except Exception as e:
+            print(f"Cache invalidation error: {str(e)}")
+        return dropped
+
     def clear_cache(self) -> bool:
         """Clear all cached entries"""
         try:
-            self.cache.flush()
+            for namespace in self.cache.namespaces(prefix=NAMESPACE_PREFIX):
+                self.cache.flush(namespace=namespace)
+            self.cache.flush()  # entries written before per-document namespaces
             return True
         except Exception as e:
             print(f"Cache clear error: {str(e)}")
             return False
 
+    def start_sweeper(self) -> None:
+        """
+        Start the background sweep of every content namespace. Interval and
+        per-namespace budgets come from CONTENT_CACHE_SWEEP_INTERVAL_SECONDS
+        (0 disables the sweeper), CONTENT_CACHE_MAX_ENTRIES and CONTENT_CACHE_MAX_MB.
+        """
+        interval = float(os.getenv("CONTENT_CACHE_SWEEP_INTERVAL_SECONDS", 3600))
+        if interval <= 0:
+            return
+        self.cache.start_sweeper(
+            interval,
+            prefix=NAMESPACE_PREFIX,
+            max_entries=int(os.getenv("CONTENT_CACHE_MAX_ENTRIES", 500)),
+            max_bytes=int(float(os.getenv("CONTENT_CACHE_MAX_MB", 50)) * 1024 * 1024)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate per output type since process start, plus storage as of the last sweep"""
+        hit_rates = {}
+        for output_type in self.policies:
+            hits = metrics.counter(f"content_cache.{output_type}.hits")
+            misses = metrics.counter(f"content_cache.{output_type}.misses")
+            hit_rates[output_type] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+            }
+        return {
+            "types": hit_rates,
+            "storage": self.cache.stats(),
+            "expired": metrics.counter("semantic_cache.expired") + metrics.counter("semantic_cache.swept_expired"),
+            "evictions": metrics.counter("semantic_cache.evictions"),
+        }
+
+
+class PodcastCache(ContentCache):
+    """Podcast-only view of ContentCache, kept for existing callers"""
+
+    def get_cached_podcast(self, query: str, pdf_title: str) -> Optional[Dict[str, Any]]:
+        return self.get(query, pdf_title, "podcast")
+
+    def cache_podcast(self, query: str, pdf_title: str, podcast_data: Dict[str, Any]) -> bool:
+        return self.set(query, pdf_title, "podcast", podcast_data)
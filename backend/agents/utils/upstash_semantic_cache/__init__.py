@@ -1,4 +1,5 @@
 from agents.utils.upstash_semantic_cache.semantic_cache import SemanticCache
+from agents.utils.upstash_semantic_cache.local_tier import LocalCacheTier
 
 __version__ = "1.0.0"
-__all__ = ["SemanticCache"]
\ No newline at end of file
+__all__ = ["SemanticCache", "LocalCacheTier"]
\ No newline at end of file
@@ -0,0 +1,185 @@
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+HIT = "hit"
+NEGATIVE = "negative"
+MISS = "miss"
+
+
+def normalize_key(key: str) -> str:
+    """Case-fold and collapse punctuation/whitespace so trivially different phrasings match exactly."""
+    return re.sub(r"[\W_]+", " ", key.casefold()).strip()
+
+
+class LocalCacheTier:
+    """
+    In-process front tier for SemanticCache.
+
+    Holds an LRU of normalised keys to values plus a small matrix of their
+    embeddings, so repeated and near-identical questions are answered in
+    microseconds without a round-trip to Upstash. Embeddings are hashed
+    character trigrams: cheap to compute, and with a high threshold they
+    only match close rephrasings; anything looser still goes to the remote
+    tier's real semantic search. Remote misses are remembered for a short
+    time so a burst of the same unanswerable question costs one query.
+
+    Every call takes a partition (SemanticCache passes its namespace), and
+    entries are only ever compared within the same partition.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        min_similarity: float = 0.95,
+        ttl_seconds: float = 300.0,
+        negative_ttl_seconds: float = 30.0,
+        dim: int = 1024,
+    ):
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.dim = dim
+
+        self._lock = threading.Lock()
+        # (partition, normalised key) -> (value, row, expires_at); oldest first
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, int, float]]" = OrderedDict()
+        self._negative: "OrderedDict[Tuple[str, str], float]" = OrderedDict()  # -> expires_at
+        self._matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self._row_keys: Dict[int, Tuple[str, str]] = {}
+        self._row_partitions = np.full(max_entries, -1, dtype=np.int64)
+        self._partition_ids: Dict[str, int] = {}
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+
+    def embed(self, text: str) -> np.ndarray:
+        """L2-normalised hashed character-trigram vector."""
+        padded = f"  {text}  "
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if len(padded) >= 3:
+            indexes = [zlib.crc32(padded[i:i + 3].encode("utf-8")) % self.dim for i in range(len(padded) - 2)]
+            np.add.at(vector, indexes, 1.0)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, key: str, partition: str = "", min_similarity: Optional[float] = None) -> Tuple[str, Optional[str]]:
+        """
+        Returns (HIT, value), (NEGATIVE, None) for a recently confirmed miss,
+        or (MISS, None) when the remote tier has to be asked. `min_similarity`
+        (the remote tier's threshold for this lookup) can raise, never lower,
+        the tier's own threshold for near-duplicate matches.
+        """
+        normalized = normalize_key(key)
+        entry_key = (partition, normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(entry_key)
+                    return HIT, entry[0]
+                self._remove(entry_key)
+
+            negative = self._negative.get(entry_key)
+            if negative is not None:
+                if negative > now:
+                    return NEGATIVE, None
+                del self._negative[entry_key]
+
+            threshold = max(self.min_similarity, min_similarity or 0.0)
+            match = self._nearest(normalized, partition, now, threshold)
+            if match is not None:
+                self._entries.move_to_end(match)
+                return HIT, self._entries[match][0]
+        return MISS, None
+
+    def put(self, key: str, value: str, partition: str = "", ttl_seconds: Optional[float] = None) -> None:
+        """Cache a value; `ttl_seconds` can shorten (never extend) the tier's own TTL."""
+        normalized = normalize_key(key)
+        entry_key = (partition, normalized)
+        vector = self.embed(normalized)
+
+        with self._lock:
+            # A new value may answer questions recently recorded as misses nearby
+            self._drop_negatives(partition)
+            if entry_key in self._entries:
+                self._remove(entry_key)
+            if not self._free_rows:
+                self._remove(next(iter(self._entries)))
+
+            row = self._free_rows.pop()
+            self._matrix[row] = vector
+            self._row_keys[row] = entry_key
+            self._row_partitions[row] = self._partition_id(partition)
+            ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+            self._entries[entry_key] = (value, row, time.monotonic() + ttl)
+
+    def put_negative(self, key: str, partition: str = "") -> None:
+        entry_key = (partition, normalize_key(key))
+        with self._lock:
+            self._negative[entry_key] = time.monotonic() + self.negative_ttl_seconds
+            self._negative.move_to_end(entry_key)
+            while len(self._negative) > self.max_entries:
+                self._negative.popitem(last=False)
+
+    def invalidate(self, key: str, partition: str = "") -> None:
+        entry_key = (partition, normalize_key(key))
+        with self._lock:
+            self._negative.pop(entry_key, None)
+            if entry_key in self._entries:
+                self._remove(entry_key)
+
+    def invalidate_partition(self, partition: str) -> None:
+        """Forget everything cached for one partition."""
+        with self._lock:
+            self._drop_negatives(partition)
+            for entry_key in [k for k in self._entries if k[0] == partition]:
+                self._remove(entry_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+            self._row_keys.clear()
+            self._row_partitions[:] = -1
+            self._free_rows = list(range(self.max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _nearest(self, normalized: str, partition: str, now: float, threshold: float) -> Optional[Tuple[str, str]]:
+        partition_id = self._partition_ids.get(partition)
+        if partition_id is None or not self._entries:
+            return None
+        rows = np.flatnonzero(self._row_partitions == partition_id)
+        if rows.size == 0:
+            return None
+        similarities = self._matrix[rows] @ self.embed(normalized)
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        entry_key = self._row_keys[int(rows[best])]
+        if self._entries[entry_key][2] <= now:
+            self._remove(entry_key)
+            return None
+        return entry_key
+
+    def _remove(self, entry_key: Tuple[str, str]) -> None:
+        _, row, _ = self._entries.pop(entry_key)
+        del self._row_keys[row]
+        self._row_partitions[row] = -1
+        self._free_rows.append(row)
+
+    def _drop_negatives(self, partition: str) -> None:
+        for entry_key in [k for k in self._negative if k[0] == partition]:
+            del self._negative[entry_key]
+
+    def _partition_id(self, partition: str) -> int:
+        if partition not in self._partition_ids:
+            self._partition_ids[partition] = len(self._partition_ids)
+        return self._partition_ids[partition]
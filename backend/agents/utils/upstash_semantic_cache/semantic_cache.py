@@ -1,9 +1,18 @@
 import hashlib
 import json
-from typing import List, Optional, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
 from upstash_vector import Index
+from upstash_vector.types import MetadataUpdateMode
 from langchain_core.outputs.generation import Generation
+from agents.utils.metrics import metrics
+from agents.utils.upstash_semantic_cache.local_tier import LocalCacheTier, HIT, NEGATIVE
 
+# Per-request limits for batch queries and upserts
+MAX_BATCH_SIZE = 100
+MAX_BATCH_BYTES = 1024 * 1024
 
 class SemanticCache:
     """
@@ -16,6 +25,8 @@ class SemanticCache:
         token: str,
         min_proximity: float = 0.9,
         namespace: str = "",
+        local_tier: Optional[LocalCacheTier] = None,
+        touch_interval: float = 3600.0,
     ) -> None:
         """
         Initializes the SemanticCache with the given URL, token, and optional namespace.
@@ -26,26 +37,121 @@ class SemanticCache:
             min_proximity (float): The minimum proximity score to consider a cache hit.
             namespace (str): The namespace to logically separate data sets
             within the same index.
+            local_tier (Optional[LocalCacheTier]): In-process tier consulted
+            before Upstash; only its misses are queried remotely.
+            touch_interval (float): Minimum seconds between updates of an
+            entry's last-access time, which drives eviction order.
         """
         self.min_proximity = min_proximity
         self.namespace = namespace
         self.index = Index(url=url, token=token)
+        self.local_tier = local_tier
+        self.touch_interval = touch_interval
+        self.namespace_stats: Dict[str, Dict[str, Any]] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+        self._batch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="semantic-cache")
 
-    def get(self, key: str) -> Optional[str]:
+    def get(
+        self,
+        key: str,
+        namespace: Optional[str] = None,
+        min_proximity: Optional[float] = None,
+    ) -> Optional[str]:
         """
         Searches the cache for the key and returns the value if it exists.
 
         Args:
             key (str): The key to search in the cache.
+            namespace (Optional[str]): Namespace to search instead of the default.
+            min_proximity (Optional[float]): Threshold to use instead of the default.
 
         Returns:
             Optional[str]: The value associated with the key
             if it exists and meets the proximity score; otherwise, None.
         """
-        response = self._query_key(key)
-        if response is None or response.score <= self.min_proximity:
+        return self.get_many([key], namespace, min_proximity)[0]
+
+    def get_many(
+        self,
+        keys: List[str],
+        namespace: Union[None, str, List[str]] = None,
+        min_proximity: Union[None, float, List[float]] = None,
+    ) -> List[Optional[str]]:
+        """
+        Searches the cache for several keys with as few round-trips as possible.
+
+        Keys answered by the local tier never leave the process; the rest are
+        sent as batch queries, one per namespace (chunked to MAX_BATCH_SIZE),
+        and namespaces are queried concurrently.
+
+        Args:
+            keys (List[str]): The keys to search in the cache.
+            namespace (Union[None, str, List[str]]): Namespace for all keys, or one per key.
+            min_proximity (Union[None, float, List[float]]): Threshold for all keys, or one per key.
+
+        Returns:
+            List[Optional[str]]: Values in the same order as `keys`; None for misses.
+        """
+        namespaces = self._per_key(namespace, self.namespace, len(keys))
+        thresholds = self._per_key(min_proximity, self.min_proximity, len(keys))
+        results: List[Optional[str]] = [None] * len(keys)
+        remote: Dict[str, List[int]] = {}  # namespace -> positions to query
+
+        for i, (key, ns) in enumerate(zip(keys, namespaces)):
+            if self.local_tier is not None:
+                # Near-duplicates must clear the remote threshold too, or the front tier serves what Upstash would reject
+                status, value = self.local_tier.lookup(key, ns, thresholds[i])
+                if status == HIT:
+                    metrics.incr("semantic_cache.local_hits")
+                    results[i] = value
+                    continue
+                if status == NEGATIVE:
+                    metrics.incr("semantic_cache.negative_hits")
+                    continue
+            remote.setdefault(ns, []).append(i)
+
+        if not remote:
+            return results
+        groups = list(remote.items())
+        query = lambda group: self._query_many([keys[i] for i in group[1]], group[0])
+        if len(groups) == 1:
+            responses = [query(groups[0])]
+        else:
+            responses = list(self._batch_executor.map(query, groups))
+
+        for (ns, positions), batch in zip(groups, responses):
+            for i, response in zip(positions, batch):
+                results[i] = self._resolve(keys[i], ns, thresholds[i], response)
+        return results
+
+    def _resolve(self, key: str, namespace: str, min_proximity: float, response) -> Optional[str]:
+        """
+        Turns a remote query result into a value (or None), keeping the local tier in step.
+        """
+        metrics.incr("semantic_cache.remote_queries")
+        if response is None or response.score <= min_proximity:
+            if self.local_tier is not None:
+                self.local_tier.put_negative(key, namespace)
+            return None
+
+        now = time.time()
+        expires_at = response.metadata.get("expires_at")
+        if expires_at and expires_at <= now:
+            # Lazy expiry: the sweeper would remove it eventually, but never serve it
+            metrics.incr("semantic_cache.expired")
+            self.index.delete([response.id], namespace=namespace)
+            if self.local_tier is not None:
+                self.local_tier.put_negative(key, namespace)
             return None
-        return response.metadata["value"]
+
+        metrics.incr("semantic_cache.remote_hits")
+        if now - response.metadata.get("accessed_at", 0) > self.touch_interval:
+            self._touch(response.id, namespace, now)
+        value = response.metadata["value"]
+        if self.local_tier is not None:
+            self.local_tier.put(key, value, namespace, ttl_seconds=expires_at - now if expires_at else None)
+        return value
 
     def lookup(
         self, prompt: str, llm_string: Optional[str] = None
@@ -82,72 +188,348 @@ class SemanticCache:
         """
         self.set(prompt, self._dumps_generations(result))
 
-    def set(self, key: Union[str, List[str]], value: Union[str, List[str]]) -> None:
+    def set(
+        self,
+        key: Union[str, List[str]],
+        value: Union[str, List[str]],
+        namespace: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
         """
         Sets the key and value in the cache.
 
         Args:
             key (Union[str, List[str]]): The key or list of keys to set in the cache.
             value (Union[str, List[str]]): The value or list of values.
+            namespace (Optional[str]): Namespace to write to instead of the default.
+            ttl_seconds (Optional[float]): Seconds until the entry expires; None keeps it
+            until it is deleted or evicted.
         """
         if isinstance(key, list) and isinstance(value, list):
-            batch = [
+            self.set_many(key, value, namespace, ttl_seconds)
+            return
+
+        namespace = self.namespace if namespace is None else namespace
+        self.index.upsert(
+            [
                 (
-                    self._hash_key(k),
-                    k,
-                    {"value": v},
+                    self._hash_key(key),
+                    key,
+                    self._metadata(value, ttl_seconds),
                 )
-                for k, v in zip(key, value)
-            ]
-            self.index.upsert(batch, self.namespace)
-        else:
-            self.index.upsert(
-                [
-                    (
-                        self._hash_key(key),
-                        key,
-                        {"value": value},
-                    )
-                ],
-                self.namespace,
-            )
+            ],
+            namespace,
+        )
+        if self.local_tier is not None:
+            self.local_tier.put(key, value, namespace, ttl_seconds=ttl_seconds)
+
+    def set_many(
+        self,
+        keys: List[str],
+        values: List[str],
+        namespace: Union[None, str, List[str]] = None,
+        ttl_seconds: Union[None, float, List[Optional[float]]] = None,
+    ) -> None:
+        """
+        Sets several keys with one upsert per namespace, chunked so no request
+        exceeds MAX_BATCH_SIZE entries or MAX_BATCH_BYTES of values.
+
+        Args:
+            keys (List[str]): The keys to set in the cache.
+            values (List[str]): The values, in the same order as `keys`.
+            namespace (Union[None, str, List[str]]): Namespace for all keys, or one per key.
+            ttl_seconds (Union[None, float, List[Optional[float]]]): TTL for all keys, or one per key.
+        """
+        namespaces = self._per_key(namespace, self.namespace, len(keys))
+        ttls = ttl_seconds if isinstance(ttl_seconds, list) else [ttl_seconds] * len(keys)
+        groups: Dict[str, List[int]] = {}
+        for i, ns in enumerate(namespaces):
+            groups.setdefault(ns, []).append(i)
+
+        for ns, positions in groups.items():
+            batch, batch_bytes = [], 0
+            for i in positions:
+                metadata = self._metadata(values[i], ttls[i])
+                if batch and (len(batch) >= MAX_BATCH_SIZE or batch_bytes + metadata["size"] > MAX_BATCH_BYTES):
+                    self.index.upsert(batch, ns)
+                    batch, batch_bytes = [], 0
+                batch.append((self._hash_key(keys[i]), keys[i], metadata))
+                batch_bytes += metadata["size"]
+            self.index.upsert(batch, ns)
+            if self.local_tier is not None:
+                for i in positions:
+                    self.local_tier.put(keys[i], values[i], ns, ttl_seconds=ttls[i])
 
-    def delete(self, key: Union[str, List[str]]) -> None:
+    def delete(self, key: Union[str, List[str]], namespace: Optional[str] = None) -> None:
         """
         Deletes the key from the cache.
 
         Args:
             key (str): The key (or keys) to delete from the cache.
+            namespace (Optional[str]): Namespace to delete from instead of the default.
         """
+        namespace = self.namespace if namespace is None else namespace
+        if self.local_tier is not None:
+            for current_key in key if isinstance(key, list) else [key]:
+                self.local_tier.invalidate(current_key, namespace)
         if isinstance(key, list):
             batch = []
             for current_key in key:
                 batch.append(self._hash_key(current_key))
-            self.index.delete(batch, namespace=self.namespace)
+            self.index.delete(batch, namespace=namespace)
         else:
-            self.index.delete([self._hash_key(key)], namespace=self.namespace)
+            self.index.delete([self._hash_key(key)], namespace=namespace)
 
-    def flush(self) -> None:
+    def delete_where(
+        self,
+        predicate: Callable[[str], bool],
+        namespace: Optional[str] = None,
+        page_size: int = 500,
+    ) -> int:
+        """
+        Deletes every entry whose value satisfies `predicate`, for callers
+        that know what an entry points at but not the key it was stored under.
+
+        Args:
+            predicate (Callable[[str], bool]): Called with each cached value.
+            namespace (Optional[str]): Namespace to scan instead of the default.
+            page_size (int): Entries fetched per range request.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        namespace = self.namespace if namespace is None else namespace
+        doomed = []
+        cursor = ""
+        while True:
+            page = self.index.range(
+                cursor=cursor, limit=page_size, include_metadata=True, namespace=namespace
+            )
+            for vector in page.vectors:
+                value = (vector.metadata or {}).get("value")
+                if value is not None and predicate(value):
+                    doomed.append(vector.id)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+
+        for i in range(0, len(doomed), page_size):
+            self.index.delete(doomed[i:i + page_size], namespace=namespace)
+        if doomed and self.local_tier is not None:
+            # Ids are hashes, so the local copies can't be picked out individually
+            self.local_tier.invalidate_partition(namespace)
+        return len(doomed)
+
+    def flush(self, namespace: Optional[str] = None) -> None:
         """
         Resets the cache, removing all keys and values.
+
+        Args:
+            namespace (Optional[str]): Reset only this namespace instead of the default.
         """
-        self.index.reset(namespace=self.namespace)
+        namespace = self.namespace if namespace is None else namespace
+        if self.local_tier is not None:
+            self.local_tier.invalidate_partition(namespace)
+        self.index.reset(namespace=namespace)
 
-    def _query_key(self, key: str):
+    def sweep(
+        self,
+        namespace: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        page_size: int = 500,
+    ) -> Dict[str, Any]:
+        """
+        Deletes expired entries from a namespace, then evicts the least
+        recently used ones until it fits the entry and byte budgets.
+
+        Args:
+            namespace (Optional[str]): Namespace to sweep instead of the default.
+            max_entries (Optional[int]): Entry budget for the namespace.
+            max_bytes (Optional[int]): Budget for the summed size of cached values.
+            page_size (int): Entries fetched per range request.
+
+        Returns:
+            Dict[str, Any]: Entry count and bytes left in the namespace.
+        """
+        namespace = self.namespace if namespace is None else namespace
+        now = time.time()
+        live = []  # (accessed_at, id, size)
+        expired = []
+        cursor = ""
+        while True:
+            page = self.index.range(
+                cursor=cursor, limit=page_size, include_metadata=True, namespace=namespace
+            )
+            for vector in page.vectors:
+                metadata = vector.metadata or {}
+                if metadata.get("expires_at") and metadata["expires_at"] <= now:
+                    expired.append(vector.id)
+                else:
+                    size = metadata.get("size") or len(str(metadata.get("value", "")).encode("utf-8"))
+                    live.append((metadata.get("accessed_at", 0), vector.id, size))
+            cursor = page.next_cursor
+            if not cursor:
+                break
+
+        live.sort()
+        total_bytes = sum(size for _, _, size in live)
+        evicted = []
+        while live and (
+            (max_entries is not None and len(live) > max_entries)
+            or (max_bytes is not None and total_bytes > max_bytes)
+        ):
+            _, vector_id, size = live.pop(0)
+            evicted.append(vector_id)
+            total_bytes -= size
+
+        doomed = expired + evicted
+        for i in range(0, len(doomed), page_size):
+            self.index.delete(doomed[i:i + page_size], namespace=namespace)
+        if evicted and self.local_tier is not None:
+            # Evicted ids are hashes, so the local copies can't be picked out individually
+            self.local_tier.invalidate_partition(namespace)
+        metrics.incr("semantic_cache.swept_expired", len(expired))
+        metrics.incr("semantic_cache.evictions", len(evicted))
+
+        stats = {"entries": len(live), "bytes": total_bytes, "swept_at": now}
+        self.namespace_stats[namespace] = stats
+        return stats
+
+    def start_sweeper(
+        self,
+        interval_seconds: float,
+        prefix: str = "",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Sweeps every namespace starting with `prefix` on a background thread.
+
+        Args:
+            interval_seconds (float): Pause between sweeps.
+            prefix (str): Only sweep namespaces starting with this prefix.
+            max_entries (Optional[int]): Entry budget per namespace.
+            max_bytes (Optional[int]): Byte budget per namespace.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        def run():
+            while not self._stop_sweeper.is_set():
+                try:
+                    namespaces = self.namespaces(prefix)
+                    for namespace in namespaces:
+                        self.sweep(namespace, max_entries=max_entries, max_bytes=max_bytes)
+                    for namespace in set(self.namespace_stats) - set(namespaces):
+                        del self.namespace_stats[namespace]
+                except Exception as e:
+                    print(f"Semantic cache sweep error: {str(e)}")
+                self._stop_sweeper.wait(interval_seconds)
+
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(target=run, name="semantic-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """
+        Stops the background sweeper, if one is running.
+        """
+        self._stop_sweeper.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns entry and byte totals per namespace, as of each one's last sweep.
+        """
+        namespaces = dict(self.namespace_stats)
+        return {
+            "entries": sum(s["entries"] for s in namespaces.values()),
+            "bytes": sum(s["bytes"] for s in namespaces.values()),
+            "namespaces": namespaces,
+        }
+
+    def namespaces(self, prefix: str = "") -> List[str]:
+        """
+        Lists the index's namespaces.
+
+        Args:
+            prefix (str): Only return namespaces starting with this prefix.
+        """
+        return [ns for ns in self.index.list_namespaces() if ns.startswith(prefix)]
+
+    def _query_many(self, keys: List[str], namespace: str) -> List[Any]:
+        """
+        Queries one namespace for several keys; one result (or None) per key.
+        """
+        if len(keys) == 1:
+            return [self._query_key(keys[0], namespace)]
+        responses = []
+        for i in range(0, len(keys), MAX_BATCH_SIZE):
+            batch = self.index.query_many(
+                queries=[
+                    {"data": key, "top_k": 1, "include_metadata": True}
+                    for key in keys[i:i + MAX_BATCH_SIZE]
+                ],
+                namespace=namespace,
+            )
+            responses.extend(result[0] if result else None for result in batch)
+        return responses
+
+    @staticmethod
+    def _per_key(value: Any, default: Any, count: int) -> List[Any]:
+        """
+        Expands a per-call argument (or its default) to one value per key.
+        """
+        if isinstance(value, list):
+            return value
+        return [default if value is None else value] * count
+
+    def _query_key(self, key: str, namespace: Optional[str] = None):
         """
         Queries the cache for the key.
 
         Args:
             key (str): The key to query in the cache.
+            namespace (Optional[str]): Namespace to query instead of the default.
 
         Returns:
             The response from the cache query.
         """
         response = self.index.query(
-            data=key, top_k=1, include_metadata=True, namespace=self.namespace
+            data=key,
+            top_k=1,
+            include_metadata=True,
+            namespace=self.namespace if namespace is None else namespace,
         )
         return response[0] if response else None
 
+    def _metadata(self, value: str, ttl_seconds: Optional[float]) -> Dict[str, Any]:
+        """
+        Builds the metadata stored with an entry: the value plus lifecycle fields.
+        """
+        now = time.time()
+        return {
+            "value": value,
+            "size": len(value.encode("utf-8")),
+            "created_at": now,
+            "accessed_at": now,
+            "expires_at": now + ttl_seconds if ttl_seconds else None,
+        }
+
+    def _touch(self, vector_id: str, namespace: str, now: float) -> None:
+        """
+        Records an access so eviction keeps the entry; failures only cost eviction accuracy.
+        """
+        try:
+            self.index.update(
+                vector_id,
+                metadata={"accessed_at": now},
+                namespace=namespace,
+                metadata_update_mode=MetadataUpdateMode.PATCH,
+            )
+        except Exception as e:
+            print(f"Semantic cache touch error: {str(e)}")
+
     def _dumps_generations(self, generations):
         """
         Converts the generations to a JSON string.
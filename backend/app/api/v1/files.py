@@ -9,6 +9,8 @@ from ...core.database import get_db
 from ...core.logger import setup_logger, log_error
 from ...services.s3 import S3Service
 from ...services.notification_service import notification_manager
+from ...services.pregeneration_service import pregeneration_service
+from .generate.router import podcast_generator
 from ...schemas.file import File, FileCreate, FileResponse
 from ...models.file import File as FileModel
 from ...models.user import User
@@ -98,8 +100,17 @@ async def process_pdf_embeddings(file_path: str, file_id: UUID, user_id: UUID):
         )
         
         # Index the document
+        previous_hash = pdf_processor.get_document_hash(doc_info["title"])
         num_chunks, was_overwritten = pdf_processor.index_document(doc_info)
         logger.info(f"Successfully indexed {num_chunks} chunks for file_id: {file_id}")
+
+        # Content cached against the previous version of this document is stale now
+        if previous_hash and previous_hash != pdf_processor.get_document_hash(doc_info["title"]):
+            podcast_generator.invalidate_document(doc_info["title"], doc_hash=previous_hash)
+            logger.info(f"Invalidated cached content for previous version of '{doc_info['title']}'")
+
+        # Generate the document's default outputs once the server has spare capacity
+        pregeneration_service.enqueue(doc_info["title"])
         
         # Send notification for successful vector storage
         await notification_manager.send_notification(
@@ -432,6 +443,11 @@ async def delete_file(
             db.commit()
             logger.info(f"Successfully deleted file {file_id}")
 
+            pdf_title = file.filename.rsplit('.', 1)[0]
+            pregeneration_service.discard(pdf_title)
+            podcast_generator.invalidate_document(pdf_title)
+            pdf_processor.forget_document_hash(pdf_title)
+
             return {"message": "File deleted successfully"}
 
         except Exception as e:
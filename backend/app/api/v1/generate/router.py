@@ -3,11 +3,11 @@ import tempfile
 import asyncio
 
 import aiofiles
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 from urllib.parse import urlparse
 
@@ -23,387 +23,400 @@ from ....schemas.file import File, FileCreate, FileResponse
 from ....models.file import File as FileModel
 from app.core.deps import (
     get_db,
-    get_current_user,
-    get_audio_service,
-    get_transcript_service
+    get_current_user
 )
+from app.core.database import SessionLocal
 from app.core.logger import setup_logger, log_error
 from app.models.user import User
-from app.schemas.generate.models import GenerateRequest, GenerateResponse
-from app.services.podcast_service import AudioService, TranscriptService
+from app.schemas.generate.models import GenerateRequest, GenerateResponse, GenerationJobStatus
+from app.services.podcast_service import AudioService, S3Service
+from app.services.podcast_service.audio import get_range_cache
 from app.services.quiz_service import QuizService, QuestionService
 from app.services.flashcard_service import FlashcardService, DeckService, CardService
 from agents.podcast_agent.learn_lab_assistant_agent import PodcastGenerator
+from agents.utils.metrics import metrics
+from agents.utils.llm_hedging import hedging_report
 from app.services.notification_service import notification_manager
+from app.services.pregeneration_service import pregeneration_service
+from app.services.generation_scheduler import generation_scheduler, QueueFullError, PRIORITY_HIGH, PRIORITY_NORMAL
 
 logger = setup_logger(__name__)
 router = APIRouter()
 podcast_generator = PodcastGenerator()
 
 
-async def _async_generate_podcast(
-    file_id: UUID,
-    query: str,
-    db: Session,
-    user_id: UUID,
-    audio_service: AudioService,
-    transcript_service: TranscriptService
-):
-    """Create a podcast from generated content (async)"""
-    temp_file_path = None
-
-    try:
-        logger.info(f"Starting podcast generation for file {file_id}, query: {query}")
-        file = db.query(FileModel).filter(
-            FileModel.id == file_id,
-            FileModel.user_id == user_id,
-            FileModel.is_deleted == False
-        ).first()
-        if not file:
-            raise HTTPException(status_code=404, detail="File not found")
-
-        pdf_title = file.filename.rsplit('.', 1)[0]
-        logger.debug(f"DEBUG File:{pdf_title}")
-        logger.debug(f"DEBUG File:{file.id}")
-
-        result = podcast_generator.generate_content(
-            question=query,
-            pdf_title=pdf_title,
-            output_type="podcast"
-        )
-
-        try:
-            url_parts = urlparse(result["s3_url"])
-            s3_audio_key = url_parts.path.lstrip('/')
-            logger.info(f"Extracted S3 key: {s3_audio_key}")
-        except (KeyError, AttributeError) as e:
-            logger.error(f"Failed to extract S3 key: {str(e)}")
-            logger.error(f"Generator result: {result}")
-            raise ValueError("Invalid generator output format") from e
-
-        # In the original code, transcript processing and audio duration fetching
-        # are commented out or not essential, so we keep them commented.
-
-        # Create podcast record
-        try:
-            podcast = Podcast(
-                file_id=file_id,
-                user_id=user_id,
-                title=result["topic"],
-                description="Generated podcast from document query",
-                duration=5000,  # Original code used a static duration
-                s3_audio_key=s3_audio_key,
-                s3_transcript_txt_key=" ",
-                s3_transcript_vtt_key=" ",
-                transcript_status='txt_only'
-            )
-
-            db.add(podcast)
-            db.commit()
-            db.refresh(podcast)
-            logger.info(f"Created podcast record with ID: {podcast.id}")
-        except SQLAlchemyError as e:
-            logger.error(f"Database error while creating podcast: {str(e)}")
-            db.rollback()
-            raise RuntimeError("Failed to create podcast record") from e
-
-        # Send success notification
-        try:
-            await notification_manager.send_notification(
+def _get_pdf_title(db: Session, file_id: UUID, user_id: UUID) -> str:
+    file = db.query(FileModel).filter(
+        FileModel.id == file_id,
+        FileModel.user_id == user_id,
+        FileModel.is_deleted == False
+    ).first()
+    if not file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    pdf_title = file.filename.rsplit('.', 1)[0]
+    logger.debug(f"DEBUG File:{pdf_title}")
+    logger.debug(f"DEBUG File:{file.id}")
+    return pdf_title
+
+
+def _progress_notifier(user_id: UUID, loop: asyncio.AbstractEventLoop):
+    """Progress callback for the generator, which may call it from a worker thread."""
+    def on_progress(event: dict):
+        # Thread-safe hand-off of the send to the event loop
+        if event.get("event") != "first_segment_ready":
+            return
+        asyncio.run_coroutine_threadsafe(
+            notification_manager.send_notification(
                 user_id,
                 {
                     "type": "notification",
-                    "title": "Podcast Generated",
-                    "message": f"Your podcast '{result['topic']}' has been generated successfully",
-                    "variant": "success",
-                    "duration": 5000
+                    "title": "Podcast Ready to Play",
+                    "message": f"The first part of '{event['topic']}' is ready; the rest is still generating",
+                    "variant": "default",
+                    "duration": 5000,
+                    "playlist_url": event["playlist_url"]
                 }
-            )
-        except Exception as e:
-            logger.error(f"Failed to send success notification: {str(e)}")
+            ),
+            loop
+        )
+    return on_progress
 
-        return podcast
 
-    except Exception as e:
-        logger.error(f"Critical error in generate_podcast: {str(e)}", exc_info=True)
+# The store helpers below run on the scheduler's event loop; their sync
+# SQLAlchemy work goes through asyncio.to_thread so a slow query never
+# stalls other requests. Each job uses its session from one thread at a time.
 
-        # Attempt to send error notification
-        try:
-            await notification_manager.send_notification(
-                user_id,
-                {
-                    "type": "notification",
-                    "title": "Podcast Generation Failed",
-                    "message": "Failed to generate podcast. Please try again.",
-                    "variant": "destructive",
-                    "duration": 5000
-                }
-            )
-        except Exception as notify_error:
-            logger.error(f"Failed to send error notification: {str(notify_error)}")
+def _save_podcast(db: Session, podcast: Podcast) -> None:
+    db.add(podcast)
+    db.commit()
+    db.refresh(podcast)
 
-        raise
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                logger.info(f"Cleaned up temporary file: {temp_file_path}")
-            except Exception as e:
-                logger.error(f"Failed to clean up temporary file: {str(e)}")
 
-
-async def _async_generate_quiz(file_id: UUID, query: str, db: Session, user_id: UUID):
+async def _store_podcast(result: dict, file_id: UUID, db: Session, user_id: UUID, audio_service: AudioService):
+    """Create the podcast record for generated audio and notify the user"""
+    try:
+        url_parts = urlparse(result["s3_url"])
+        s3_audio_key = url_parts.path.lstrip('/')
+        logger.info(f"Extracted S3 key: {s3_audio_key}")
+    except (KeyError, AttributeError) as e:
+        logger.error(f"Failed to extract S3 key: {str(e)}")
+        logger.error(f"Generator result: {result}")
+        raise ValueError("Invalid generator output format") from e
+
+    # Transcripts timed from the assembled audio, uploaded with it; older
+    # cached podcasts have none
+    transcript_keys = {
+        kind: urlparse(result[f"transcript_{kind}_url"]).path.lstrip('/')
+        for kind in ("txt", "vtt")
+        if result.get(f"transcript_{kind}_url")
+    }
+
+    # Read from the MP3's Xing/Info header with a ranged GET; no download or decode
+    try:
+        duration = await audio_service.get_audio_duration_from_s3(s3_audio_key)
+    except Exception as e:
+        logger.error(f"Failed to read podcast duration: {str(e)}")
+        duration = 5000  # previous static placeholder
+
+    # Create podcast record
+    podcast = Podcast(
+        file_id=file_id,
+        user_id=user_id,
+        title=result["topic"],
+        description="Generated podcast from document query",
+        duration=duration,
+        s3_audio_key=s3_audio_key,
+        s3_transcript_txt_key=transcript_keys.get("txt", " "),
+        s3_transcript_vtt_key=transcript_keys.get("vtt", " "),
+        transcript_status='vtt_ready' if "vtt" in transcript_keys else 'txt_only'
+    )
+    try:
+        await asyncio.to_thread(_save_podcast, db, podcast)
+        logger.info(f"Created podcast record with ID: {podcast.id}")
+        # Opus/AAC renditions for constrained clients, transcoded off the request path
+        audio_service.schedule_renditions(s3_audio_key)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error while creating podcast: {str(e)}")
+        await asyncio.to_thread(db.rollback)
+        raise RuntimeError("Failed to create podcast record") from e
+
+    # Send success notification
     try:
-        logger.info(f"Starting quiz generation for file {file_id}")
-        quiz_service = QuizService(db)
-        question_service = QuestionService(db)
-
-        file = db.query(FileModel).filter(
-            FileModel.id == file_id,
-            FileModel.user_id == user_id,
-            FileModel.is_deleted == False
-        ).first()
-        if not file:
-            raise HTTPException(status_code=404, detail="File not found")
-
-        pdf_title = file.filename.rsplit('.', 1)[0]
-        logger.debug(f"DEBUG File:{pdf_title}")
-        logger.debug(f"DEBUG File:{file.id}")
-
-        result = podcast_generator.generate_content(
-            question=query,
-            pdf_title=pdf_title,
-            output_type="quiz"
-        )
-
-        quiz_data = QuizCreate(
-            title=result['quiz']['title'],
-            description=result['quiz']['description'],
-            file_id=file_id
-        )
-        quiz = quiz_service.create_quiz(user_id, quiz_data)
-
-        for q in result['quiz']['questions']:
-            question_data = QuestionCreate(
-                question_type="multiple_choice",
-                content=q['question'],
-                explanation=q['explanation'],
-                concepts=[q['difficulty']],
-                options=[
-                    MultipleChoiceOptionCreate(
-                        content=opt,
-                        is_correct=(opt == q['answer'])
-                    )
-                    for opt in q['options']
-                ]
-            )
-            await question_service.create_question(quiz.id, question_data)
-
-        logger.info(f"Completed quiz generation for file {file_id}")
-
         await notification_manager.send_notification(
             user_id,
             {
                 "type": "notification",
-                "title": "Quiz Generated",
-                "message": f"Your Quiz '{result['quiz']['title']}' has been generated successfully",
+                "title": "Podcast Generated",
+                "message": f"Your podcast '{result['topic']}' has been generated successfully",
                 "variant": "success",
-                "duration": 5000
+                "duration": 5000,
+                "playlist_url": result.get("playlist_url")
             }
         )
-
     except Exception as e:
-        log_error(logger, e, {
-            'operation': 'quiz_generation',
-            'file_id': str(file_id),
-            'user_id': str(user_id)
-        })
-        raise
-
-
-async def _async_generate_flashcards(
-    file_id: UUID,
-    query: str,
-    db: Session,
-    user_id: UUID
-):
-    """Background task for flashcard generation (async)"""
-    try:
-        logger.info(f"Starting flashcard generation for file {file_id}")
-        deck_service = DeckService(db)
-        card_service = CardService(db)
-        file = db.query(FileModel).filter(
-            FileModel.id == file_id,
-            FileModel.user_id == user_id,
-            FileModel.is_deleted == False
-        ).first()
-        if not file:
-            raise HTTPException(status_code=404, detail="File not found")
-
-        pdf_title = file.filename.rsplit('.', 1)[0]
-        logger.debug(f"DEBUG File:{pdf_title}")
-        logger.debug(f"DEBUG File:{file.id}")
-
+        logger.error(f"Failed to send success notification: {str(e)}")
+
+    return podcast
+
+
+def _save_quiz(result: dict, file_id: UUID, db: Session, user_id: UUID):
+    """Insert a generated quiz with its questions (blocking)"""
+    quiz_service = QuizService(db)
+    question_service = QuestionService(db)
+
+    quiz_data = QuizCreate(
+        title=result['quiz']['title'],
+        description=result['quiz']['description'],
+        file_id=file_id
+    )
+    quiz = quiz_service.create_quiz(user_id, quiz_data)
+
+    for q in result['quiz']['questions']:
+        question_data = QuestionCreate(
+            question_type="multiple_choice",
+            content=q['question'],
+            explanation=q['explanation'],
+            concepts=[q['difficulty']],
+            options=[
+                MultipleChoiceOptionCreate(
+                    content=opt,
+                    is_correct=(opt == q['answer'])
+                )
+                for opt in q['options']
+            ]
+        )
+        question_service.create_question(quiz.id, question_data)
+    return quiz
+
+
+async def _store_quiz(result: dict, file_id: UUID, db: Session, user_id: UUID):
+    """Save a generated quiz with its questions and notify the user"""
+    quiz = await asyncio.to_thread(_save_quiz, result, file_id, db, user_id)
+    logger.info(f"Completed quiz generation for file {file_id}")
+
+    await notification_manager.send_notification(
+        user_id,
+        {
+            "type": "notification",
+            "title": "Quiz Generated",
+            "message": f"Your Quiz '{result['quiz']['title']}' has been generated successfully",
+            "variant": "success",
+            "duration": 5000
+        }
+    )
+    return quiz
+
+
+def _save_flashcards(result: dict, query: str, file_id: UUID, db: Session, user_id: UUID):
+    """Insert a generated deck and its cards (blocking); returns the deck and how many cards were saved"""
+    deck_service = DeckService(db)
+    card_service = CardService(db)
+
+    deck_data = DeckCreate(
+        title=result['flashcards']['title'],
+        description=query,
+        file_id=file_id
+    )
+    deck = deck_service.create_deck(user_id, deck_data)
+    logger.debug(f"Created flashcard deck {deck.id} for file {file_id}")
+
+    created_cards = 0
+    for card in result['flashcards']['flashcards']:
         try:
-            result = podcast_generator.generate_content(
-                question=query,
-                pdf_title=pdf_title,
-                output_type="flashcards"
+            card_data = FlashcardCreate(
+                front_content=card['front'],
+                back_content=card['back'],
+                page_number=card.get('page_number'),
+                concepts=card.get('concepts', [])
             )
-
-            if not result.get('flashcards'):
-                raise HTTPException(
-                    status_code=500,
-                    detail="No flashcards were generated"
-                )
-
-            logger.debug(f"Generated flashcard content for file {file_id}")
+            card_service.create_flashcard(deck.id, card_data)
+            created_cards += 1
 
         except Exception as e:
-            logger.error(f"Failed to generate flashcard content: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error generating flashcards: {str(e)}"
-            )
+            logger.error(f"Failed to create flashcard in deck {deck.id}: {str(e)}")
+            continue
 
-        deck_data = DeckCreate(
-            title=result['flashcards']['title'],
-            description=query,
-            file_id=file_id
+    if created_cards == 0:
+        logger.error(f"No flashcards were created for deck {deck.id}")
+        deck_service.delete_deck(deck.id)
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to create any flashcards"
         )
-        deck = deck_service.create_deck(user_id, deck_data)
-        logger.debug(f"Created flashcard deck {deck.id} for file {file_id}")
 
-        created_cards = 0
-        for card in result['flashcards']['flashcards']:
-            try:
-                card_data = FlashcardCreate(
-                    front_content=card['front'],
-                    back_content=card['back'],
-                    page_number=card.get('page_number'),
-                    concepts=card.get('concepts', [])
-                )
-                card_service.create_flashcard(deck.id, card_data)
-                created_cards += 1
-
-            except Exception as e:
-                logger.error(f"Failed to create flashcard in deck {deck.id}: {str(e)}")
-                continue
-
-        if created_cards == 0:
-            logger.error(f"No flashcards were created for deck {deck.id}")
-            deck_service.delete_deck(deck.id)
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to create any flashcards"
-            )
+    logger.info(f"Successfully created {created_cards} flashcards in deck {deck.id}")
+    return deck, created_cards
 
-        logger.info(f"Successfully created {created_cards} flashcards in deck {deck.id}")
 
-        try:
-            notification_data = {
-                "type": "notification",
-                "title": "Flashcards Generated",
-                "message": f"Created {created_cards} flashcards in deck '{deck_data.title}'",
-                "variant": "success"
-            }
-            await notification_manager.send_notification(user_id, notification_data)
+async def _store_flashcards(result: dict, query: str, file_id: UUID, db: Session, user_id: UUID):
+    """Save a generated flashcard deck and notify the user"""
+    if not result.get('flashcards'):
+        raise HTTPException(
+            status_code=500,
+            detail="No flashcards were generated"
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to send completion notification: {str(e)}")
+    deck, created_cards = await asyncio.to_thread(_save_flashcards, result, query, file_id, db, user_id)
 
-        return deck
+    try:
+        notification_data = {
+            "type": "notification",
+            "title": "Flashcards Generated",
+            "message": f"Created {created_cards} flashcards in deck '{result['flashcards']['title']}'",
+            "variant": "success"
+        }
+        await notification_manager.send_notification(user_id, notification_data)
 
-    except HTTPException as e:
-        raise e
     except Exception as e:
-        log_error(logger, e, {
-            'operation': 'flashcard_generation',
-            'file_id': str(file_id),
-            'user_id': str(user_id)
-        })
-        raise HTTPException(
-            status_code=500,
-            detail=f"An unexpected error occurred during flashcard generation: {str(e)}"
-        )
+        logger.error(f"Failed to send completion notification: {str(e)}")
 
+    return deck
 
-# Synchronous wrappers for background tasks
-def generate_podcast(
+
+GENERATION_FAILED_TITLES = {
+    "podcast": "Podcast Generation Failed",
+    "quiz": "Quiz Generation Failed",
+    "flashcards": "Flashcard Generation Failed",
+}
+
+
+async def _async_generate_materials(
     file_id: UUID,
     query: str,
     db: Session,
     user_id: UUID,
-    audio_service: AudioService,
-    transcript_service: TranscriptService
+    output_types: List[str],
+    audio_service: AudioService
 ):
-    asyncio.run(_async_generate_podcast(file_id, query, db, user_id, audio_service, transcript_service))
+    """
+    Generate every requested material in one run (async).
 
+    Retrieval happens once; each output is saved and announced as soon as
+    its branch finishes, without waiting for the others.
+    """
+    try:
+        logger.info(f"Starting generation of {', '.join(output_types)} for file {file_id}, query: {query}")
+        pdf_title = await asyncio.to_thread(_get_pdf_title, db, file_id, user_id)
+
+        # The graph runs on this event loop via astream, so concurrent
+        # generations share the loop instead of holding a thread each.
+        # Background pre-generation yields to it for as long as it runs.
+        pending = set(output_types)
+        async with pregeneration_service.interactive():
+            async for output_type, result in podcast_generator.agenerate_contents(
+                question=query,
+                pdf_title=pdf_title,
+                output_types=output_types,
+                progressive="podcast" in output_types,
+                on_progress=_progress_notifier(user_id, asyncio.get_running_loop())
+            ):
+                pending.discard(output_type)
+                try:
+                    if isinstance(result, Exception):
+                        raise result
+                    if output_type == "podcast":
+                        await _store_podcast(result, file_id, db, user_id, audio_service)
+                    elif output_type == "quiz":
+                        await _store_quiz(result, file_id, db, user_id)
+                    elif output_type == "flashcards":
+                        await _store_flashcards(result, query, file_id, db, user_id)
+                except Exception as e:
+                    await _notify_generation_failed(e, output_type, file_id, user_id)
+
+        for output_type in pending:
+            await _notify_generation_failed(
+                RuntimeError("Generation finished without a result"), output_type, file_id, user_id
+            )
 
-def generate_quiz(file_id: UUID, query: str, db: Session, user_id: UUID):
-    asyncio.run(_async_generate_quiz(file_id, query, db, user_id))
+    except Exception as e:
+        for output_type in output_types:
+            await _notify_generation_failed(e, output_type, file_id, user_id)
+        raise
 
 
-def generate_flashcards(file_id: UUID, query: str, db: Session, user_id: UUID):
-    asyncio.run(_async_generate_flashcards(file_id, query, db, user_id))
+async def _run_generation_job(file_id: UUID, query: str, user_id: UUID, output_types: List[str]):
+    """Scheduled generation run. Opens its own DB session and services, which live as long as the run."""
+    db = SessionLocal()
+    try:
+        await _async_generate_materials(file_id, query, db, user_id, output_types, AudioService(S3Service()))
+    finally:
+        db.close()
+
+
+async def _notify_generation_failed(error: Exception, output_type: str, file_id: UUID, user_id: UUID):
+    log_error(logger, error, {
+        'operation': f'{output_type}_generation',
+        'file_id': str(file_id),
+        'user_id': str(user_id)
+    })
+    try:
+        await notification_manager.send_notification(
+            user_id,
+            {
+                "type": "notification",
+                "title": GENERATION_FAILED_TITLES.get(output_type, "Generation Failed"),
+                "message": f"Failed to generate {output_type}. Please try again.",
+                "variant": "destructive",
+                "duration": 5000
+            }
+        )
+    except Exception as notify_error:
+        logger.error(f"Failed to send error notification: {str(notify_error)}")
 
 
 @router.post("", response_model=GenerateResponse)
 async def generate_learning_materials(
     request: GenerateRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    audio_service: AudioService = Depends(get_audio_service),
-    transcript_service: TranscriptService = Depends(get_transcript_service)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Generate learning materials based on request parameters.
-    Starts background tasks for selected generation types.
-    Returns immediately while tasks run in the background.
+    Queues one scheduled run covering every selected generation type and
+    returns its job id immediately; progress is at /jobs/{job_id}.
     """
     logger.info(f"Received generation request for file {request.file_id}")
 
     try:
         response = GenerateResponse()
+        output_types = []
 
         if request.podcast:
-            background_tasks.add_task(
-                generate_podcast,
-                request.file_id,
-                request.query,
-                db,
-                current_user.id,
-                audio_service,
-                transcript_service
-            )
+            output_types.append("podcast")
             response.is_podcast_generating = True
-            logger.info(f"Added podcast generation task for file {request.file_id}")
-
         if request.quiz:
-            background_tasks.add_task(
-                generate_quiz,
-                request.file_id,
-                request.query,
-                db,
-                current_user.id
-            )
+            output_types.append("quiz")
             response.is_quiz_generating = True
-            logger.info(f"Added quiz generation task for file {request.file_id}")
-
         if request.flashcards:
-            background_tasks.add_task(
-                generate_flashcards,
-                request.file_id,
-                request.query,
-                db,
-                current_user.id
-            )
+            output_types.append("flashcards")
             response.is_flashcards_generating = True
-            logger.info(f"Added flashcard generation task for file {request.file_id}")
+
+        if output_types:
+            # 404 now rather than a failed job later
+            await asyncio.to_thread(_get_pdf_title, db, request.file_id, current_user.id)
+
+            # The job gets only plain values; the request's session closes when this returns
+            user_id, file_id, query = current_user.id, request.file_id, request.query
+            try:
+                job = generation_scheduler.submit(
+                    user_id,
+                    lambda: _run_generation_job(file_id, query, user_id, output_types),
+                    # Quizzes and decks take seconds; don't queue them behind podcasts
+                    priority=PRIORITY_NORMAL if "podcast" in output_types else PRIORITY_HIGH,
+                    dedupe_key=(user_id, file_id, " ".join(query.lower().split()), tuple(output_types)),
+                    details={"file_id": file_id, "query": query, "output_types": output_types}
+                )
+            except QueueFullError as e:
+                raise HTTPException(status_code=429, detail=str(e))
+            response.job_id = job.id
+            response.job_status = job.status
+            logger.info(f"Scheduled generation job {job.id} for {', '.join(output_types)} on file {request.file_id}")
 
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         log_error(logger, e, {
             'operation': 'generate_learning_materials',
@@ -411,4 +424,56 @@ async def generate_learning_materials(
             'user_id': str(current_user.id),
             'request': request.dict()
         })
-        raise HTTPException(status_code=500, detail="Failed to start generation tasks")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to start generation tasks")
+
+
+@router.get("/jobs", response_model=List[GenerationJobStatus])
+async def list_generation_jobs(current_user: User = Depends(get_current_user)):
+    """The current user's queued, running and recently finished generation jobs"""
+    return [generation_scheduler.status(job) for job in generation_scheduler.jobs(current_user.id)]
+
+
+def _get_user_job(job_id: str, user_id: UUID):
+    job = generation_scheduler.job(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobStatus)
+async def get_generation_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """State of one generation job, including its place in the queue"""
+    return generation_scheduler.status(_get_user_job(job_id, current_user.id))
+
+
+@router.delete("/jobs/{job_id}", response_model=GenerationJobStatus)
+async def cancel_generation_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Cancel a queued or running generation job"""
+    job = _get_user_job(job_id, current_user.id)
+    if not generation_scheduler.cancel(job.id):
+        raise HTTPException(status_code=409, detail=f"Generation job already {job.status}")
+    return generation_scheduler.status(job)
+
+
+@router.get("/metrics")
+async def get_generation_metrics(current_user: User = Depends(get_current_user)):
+    """
+    Return in-process generation metrics: counters, latency percentiles,
+    per-route LLM hedging summaries, TTS cache usage, the audio range
+    cache's block usage and hit rate, content cache hit rates per output
+    type, how often pre-generated content is served and the generation
+    scheduler's queues.
+    """
+    snapshot = metrics.snapshot()
+    routes = sorted(
+        name[len("llm."):-len(".calls")]
+        for name in snapshot["counters"]
+        if name.startswith("llm.") and name.endswith(".calls")
+    )
+    snapshot["llm_hedging"] = [hedging_report(route) for route in routes]
+    snapshot["tts_cache"] = podcast_generator.tts_cache.stats()
+    snapshot["audio_range_cache"] = get_range_cache().stats()
+    snapshot["content_cache"] = podcast_generator.cache.stats()
+    snapshot["pregeneration"] = pregeneration_service.stats()
+    snapshot["scheduler"] = generation_scheduler.stats()
+    return snapshot
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+import asyncio
+from urllib.parse import urlparse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse, RedirectResponse
+from email.utils import format_datetime
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
 from app.core import deps
+from app.core.security import create_stream_token, verify_stream_token
 from app.models import User
 from app.models.podcast import Podcast
+from app.models.file import File as FileModel
 from app.schemas.podcast import (
     PodcastCreate,
     PodcastUpdate,
@@ -17,6 +23,10 @@ from app.services.podcast_service import (
     TranscriptService,
     S3Service
 )
+from agents.utils.frame_index import index_key
+from app.services.podcast_service.range_cache import parse_byte_range, is_not_modified, if_range_matches
+from app.services.podcast_service.transcode_ladder import ORIGINAL, choose_rendition
+from app.api.v1.generate.router import podcast_generator
 
 router = APIRouter()
 
@@ -63,6 +73,8 @@ async def create_podcast(
     db.add(podcast)
     db.commit()
     db.refresh(podcast)
+
+    audio_service.schedule_renditions(s3_audio_key)
     
     return podcast
 
@@ -106,10 +118,131 @@ async def get_podcast(
         'audio_url': audio_url,
         'transcript_txt_url': transcript_txt_url,
         'transcript_vtt_url': transcript_vtt_url,
+        # Signed, so an <audio> element can use it without an Authorization header
+        'stream_url': f"/api/podcasts/{podcast.id}/stream?token={create_stream_token(current_user.id, podcast.id)}",
         'current_progress': current_progress,
         'current_speed': current_speed
     }
 
+@router.get("/{podcast_id}/stream")
+async def stream_podcast(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    podcast_id: UUID,
+    token: str = Query(..., description="Stream token from the podcast details' stream_url"),
+    rendition: Optional[str] = Query(None, description="Rendition name from a previous redirect"),
+    quality: Optional[str] = Query(
+        None,
+        description="Rendition choice (auto, low, high); auto follows Save-Data/ECT/Downlink hints",
+        regex="^(auto|low|high)$"
+    ),
+    audio_service: AudioService = Depends(deps.get_audio_service)
+):
+    """
+    Stream a podcast's audio with HTTP Range and conditional request support.
+    Bytes come from a local cache of hot ranges; misses are ranged S3 GETs.
+    Authorised by the signed `token` in the URL rather than a bearer header,
+    so the URL works as an <audio> source.
+
+    Without `rendition`, an episode that has Opus/AAC renditions redirects
+    to the one picked from the client hints, so every Range request of a
+    playback session stays on the same bytes.
+    """
+    user_id = verify_stream_token(token, podcast_id)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired stream token")
+
+    podcast = db.query(Podcast).filter(
+        Podcast.id == podcast_id,
+        Podcast.user_id == user_id
+    ).first()
+
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+
+    s3_key = podcast.s3_audio_key
+    if rendition is None:
+        renditions = await audio_service.get_renditions(s3_key)
+        if renditions:
+            chosen = choose_rendition(renditions, request.headers, quality)
+            return RedirectResponse(
+                str(request.url.include_query_params(rendition=chosen['name'] if chosen else ORIGINAL)),
+                status_code=307,
+                headers={"Vary": "Accept, Save-Data, ECT, Downlink", "Cache-Control": "private, no-cache"}
+            )
+    elif rendition != ORIGINAL:
+        match = next((r for r in await audio_service.get_renditions(s3_key) if r['name'] == rendition), None)
+        if match is None:
+            raise HTTPException(status_code=404, detail="Rendition not found")
+        s3_key = match['key']
+
+    info = await audio_service.get_object_info(s3_key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Podcast audio not found")
+
+    size, etag, last_modified = info['size'], info['etag'], info['last_modified']
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, max-age=86400"
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if if_range_matches(request.headers.get("if-range"), etag, last_modified):
+        try:
+            byte_range = parse_byte_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if size == 0:
+        return Response(content=b"", media_type=info['content_type'], headers=headers)
+
+    start, end = byte_range or (0, size - 1)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        audio_service.stream_range(s3_key, info, start, end),
+        status_code=206 if byte_range else 200,
+        media_type=info['content_type'],
+        headers=headers
+    )
+
+@router.get("/{podcast_id}/chunk")
+async def get_podcast_chunk(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+    podcast_id: UUID,
+    start: int = Query(0, ge=0, description="Start position in ms"),
+    duration: int = Query(30000, ge=1, le=600000, description="Chunk length in ms"),
+    audio_service: AudioService = Depends(deps.get_audio_service)
+):
+    """
+    Get a window of a podcast's audio for seeking or chunked playback.
+    X-Chunk-Start gives the position (ms) the returned audio actually starts at.
+    """
+    podcast = db.query(Podcast).filter(
+        Podcast.id == podcast_id,
+        Podcast.user_id == current_user.id
+    ).first()
+
+    if not podcast:
+        raise HTTPException(status_code=404, detail="Podcast not found")
+
+    data, chunk_start = await audio_service.process_chunk(podcast.s3_audio_key, start, duration)
+    return Response(
+        content=data,
+        media_type="audio/mpeg",
+        headers={"X-Chunk-Start": str(chunk_start)}
+    )
+
 @router.get("/", response_model=List[PodcastInDB])
 async def list_podcasts(
     db: Session = Depends(deps.get_db),
@@ -158,7 +291,8 @@ async def delete_podcast(
     db: Session = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user),
     podcast_id: UUID,
-    s3_service: S3Service = Depends(deps.get_s3_service)
+    s3_service: S3Service = Depends(deps.get_s3_service),
+    audio_service: AudioService = Depends(deps.get_audio_service)
 ):
     """Delete a podcast and its associated files"""
     
@@ -170,9 +304,37 @@ async def delete_podcast(
     if not podcast:
         raise HTTPException(status_code=404, detail="Podcast not found")
 
+    # Podcasts served from the content cache share the original's S3 objects,
+    # so they may only go once nothing else plays them
+    shared = db.query(Podcast.id).filter(
+        Podcast.s3_audio_key == podcast.s3_audio_key,
+        Podcast.id != podcast.id
+    ).first()
+    if shared:
+        db.delete(podcast)
+        db.commit()
+        return {"message": "Podcast deleted successfully"}
+
+    # Drop the cache entry first, so no new podcast is created from it
+    # while its audio is being deleted
+    file = db.query(FileModel).filter(FileModel.id == podcast.file_id).first()
+    if file:
+        await asyncio.to_thread(
+            podcast_generator.cache.invalidate_matching,
+            file.filename.rsplit('.', 1)[0],
+            "podcast",
+            lambda data: urlparse(data.get("s3_url", "")).path.lstrip('/') == podcast.s3_audio_key
+        )
+
     # Delete S3 files
     try:
         await s3_service.delete_file(podcast.s3_audio_key)
+        await s3_service.delete_file(index_key(podcast.s3_audio_key))
+        await audio_service.delete_renditions(podcast.s3_audio_key)
+        # Script and progressive stream stored by the generator under the same key stem
+        episode_key = podcast.s3_audio_key.rsplit('.', 1)[0]
+        await s3_service.delete_file(f"{episode_key}_script.txt")
+        await s3_service.delete_prefix(f"{episode_key}_stream/")
         await s3_service.delete_file(podcast.s3_transcript_txt_key)
         if podcast.s3_transcript_vtt_key:
             await s3_service.delete_file(podcast.s3_transcript_vtt_key)
@@ -4,11 +4,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from ...schemas.social_schema import MarkdownContent, TwitterResponse, BloggerResponse, BlogContent
 from ...services.social_service import SocialMediaService
+from ...services.pregeneration_service import pregeneration_service
 from ...core.deps import get_current_user
 from pydantic import BaseModel
 from agents.utils.blog_agent import BlogAgent
 from agents.utils.tweet_agent import TweetAgent
-from agents.podcast_agent.learn_lab_assistant_agent import PodcastGenerator
+from .generate.router import podcast_generator as generator
 import traceback
 import os
 from ...core.deps import get_db
@@ -17,7 +18,6 @@ from ...models.user import User
 from uuid import UUID
 
 router = APIRouter()
-generator = PodcastGenerator()
 
 class ContentRequest(BaseModel):
     query: str
@@ -83,11 +83,12 @@ async def generate_blog(
         print(f"DEBUG File:{pdf_title}")
         print(f"DEBUG File:{file.id}")
 
-        result = generator.generate_content(
-            question=content_request.query,
-            pdf_title=pdf_title,
-            output_type="blog"
-        )
+        async with pregeneration_service.interactive():
+            result = await generator.agenerate_content(
+                question=content_request.query,
+                pdf_title=pdf_title,
+                output_type="blog"
+            )
         
         print(f"Blog Generation Completed....................\n")
 
@@ -114,11 +115,12 @@ async def generate_tweet(
         pdf_title = file.filename.rsplit('.', 1)[0]
         print(f"DEBUG File:{pdf_title}")
         print(f"DEBUG File:{file.id}")
-        result = generator.generate_content(
-            question=content_request.query,
-            pdf_title=pdf_title,
-            output_type="tweet"
-        )
+        async with pregeneration_service.interactive():
+            result = await generator.agenerate_content(
+                question=content_request.query,
+                pdf_title=pdf_title,
+                output_type="tweet"
+            )
         
         print(f"Tweet Generation Completed....................\n")
         
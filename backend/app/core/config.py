@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    STREAM_TOKEN_EXPIRE_MINUTES: int = 60
 
     # AWS Configuration
     AWS_ACCESS_KEY_ID: str
@@ -30,6 +30,28 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+STREAM_TOKEN_SCOPE = "podcast_stream"
+
+def create_stream_token(user_id, podcast_id) -> str:
+    """
+    Short-lived token for one podcast's /stream URL, for players (<audio src>)
+    that can't send an Authorization header. It has no "sub" claim, so it is
+    never accepted as an access token.
+    """
+    expire = datetime.utcnow() + timedelta(minutes=settings.STREAM_TOKEN_EXPIRE_MINUTES)
+    to_encode = {"scope": STREAM_TOKEN_SCOPE, "uid": str(user_id), "pid": str(podcast_id), "exp": expire}
+    return jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+def verify_stream_token(token: str, podcast_id) -> Optional[str]:
+    """User id of a valid stream token for this podcast, else None"""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("scope") != STREAM_TOKEN_SCOPE or payload.get("pid") != str(podcast_id):
+        return None
+    return payload.get("uid")
+
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
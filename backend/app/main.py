@@ -1,6 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from .api.v1 import auth, files, flashcards, podcast, quiz, websocket, sample_data, generate, chat, social
+from .api.v1.generate.router import podcast_generator
+from .services.pregeneration_service import pregeneration_service
+from .services.generation_scheduler import generation_scheduler
 from .core.config import settings
 from .core.database import engine, Base
 from .core.health_check import perform_health_checks
@@ -64,6 +67,17 @@ async def startup_event():
     logger.info("🚀 Starting LearnLab API server...")
     health_status = perform_health_checks()
     app.state.health_status = health_status
+    # Expire and evict content cache entries in the background
+    podcast_generator.cache.start_sweeper()
+    # Warm the content cache for newly indexed documents while idle
+    pregeneration_service.start(podcast_generator)
+    generation_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await generation_scheduler.stop()
+    await pregeneration_service.stop()
 
 # Include routers
 app.include_router(
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -13,4 +15,20 @@ class GenerateResponse(BaseModel):
     """Response schema for generation endpoint"""
     is_podcast_generating: bool = False
     is_quiz_generating: bool = False
-    is_flashcards_generating: bool = False
\ No newline at end of file
+    is_flashcards_generating: bool = False
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+
+class GenerationJobStatus(BaseModel):
+    """State of a scheduled generation run"""
+    id: str
+    status: str  # queued, running, completed, failed or cancelled
+    priority: str
+    queue_position: Optional[int] = None
+    error: Optional[str] = None
+    file_id: UUID
+    query: str
+    output_types: List[str]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
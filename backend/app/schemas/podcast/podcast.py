@@ -65,6 +65,7 @@ class PodcastWithDetails(PodcastInDB):
     audio_url: Optional[HttpUrl]
     transcript_txt_url: Optional[HttpUrl]
     transcript_vtt_url: Optional[HttpUrl]
+    stream_url: Optional[str] = None  # Range-capable API endpoint with a signed token; usable as an <audio> src
     current_progress: Optional[float] = 0.0
     current_speed: Optional[float] = 1.0
 
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from agents.utils.metrics import metrics
+from app.core.logger import setup_logger, log_error
+
+logger = setup_logger(__name__)
+
+# Lower runs first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+
+
+class QueueFullError(Exception):
+    """The user already has GENERATION_MAX_PENDING_PER_USER jobs queued."""
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        user_id: Any,
+        run: Callable[[], Awaitable[Any]],
+        priority: int,
+        dedupe_key: Optional[Hashable],
+        details: Dict[str, Any]
+    ):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.run = run
+        self.priority = priority
+        self.dedupe_key = dedupe_key
+        self.details = details
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self._queued_at = time.monotonic()
+
+
+class GenerationScheduler:
+    """
+    Runs user-requested generations with bounded concurrency.
+
+    Jobs wait in one FIFO queue per priority. The dispatcher starts the
+    oldest job of the highest non-empty priority whose user is below
+    GENERATION_MAX_JOBS_PER_USER running jobs, as long as fewer than
+    GENERATION_MAX_WORKERS jobs run in total; a user with many requests
+    waits for their own jobs without holding back anyone else's. Submitting
+    a job identical (same dedupe key) to one still queued or running
+    returns that job instead of a new one, and each user can have at most
+    GENERATION_MAX_PENDING_PER_USER jobs queued, so a burst of clicks only
+    ever queues work, it never starts it.
+
+    Jobs are coroutine factories run on the server's event loop; they own
+    their resources (DB session, clients) for their whole run. Finished jobs
+    stay visible through job()/jobs() for GENERATION_JOB_HISTORY_SECONDS.
+    """
+
+    def __init__(self):
+        self.max_workers = int(os.getenv("GENERATION_MAX_WORKERS", 8))
+        self.max_jobs_per_user = int(os.getenv("GENERATION_MAX_JOBS_PER_USER", 2))
+        self.max_pending_per_user = int(os.getenv("GENERATION_MAX_PENDING_PER_USER", 10))
+        self.history_seconds = float(os.getenv("GENERATION_JOB_HISTORY_SECONDS", 3600))
+
+        self._queues: Dict[int, Deque[ScheduledJob]] = {priority: deque() for priority in PRIORITY_NAMES}
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._pending: Dict[Hashable, ScheduledJob] = {}  # dedupe key -> queued or running job
+        self._running_per_user: Dict[Any, int] = {}
+        self._running = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the dispatcher on the running event loop; call from application startup."""
+        if self._worker is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._dispatch())
+        logger.info(
+            f"Generation scheduler started: {self.max_workers} workers, {self.max_jobs_per_user} per user"
+        )
+
+    async def stop(self) -> None:
+        """Stop dispatching and cancel running jobs."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        running = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(self._worker, *running, return_exceptions=True)
+        self._worker = None
+
+    def submit(
+        self,
+        user_id: Any,
+        run: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_NORMAL,
+        dedupe_key: Optional[Hashable] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> ScheduledJob:
+        """
+        Queue `run()` for `user_id`. Returns the queued job, or the existing
+        one if an identical job is still pending. Raises QueueFullError when
+        the user already has too many jobs queued.
+        """
+        self.start()
+        if dedupe_key is not None:
+            existing = self._pending.get(dedupe_key)
+            if existing is not None:
+                metrics.incr("generation_jobs.deduplicated")
+                return existing
+
+        queued = sum(1 for queue in self._queues.values() for job in queue if job.user_id == user_id)
+        if queued >= self.max_pending_per_user:
+            metrics.incr("generation_jobs.rejected")
+            raise QueueFullError("Too many generations waiting; please wait for the current ones to finish")
+
+        job = ScheduledJob(user_id, run, priority, dedupe_key, details or {})
+        self._jobs[job.id] = job
+        if dedupe_key is not None:
+            self._pending[dedupe_key] = job
+        self._queues[priority].append(job)
+        metrics.incr("generation_jobs.submitted")
+        self._prune_history()
+        self._wakeup.set()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it has already finished."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.status == QUEUED:
+            self._queues[job.priority].remove(job)
+            self._finish(job, CANCELLED)
+            return True
+        if job.status == RUNNING and job.task is not None:
+            job.task.cancel()
+            return True
+        return False
+
+    def job(self, job_id: str) -> Optional[ScheduledJob]:
+        return self._jobs.get(job_id)
+
+    def jobs(self, user_id: Any) -> List[ScheduledJob]:
+        """A user's recent jobs, newest first."""
+        return sorted(
+            (job for job in self._jobs.values() if job.user_id == user_id),
+            key=lambda job: job.created_at,
+            reverse=True
+        )
+
+    def queue_position(self, job: ScheduledJob) -> Optional[int]:
+        """Jobs queued ahead of this one (at its priority or higher); None once it has started."""
+        if job.status != QUEUED:
+            return None
+        ahead = sum(len(self._queues[priority]) for priority in self._queues if priority < job.priority)
+        return ahead + self._queues[job.priority].index(job)
+
+    def status(self, job: ScheduledJob) -> Dict[str, Any]:
+        return {
+            **job.details,
+            "id": job.id,
+            "status": job.status,
+            "priority": PRIORITY_NAMES[job.priority],
+            "queue_position": self.queue_position(job),
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+
+    def _next_job(self) -> Optional[ScheduledJob]:
+        if self._running >= self.max_workers:
+            return None
+        for priority in sorted(self._queues):
+            for job in self._queues[priority]:
+                if self._running_per_user.get(job.user_id, 0) < self.max_jobs_per_user:
+                    self._queues[priority].remove(job)
+                    return job
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            job.status = RUNNING
+            job.started_at = datetime.utcnow()
+            self._running += 1
+            self._running_per_user[job.user_id] = self._running_per_user.get(job.user_id, 0) + 1
+            metrics.observe("generation_jobs.queue_wait_ms", (time.monotonic() - job._queued_at) * 1000)
+            job.task = asyncio.create_task(job.run())
+            # A callback rather than try/finally: it also fires for a task cancelled before it started
+            job.task.add_done_callback(lambda task, job=job: self._on_done(job, task))
+
+    def _on_done(self, job: ScheduledJob, task: asyncio.Task) -> None:
+        if task.cancelled():
+            status = CANCELLED
+        elif task.exception() is not None:
+            status = FAILED
+            job.error = str(task.exception())
+            log_error(logger, task.exception(), {'operation': 'generation_job', 'job_id': job.id, 'user_id': str(job.user_id)})
+        else:
+            status = COMPLETED
+
+        self._running -= 1
+        self._running_per_user[job.user_id] -= 1
+        if self._running_per_user[job.user_id] == 0:
+            del self._running_per_user[job.user_id]
+        self._finish(job, status)
+        self._wakeup.set()
+
+    def _finish(self, job: ScheduledJob, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        job.run = None  # release the closure (and anything it holds)
+        if job.dedupe_key is not None and self._pending.get(job.dedupe_key) is job:
+            del self._pending[job.dedupe_key]
+        metrics.incr(f"generation_jobs.{status}")
+
+    def _prune_history(self) -> None:
+        cutoff = datetime.utcnow().timestamp() - self.history_seconds
+        for job_id in [
+            job.id for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at.timestamp() < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "max_workers": self.max_workers,
+            "queued": {PRIORITY_NAMES[priority]: len(queue) for priority, queue in self._queues.items()},
+            "users_running": len(self._running_per_user),
+            "submitted": metrics.counter("generation_jobs.submitted"),
+            "deduplicated": metrics.counter("generation_jobs.deduplicated"),
+            "rejected": metrics.counter("generation_jobs.rejected"),
+            "failed": metrics.counter("generation_jobs.failed"),
+        }
+
+
+# Global instance
+generation_scheduler = GenerationScheduler()
@@ -1,4 +1,4 @@
-from typing import Protocol, Tuple, Optional
+from typing import Protocol, Tuple, Optional, Dict, Iterator, List, Set
 from fastapi import UploadFile, HTTPException
 from uuid import UUID
 import aiofiles
@@ -7,11 +7,24 @@ from pydub import AudioSegment
 from pydub.exceptions import CouldntDecodeError
 from app.core.logger import setup_logger, log_error
 import os
+import io
+import json
+import time
+import shutil
+import asyncio
 import logging
+import tempfile
+from collections import OrderedDict
 from datetime import timedelta
 
 from app.core.config import settings
 from .s3 import S3Service
+from .range_cache import RangeCache
+from .transcode_ladder import LADDER, TranscodePool, manifest_key, rendition_key
+from agents.utils.audio_probe import PROBE_BYTES, probe_duration, probe_file
+from agents.utils.mp3_frames import id3v2_length
+from agents.utils.frame_index import FrameIndex, index_key
+from agents.utils.metrics import metrics
 
 
 class IAudioService(Protocol):
@@ -44,13 +57,51 @@ class IAudioService(Protocol):
     
     async def process_chunk(
         self,
-        file: UploadFile,
+        s3_key: str,
         chunk_start: int,
         chunk_size: int
-    ) -> bytes:
+    ) -> Tuple[bytes, int]:
         pass
 
 logger = setup_logger(__name__)
+
+# Frame indexes are small and immutable; keep the most recently used in memory
+# across requests (AudioService itself is created per request)
+FRAME_INDEX_CACHE_SIZE = int(os.getenv("FRAME_INDEX_CACHE_SIZE", 256))
+_frame_indexes: "OrderedDict[str, FrameIndex]" = OrderedDict()
+# In-flight index builds for episodes stored without one, shared by concurrent requests
+_frame_index_builds: Dict[str, "asyncio.Future"] = {}
+
+# Object metadata for the streaming endpoint; stored audio is never rewritten
+# in place, so a short TTL only bounds how long a deleted object is assumed to exist
+OBJECT_INFO_TTL_SECONDS = float(os.getenv("AUDIO_OBJECT_INFO_TTL_SECONDS", 300))
+_object_info: Dict[str, Tuple[float, Dict]] = {}
+_range_cache: Optional[RangeCache] = None
+
+# Rendition manifests, cached like object info (an empty list when none exist yet)
+_renditions: Dict[str, Tuple[float, List[Dict]]] = {}
+_transcode_pool: Optional[TranscodePool] = None
+_transcode_pool_loaded = False
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def get_range_cache() -> RangeCache:
+    """Process-wide on-disk cache of hot audio byte ranges."""
+    global _range_cache
+    if _range_cache is None:
+        _range_cache = RangeCache.from_env()
+    return _range_cache
+
+
+def get_transcode_pool() -> Optional[TranscodePool]:
+    """Process-wide ffmpeg pool; None when transcoding is disabled or ffmpeg is missing."""
+    global _transcode_pool, _transcode_pool_loaded
+    if not _transcode_pool_loaded:
+        _transcode_pool = TranscodePool.from_env()
+        _transcode_pool_loaded = True
+    return _transcode_pool
+
+
 class AudioService:
     def __init__(self, s3_service: S3Service):
         self.s3_service = s3_service
@@ -99,7 +150,26 @@ class AudioService:
             )
 
     async def get_audio_duration_from_s3(self, s3_key: str) -> int:
-        """Get duration of audio file already in S3"""
+        """
+        Get duration of audio file already in S3.
+
+        Reads only the first and, if needed, last PROBE_BYTES with ranged
+        GETs; the whole object is downloaded only when its headers don't give
+        a duration.
+        """
+        head, total_size = await self.s3_service.get_range(s3_key, f"bytes=0-{PROBE_BYTES - 1}")
+        tag_length = id3v2_length(head)
+        if tag_length + 4 > len(head) and total_size and total_size > len(head):
+            head, _ = await self.s3_service.get_range(s3_key, f"bytes=0-{tag_length + PROBE_BYTES - 1}")
+
+        duration = probe_duration(head, total_size=total_size)
+        if duration is None and total_size and total_size > len(head):
+            tail, _ = await self.s3_service.get_range(s3_key, f"bytes=-{PROBE_BYTES}")
+            duration = probe_duration(head, tail, total_size)
+        if duration is not None and duration > 0:
+            logger.debug("Probed audio duration from headers: %s seconds", duration)
+            return max(1, int(round(duration)))
+
         # Download to temporary file
         temp_file = await self.s3_service.download_to_temp(s3_key)
         try:
@@ -140,6 +210,9 @@ class AudioService:
             
             await self.s3_service.upload_file(temp_file_path, s3_key)
             logger.info("Successfully uploaded podcast to S3: %s", s3_key)
+
+            if s3_key.lower().endswith(".mp3"):
+                await self._store_frame_index(s3_key, temp_file_path)
             
             return s3_key, duration
 
@@ -172,9 +245,23 @@ class AudioService:
         return is_valid
 
     async def get_audio_duration(self, file_path: str) -> int:
-        """Get the duration of an audio file in seconds"""
+        """
+        Get the duration of an audio file in seconds.
+
+        Frame and container headers are tried first; the file is only decoded
+        when they don't give a duration.
+        """
         logger.debug("Getting audio duration for file: %s", file_path)
-        
+
+        try:
+            duration = probe_file(file_path)
+        except Exception as e:
+            logger.debug("Header probe failed for %s: %s", file_path, e)
+            duration = None
+        if duration is not None and duration > 0:
+            logger.debug("Probed audio duration from headers: %s seconds", duration)
+            return max(1, int(round(duration)))
+
         try:
             audio = AudioSegment.from_file(file_path)
             duration = len(audio) / 1000  # Convert milliseconds to seconds
@@ -206,14 +293,17 @@ class AudioService:
         s3_key: str,
         start_position: int = 0
     ) -> str:
-        """Get a presigned URL for streaming with range support"""
+        """
+        Get a presigned URL for streaming. S3 serves Range requests on it
+        directly; it has no start parameter, so players seek with Range and
+        `start_position` is not sent.
+        """
         logger.debug("Generating streaming URL for: %s, start position: %s", s3_key, start_position)
         
         try:
             url = await self.s3_service.get_presigned_url(
                 s3_key,
-                expiry_seconds=3600,  # 1 hour
-                query_params={"start": start_position} if start_position > 0 else None
+                expiry_seconds=3600  # 1 hour
             )
             return url
         except Exception as e:
@@ -224,25 +314,217 @@ class AudioService:
             })
             raise
 
+    async def get_object_info(self, s3_key: str) -> Optional[Dict]:
+        """S3 size/ETag/Last-Modified of an audio object, cached for OBJECT_INFO_TTL_SECONDS."""
+        cached = _object_info.get(s3_key)
+        if cached is not None and time.monotonic() - cached[0] < OBJECT_INFO_TTL_SECONDS:
+            return cached[1]
+        info = await self.s3_service.get_object_info(s3_key)
+        if info is not None:
+            if len(_object_info) >= 4096:
+                _object_info.clear()
+            _object_info[s3_key] = (time.monotonic(), info)
+        else:
+            _object_info.pop(s3_key, None)
+        return info
+
+    def stream_range(self, s3_key: str, info: Dict, start: int, end: int) -> Iterator[bytes]:
+        """
+        Bytes [start, end] of an audio object, served from the local range
+        cache and filled with ranged S3 GETs on a miss. A blocking iterator;
+        StreamingResponse runs it in a worker thread.
+        """
+        return get_range_cache().iter_range(
+            s3_key,
+            info['etag'],
+            info['size'],
+            start,
+            end,
+            lambda fetch_start, fetch_end: self.s3_service.read_range(s3_key, fetch_start, fetch_end)
+        )
+
+    async def get_renditions(self, s3_key: str) -> List[Dict]:
+        """Lower-bitrate renditions of an audio object from its manifest, cached for OBJECT_INFO_TTL_SECONDS."""
+        cached = _renditions.get(s3_key)
+        if cached is not None and time.monotonic() - cached[0] < OBJECT_INFO_TTL_SECONDS:
+            return cached[1]
+        data = await self.s3_service.get_bytes(manifest_key(s3_key))
+        renditions = json.loads(data)['renditions'] if data else []
+        if len(_renditions) >= 4096:
+            _renditions.clear()
+        _renditions[s3_key] = (time.monotonic(), renditions)
+        return renditions
+
+    def schedule_renditions(self, s3_key: str) -> None:
+        """Transcode an episode's rendition ladder in the background; a no-op without ffmpeg."""
+        if get_transcode_pool() is None:
+            return
+        task = asyncio.create_task(self.create_renditions(s3_key))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def create_renditions(self, s3_key: str) -> List[Dict]:
+        """
+        Transcode an audio object into the LADDER renditions on the local
+        ffmpeg pool, upload them next to it and write the manifest the
+        streaming endpoint picks from. Failures are logged, never raised:
+        the original MP3 is always servable.
+        """
+        pool = get_transcode_pool()
+        if pool is None:
+            return []
+
+        source_path = None
+        work_dir = tempfile.mkdtemp(prefix="transcode_")
+        renditions: List[Dict] = []
+        try:
+            existing = await self.get_renditions(s3_key)
+            if existing:
+                return existing  # a cached episode that was already transcoded
+
+            source_path = await self.s3_service.download_to_temp(s3_key)
+            start_time = time.time()
+            jobs = [
+                (rendition, pool.submit(source_path, os.path.join(work_dir, f"{rendition.name}.{rendition.extension}"), rendition))
+                for rendition in LADDER
+            ]
+            for rendition, job in jobs:
+                try:
+                    output_path = await asyncio.wrap_future(job)
+                except Exception as e:
+                    metrics.incr("transcode.failed")
+                    log_error(logger, e, {'s3_key': s3_key, 'rendition': rendition.name, 'operation': 'transcode'})
+                    continue
+
+                key = rendition_key(s3_key, rendition)
+                await self.s3_service.upload_file(output_path, key)
+                metrics.incr("transcode.renditions")
+                renditions.append({
+                    'name': rendition.name,
+                    'key': key,
+                    'content_type': rendition.content_type,
+                    'bitrate_kbps': rendition.bitrate_kbps,
+                    'size': os.path.getsize(output_path)
+                })
+
+            if renditions:
+                manifest = {'source': s3_key, 'renditions': renditions}
+                await self.s3_service.upload_bytes(
+                    manifest_key(s3_key), json.dumps(manifest).encode('utf-8'), 'application/json'
+                )
+                _renditions[s3_key] = (time.monotonic(), renditions)
+            logger.info("Transcoded %s renditions of %s in %.2fs", len(renditions), s3_key, time.time() - start_time)
+            return renditions
+
+        except Exception as e:
+            log_error(logger, e, {'s3_key': s3_key, 'operation': 'create_renditions'})
+            return renditions
+        finally:
+            if source_path and os.path.exists(source_path):
+                os.remove(source_path)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def delete_renditions(self, s3_key: str) -> None:
+        """Delete an episode's renditions and manifest (deleting a missing key is not an error in S3)."""
+        for rendition in LADDER:
+            await self.s3_service.delete_file(rendition_key(s3_key, rendition))
+        await self.s3_service.delete_file(manifest_key(s3_key))
+        _renditions.pop(s3_key, None)
+
+    async def get_frame_index(self, s3_key: str) -> Optional[FrameIndex]:
+        """
+        Seek table of an MP3 in S3, from memory, then from the index object
+        stored next to it. Episodes stored before indexes existed are scanned
+        once and their index saved. None for audio that isn't MP3.
+        """
+        frame_index = _frame_indexes.get(s3_key)
+        if frame_index is not None:
+            _frame_indexes.move_to_end(s3_key)
+            return frame_index
+
+        data = await self.s3_service.get_bytes(index_key(s3_key))
+        if data is not None:
+            frame_index = FrameIndex.from_bytes(data)
+        elif s3_key.lower().endswith(".mp3"):
+            build = _frame_index_builds.get(s3_key)
+            if build is None:
+                build = asyncio.ensure_future(self._build_frame_index(s3_key))
+                _frame_index_builds[s3_key] = build
+                build.add_done_callback(lambda _: _frame_index_builds.pop(s3_key, None))
+            # Shielded: a client that gives up must not cancel the build other requests wait on
+            frame_index = await asyncio.shield(build)
+        if frame_index is None:
+            return None
+
+        _frame_indexes[s3_key] = frame_index
+        while len(_frame_indexes) > FRAME_INDEX_CACHE_SIZE:
+            _frame_indexes.popitem(last=False)
+        return frame_index
+
+    async def _build_frame_index(self, s3_key: str) -> Optional[FrameIndex]:
+        """Download an MP3 stored without an index and index it, off the event loop."""
+        temp_file = await self.s3_service.download_to_temp(s3_key)
+        try:
+            return await self._store_frame_index(s3_key, temp_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    async def _store_frame_index(self, s3_key: str, file_path: str) -> Optional[FrameIndex]:
+        """Build the frame index of a local MP3 and store it next to its S3 copy."""
+        try:
+            # A full scan of the file; keep it off the event loop
+            frame_index = await asyncio.to_thread(FrameIndex.build, file_path)
+            if frame_index is not None:
+                await self.s3_service.upload_bytes(index_key(s3_key), frame_index.to_bytes())
+            return frame_index
+        except Exception as e:
+            # Playback still works without it; chunk requests rebuild it later
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'operation': 'store_frame_index'
+            })
+            return None
+
     async def process_chunk(
-        self, 
-        file: UploadFile, 
-        chunk_start: int, 
+        self,
+        s3_key: str,
+        chunk_start: int,
         chunk_size: int
-    ) -> bytes:
-        """Process an audio chunk for streaming"""
-        logger.debug("Processing audio chunk: start=%s, size=%s", chunk_start, chunk_size)
-        
-        temp_file_path = None
+    ) -> Tuple[bytes, int]:
+        """
+        Get `chunk_size` ms of audio starting at `chunk_start` ms.
+
+        MP3s are served as a byte range located through the frame index, with
+        one ranged GET and no decoding; the range starts on a frame boundary
+        at or shortly before `chunk_start`. Returns the bytes and the position
+        in ms they actually start at.
+        """
+        logger.debug("Processing audio chunk: key=%s, start=%s, size=%s", s3_key, chunk_start, chunk_size)
+
         try:
-            temp_file_path = await self._save_temp_file(file)
-            audio = AudioSegment.from_file(temp_file_path)
-            chunk = audio[chunk_start:chunk_start + chunk_size]
-            return chunk.raw_data
+            frame_index = await self.get_frame_index(s3_key)
+            if frame_index is not None:
+                start_byte, end_byte, start_seconds = frame_index.byte_range(
+                    chunk_start / 1000, (chunk_start + chunk_size) / 1000
+                )
+                data, _ = await self.s3_service.get_range(s3_key, f"bytes={start_byte}-{end_byte - 1}")
+                return data, int(start_seconds * 1000)
+
+            # Other formats have no frame index; decode and re-encode the window
+            temp_file = await self.s3_service.download_to_temp(s3_key)
+            try:
+                audio = AudioSegment.from_file(temp_file)
+                buffer = io.BytesIO()
+                audio[chunk_start:chunk_start + chunk_size].export(buffer, format="mp3")
+                return buffer.getvalue(), chunk_start
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
 
         except Exception as e:
             log_error(logger, e, {
-                'filename': file.filename,
+                's3_key': s3_key,
                 'chunk_start': chunk_start,
                 'chunk_size': chunk_size,
                 'operation': 'process_chunk'
@@ -251,6 +533,3 @@ class AudioService:
                 status_code=500,
                 detail="Failed to process audio chunk"
             )
-        finally:
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
@@ -0,0 +1,178 @@
+import os
+import hashlib
+import tempfile
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+from agents.utils.disk_lru import DiskLRUStore
+from agents.utils.metrics import metrics
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end inclusive) for a single-range "bytes=..." Range header.
+
+    Returns None when the whole object should be sent instead (no header,
+    another unit, bad syntax or several ranges, which we don't serve as
+    multipart). Raises ValueError when the range is unsatisfiable (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, dash, last = header[len("bytes="):].strip().partition("-")
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Range starts past the end of a {size}-byte object")
+    return start, min(end, size - 1)
+
+
+def _etags(header: str) -> List[str]:
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether a GET's If-None-Match / If-Modified-Since make a 304 the right answer."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = _etags(if_none_match)
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def if_range_matches(header: Optional[str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether a Range request's If-Range still matches; if not, the full object is sent."""
+    if not header:
+        return True
+    if header.startswith(("\"", "W/")):
+        return not header.startswith("W/") and header == etag  # strong comparison only
+    try:
+        return last_modified is not None and last_modified.replace(microsecond=0) == parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+
+class RangeCache:
+    """
+    On-disk cache of fixed-size blocks of remote objects, for serving HTTP
+    byte ranges without a round-trip per request.
+
+    A read is split into `block_size` blocks; blocks on disk are served
+    locally and each contiguous run of missing blocks is fetched with one
+    ranged request through `fetch(start, end_inclusive)`. Blocks are keyed by
+    the object key and its version (the S3 ETag), so a replaced object never
+    serves stale bytes. Blocks live in a DiskLRUStore bounded to
+    `max_bytes`, so popular episodes stay local and everything else ages
+    out.
+
+    Counters: range_cache.hits, .misses (blocks), .fetches, .fetched_bytes, .evictions, .errors
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, block_size: int = 256 * 1024):
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.store = DiskLRUStore(cache_dir, max_bytes, suffix=".blk", metric_prefix="range_cache")
+
+    @classmethod
+    def from_env(cls) -> "RangeCache":
+        return cls(
+            cache_dir=os.getenv("AUDIO_RANGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "learnlab_audio_cache")),
+            max_bytes=int(float(os.getenv("AUDIO_RANGE_CACHE_MAX_MB", 1024)) * 1024 * 1024),
+            block_size=int(os.getenv("AUDIO_RANGE_CACHE_BLOCK_KB", 256)) * 1024,
+        )
+
+    @staticmethod
+    def _object_id(key: str, version: str) -> str:
+        return hashlib.sha256(f"{key}\x1f{version}".encode("utf-8")).hexdigest()
+
+    def read(
+        self,
+        key: str,
+        version: str,
+        size: int,
+        start: int,
+        end: int,
+        fetch: Callable[[int, int], bytes],
+    ) -> bytes:
+        """Bytes [start, end] (inclusive) of an object of `size` bytes."""
+        object_id = self._object_id(key, version)
+        first, last = start // self.block_size, end // self.block_size
+
+        blocks: Dict[int, bytes] = {}
+        missing: List[int] = []
+        for block in range(first, last + 1):
+            data = self.store.get(f"{object_id}_{block}")
+            if data is None:
+                missing.append(block)
+            else:
+                blocks[block] = data
+        metrics.incr("range_cache.hits", len(blocks))
+        metrics.incr("range_cache.misses", len(missing))
+
+        for run_first, run_last in self._runs(missing):
+            fetch_start = run_first * self.block_size
+            fetch_end = min(size, (run_last + 1) * self.block_size) - 1
+            data = fetch(fetch_start, fetch_end)
+            metrics.incr("range_cache.fetches")
+            metrics.incr("range_cache.fetched_bytes", len(data))
+            for block in range(run_first, run_last + 1):
+                offset = (block - run_first) * self.block_size
+                blocks[block] = data[offset:offset + self.block_size]
+                self.store.put(f"{object_id}_{block}", blocks[block])
+
+        joined = b"".join(blocks[block] for block in range(first, last + 1))
+        offset = start - first * self.block_size
+        return joined[offset:offset + end - start + 1]
+
+    def iter_range(
+        self,
+        key: str,
+        version: str,
+        size: int,
+        start: int,
+        end: int,
+        fetch: Callable[[int, int], bytes],
+        chunk_size: int = 1024 * 1024,
+    ) -> Iterator[bytes]:
+        """read() in pieces of about `chunk_size`, for streaming large ranges."""
+        position = start
+        while position <= end:
+            chunk_end = min(end, position + chunk_size - 1)
+            yield self.read(key, version, size, position, chunk_end, fetch)
+            position = chunk_end + 1
+
+    @staticmethod
+    def _runs(blocks: List[int]) -> List[Tuple[int, int]]:
+        runs: List[Tuple[int, int]] = []
+        for block in blocks:
+            if runs and runs[-1][1] == block - 1:
+                runs[-1] = (runs[-1][0], block)
+            else:
+                runs.append((block, block))
+        return runs
+
+    def stats(self) -> Dict[str, Any]:
+        hits = metrics.counter("range_cache.hits")
+        lookups = hits + metrics.counter("range_cache.misses")
+        entries, total_bytes = self.store.usage()
+        return {
+            "blocks": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": hits / lookups if lookups else None,
+            "s3_fetches": metrics.counter("range_cache.fetches"),
+        }
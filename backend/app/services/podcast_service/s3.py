@@ -1,4 +1,5 @@
-from typing import Protocol, Optional, Dict
+from typing import Protocol, Optional, Dict, Tuple
+import asyncio
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 import logging
@@ -47,8 +48,14 @@ class S3Service:
                 extra_args['ContentType'] = 'text/plain'
             elif s3_key.endswith('.vtt'):
                 extra_args['ContentType'] = 'text/vtt'
-            elif s3_key.endswith(('.mp3', '.m4a', '.wav', '.ogg')):
+            elif s3_key.endswith('.mp3'):
                 extra_args['ContentType'] = 'audio/mpeg'
+            elif s3_key.endswith('.m4a'):
+                extra_args['ContentType'] = 'audio/mp4'
+            elif s3_key.endswith(('.ogg', '.opus')):
+                extra_args['ContentType'] = 'audio/ogg'
+            elif s3_key.endswith('.wav'):
+                extra_args['ContentType'] = 'audio/wav'
 
             # Set additional headers
             extra_args.update({
@@ -56,14 +63,14 @@ class S3Service:
                 'ACL': 'private'
             })
 
-            # Upload file
-            with open(file_path, 'rb') as file_obj:
-                self.s3_client.upload_fileobj(
-                    file_obj,
-                    self.bucket_name,
-                    s3_key,
-                    ExtraArgs=extra_args
-                )
+            # Upload file (boto3 blocks, so keep it off the event loop)
+            await asyncio.to_thread(
+                self.s3_client.upload_file,
+                file_path,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs=extra_args
+            )
 
             elapsed_time = time.time() - start_time
             logger.info(f"File upload successful. Time taken: {elapsed_time:.2f}s")
@@ -170,12 +177,42 @@ class S3Service:
                 detail="Failed to delete file from storage"
             )
 
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every object under a key prefix (e.g. a stream folder); returns how many were deleted"""
+        logger.info(f"Deleting objects under prefix: {prefix}")
+
+        try:
+            deleted = 0
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                if objects:
+                    # A listing page holds at most 1000 keys, the delete_objects limit
+                    self.s3_client.delete_objects(
+                        Bucket=self.bucket_name,
+                        Delete={'Objects': objects, 'Quiet': True}
+                    )
+                    deleted += len(objects)
+            return deleted
+
+        except ClientError as e:
+            log_error(logger, e, {
+                'prefix': prefix,
+                'operation': 'delete_prefix',
+                'error_code': e.response['Error']['Code']
+            })
+            raise HTTPException(
+                status_code=500,
+                detail=f"AWS S3 error: {e.response['Error']['Message']}"
+            )
+
     async def check_file_exists(self, s3_key: str) -> bool:
         """Check if a file exists in S3"""
         logger.debug(f"Checking existence of file: {s3_key}")
         
         try:
-            self.s3_client.head_object(
+            await asyncio.to_thread(
+                self.s3_client.head_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
@@ -194,6 +231,147 @@ class S3Service:
                 detail="Failed to check file existence"
             )
 
+    async def upload_bytes(self, s3_key: str, data: bytes, content_type: str = 'application/octet-stream') -> bool:
+        """Upload an in-memory object (e.g. a frame index) to S3"""
+        logger.debug(f"Uploading {len(data)} bytes to key: {s3_key}")
+
+        try:
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Body=data,
+                ContentType=content_type,
+                CacheControl='max-age=31536000',
+                ACL='private'
+            )
+            return True
+
+        except ClientError as e:
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'operation': 'upload_bytes',
+                'error_code': e.response['Error']['Code']
+            })
+            raise HTTPException(
+                status_code=500,
+                detail=f"AWS S3 error: {e.response['Error']['Message']}"
+            )
+
+    async def get_bytes(self, s3_key: str) -> Optional[bytes]:
+        """Fetch a small object in full; None if it does not exist"""
+        logger.debug(f"Fetching object: {s3_key}")
+
+        try:
+            return await asyncio.to_thread(self._read_object, s3_key)
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'operation': 'get_bytes',
+                'error_code': e.response['Error']['Code']
+            })
+            raise HTTPException(
+                status_code=500,
+                detail=f"AWS S3 error: {e.response['Error']['Message']}"
+            )
+
+    def _read_object(self, s3_key: str) -> bytes:
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=s3_key
+        )
+        return response['Body'].read()
+
+    async def get_object_info(self, s3_key: str) -> Optional[Dict]:
+        """Size, ETag, Last-Modified and content type of an object; None if it does not exist"""
+        logger.debug(f"Fetching object info: {s3_key}")
+
+        try:
+            response = await asyncio.to_thread(
+                self.s3_client.head_object,
+                Bucket=self.bucket_name,
+                Key=s3_key
+            )
+            return {
+                'size': response['ContentLength'],
+                'etag': response['ETag'],
+                'last_modified': response.get('LastModified'),
+                'content_type': response.get('ContentType') or 'application/octet-stream'
+            }
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'operation': 'get_object_info',
+                'error_code': e.response['Error']['Code']
+            })
+            raise HTTPException(
+                status_code=500,
+                detail=f"AWS S3 error: {e.response['Error']['Message']}"
+            )
+
+    def read_range(self, s3_key: str, start: int, end: int) -> bytes:
+        """
+        Bytes [start, end] (inclusive) of an object. Blocking, unlike the
+        other methods, for callers already running in a worker thread.
+        """
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Range=f"bytes={start}-{end}"
+        )
+        return response['Body'].read()
+
+    def _read_range_object(self, s3_key: str, byte_range: str) -> Tuple[bytes, Optional[int]]:
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=s3_key,
+            Range=byte_range
+        )
+        body = response['Body'].read()
+        # "bytes 0-65535/1234567"; absent when the whole object was returned
+        content_range = response.get('ContentRange')
+        total_size = int(content_range.rsplit('/', 1)[1]) if content_range else response.get('ContentLength')
+        return body, total_size
+
+    async def get_range(self, s3_key: str, byte_range: str) -> Tuple[bytes, Optional[int]]:
+        """
+        Fetch part of an object with a ranged GET, e.g. "bytes=0-65535" or
+        "bytes=-65536" for the last 64 KB. Returns the bytes and the object's
+        total size.
+        """
+        logger.debug(f"Fetching {byte_range} of {s3_key}")
+
+        try:
+            return await asyncio.to_thread(self._read_range_object, s3_key, byte_range)
+
+        except ClientError as e:
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'byte_range': byte_range,
+                'operation': 'get_range',
+                'error_code': e.response['Error']['Code']
+            })
+            raise HTTPException(
+                status_code=500,
+                detail=f"AWS S3 error: {e.response['Error']['Message']}"
+            )
+        except Exception as e:
+            log_error(logger, e, {
+                's3_key': s3_key,
+                'byte_range': byte_range,
+                'operation': 'get_range'
+            })
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to read file from S3"
+            )
+
     async def download_to_temp(self, s3_key: str) -> str:
         """
         Downloads a file from S3 to a temporary location and returns the local file path.
@@ -208,8 +386,9 @@ class S3Service:
             temp_fd, temp_path = tempfile.mkstemp()
             os.close(temp_fd)  # Close the file descriptor
 
-            # Download the file
-            self.s3_client.download_file(
+            # Download the file in a worker thread; it can be a whole episode
+            await asyncio.to_thread(
+                self.s3_client.download_file,
                 self.bucket_name,
                 s3_key,
                 temp_path
@@ -0,0 +1,132 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Mapping, NamedTuple, Optional
+
+ORIGINAL = "original"
+MANIFEST_SUFFIX = ".renditions.json"
+
+
+class Rendition(NamedTuple):
+    name: str
+    codec: str           # ffmpeg encoder
+    bitrate_kbps: int
+    extension: str
+    content_type: str
+    extra_args: tuple = ()
+
+
+# Speech-tuned, mono. Opus is the smallest for the quality; AAC covers
+# players without Opus support (older Safari). The MP3 stays the top rung.
+LADDER: List[Rendition] = [
+    Rendition("opus_32k", "libopus", 32, "opus", "audio/ogg; codecs=opus", ("-application", "voip")),
+    Rendition("aac_48k", "aac", 48, "m4a", "audio/mp4", ("-movflags", "+faststart")),
+]
+
+# Effective connection types (ECT client hint) that get the low rung
+SLOW_CONNECTIONS = {"slow-2g", "2g", "3g"}
+# Downlink client hint (Mbps) below which the low rung is served
+SLOW_DOWNLINK_MBPS = 1.0
+
+
+def rendition_key(audio_key: str, rendition: Rendition) -> str:
+    """Storage key of a rendition, next to the original: episode.mp3 -> episode.opus_32k.opus"""
+    return f"{audio_key.rsplit('.', 1)[0]}.{rendition.name}.{rendition.extension}"
+
+
+def manifest_key(audio_key: str) -> str:
+    return audio_key + MANIFEST_SUFFIX
+
+
+class TranscodePool:
+    """
+    Runs ffmpeg transcodes on a bounded pool of local processes.
+
+    Each job is one ffmpeg process; `max_workers` threads only wait on them,
+    so at most that many encoders share the CPU at a time however many
+    episodes are queued. Jobs are independent and time out after
+    `timeout_seconds`.
+    """
+
+    def __init__(self, max_workers: int, ffmpeg_path: str = "ffmpeg", timeout_seconds: float = 600):
+        self.ffmpeg_path = ffmpeg_path
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="transcode")
+
+    @classmethod
+    def from_env(cls) -> Optional["TranscodePool"]:
+        """None when transcoding is disabled or ffmpeg is not installed."""
+        if os.getenv("TRANSCODE_ENABLED", "true").lower() != "true":
+            return None
+        ffmpeg_path = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+        if ffmpeg_path is None:
+            print("Warning: ffmpeg not found; podcasts are served as MP3 only")
+            return None
+        return cls(
+            max_workers=int(os.getenv("TRANSCODE_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+            ffmpeg_path=ffmpeg_path,
+            timeout_seconds=float(os.getenv("TRANSCODE_TIMEOUT_SECONDS", 600)),
+        )
+
+    def command(self, source: str, target: str, rendition: Rendition) -> List[str]:
+        return [
+            self.ffmpeg_path, "-nostdin", "-y", "-loglevel", "error",
+            "-i", source,
+            "-vn", "-ac", "1",
+            "-c:a", rendition.codec, "-b:a", f"{rendition.bitrate_kbps}k",
+            *rendition.extra_args,
+            target,
+        ]
+
+    def submit(self, source: str, target: str, rendition: Rendition) -> Future:
+        """Transcode `source` into `target`; the future resolves to `target`."""
+        return self._executor.submit(self._run, source, target, rendition)
+
+    def _run(self, source: str, target: str, rendition: Rendition) -> str:
+        result = subprocess.run(
+            self.command(source, target, rendition),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=self.timeout_seconds,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed for {rendition.name}: {result.stderr.decode(errors='replace')[-500:]}")
+        return target
+
+
+def choose_rendition(
+    renditions: List[Dict],
+    headers: Mapping[str, str],
+    quality: Optional[str] = None,
+) -> Optional[Dict]:
+    """
+    Pick a manifest entry for a client, or None for the original MP3.
+
+    `quality` ("low", "high" or "auto"/None) comes from the player; "auto"
+    uses the Save-Data, ECT and Downlink client hints. On the low rung Opus
+    is served only to clients whose Accept header lists Ogg/Opus, AAC to
+    everyone else.
+    """
+    if not renditions or quality == "high":
+        return None
+    if quality != "low" and not _is_constrained(headers):
+        return None
+
+    accept = headers.get("accept", "").lower()
+    opus_ok = "audio/ogg" in accept or "audio/opus" in accept or "codecs=opus" in accept
+    candidates = [r for r in renditions if opus_ok or "opus" not in r["content_type"]]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: r["bitrate_kbps"])
+
+
+def _is_constrained(headers: Mapping[str, str]) -> bool:
+    if headers.get("save-data", "").lower() == "on":
+        return True
+    if headers.get("ect", "").lower() in SLOW_CONNECTIONS:
+        return True
+    try:
+        return float(headers.get("downlink", "")) < SLOW_DOWNLINK_MBPS
+    except ValueError:
+        return False
@@ -0,0 +1,178 @@
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional
+
+from agents.utils.metrics import metrics
+from app.core.logger import setup_logger, log_error
+
+logger = setup_logger(__name__)
+
+DEFAULT_OUTPUT_TYPES = "quiz,flashcards"
+DEFAULT_QUESTION = "Key concepts and overview of {title}"
+
+
+class PregenerationService:
+    """
+    Warms the content cache for newly indexed documents while the server is idle.
+
+    After ingestion a document is queued here; a single background worker
+    generates its default outputs (an overview quiz and starter deck unless
+    PREGENERATION_OUTPUT_TYPES says otherwise) through the normal content
+    graph, which stores them in the content cache. The worker only starts a
+    job when no interactive generation is running, and an interactive
+    request arriving mid-job pauses it before its next graph node until the
+    server is idle again.
+
+    Pausing rather than cancelling keeps every finished node's work: a
+    cancelled job would leave its blocking LLM calls running in executor
+    threads, then pay for them again on retry. The limit is that a node
+    already running (one LLM call per output type) still completes while
+    the user's request runs.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("PREGENERATION_ENABLED", "true").lower() == "true"
+        self.output_types = [
+            t.strip() for t in os.getenv("PREGENERATION_OUTPUT_TYPES", DEFAULT_OUTPUT_TYPES).split(",") if t.strip()
+        ]
+        self.question_template = os.getenv("PREGENERATION_QUESTION", DEFAULT_QUESTION)
+
+        self.generator = None
+        self._queue: Deque[str] = deque()
+        self._queued = set()
+        self._interactive = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._current: Optional[asyncio.Task] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self, generator) -> None:
+        """Start the worker on the running event loop; call from application startup."""
+        if not self.enabled or self._worker is not None:
+            return
+        self.generator = generator
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"Pre-generation worker started for: {', '.join(self.output_types)}")
+
+    async def stop(self) -> None:
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        if self._current is not None:
+            self._current.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+    def enqueue(self, pdf_title: str) -> bool:
+        """Queue a document's default outputs; returns False if it is already queued or the worker is off."""
+        if self._worker is None or pdf_title in self._queued:
+            return False
+        self._queue.append(pdf_title)
+        self._queued.add(pdf_title)
+        self._wakeup.set()
+        metrics.incr("pregeneration.queued")
+        return True
+
+    def discard(self, pdf_title: str) -> None:
+        """Drop a queued document, e.g. because it was deleted."""
+        if pdf_title in self._queued:
+            self._queue = deque(title for title in self._queue if title != pdf_title)
+            self._queued.discard(pdf_title)
+
+    @asynccontextmanager
+    async def interactive(self):
+        """
+        Wrap every user-facing generation. While any is running no
+        pre-generation job starts, and the one in progress pauses before its
+        next node.
+        """
+        self._interactive += 1
+        if self._idle is not None:
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            self._interactive -= 1
+            if self._interactive == 0 and self._idle is not None:
+                self._idle.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            await self._idle.wait()
+            if not self._queue:
+                continue
+
+            pdf_title = self._queue.popleft()
+            self._current = asyncio.create_task(self._pregenerate(pdf_title))
+            try:
+                # wait() rather than await, so a cancelled job doesn't cancel the worker
+                await asyncio.wait({self._current})
+            except asyncio.CancelledError:
+                self._current.cancel()
+                raise
+            self._queued.discard(pdf_title)
+            self._current = None
+
+    async def _between_nodes(self) -> None:
+        """Hold a running job at a node boundary while interactive generations are in flight."""
+        if not self._idle.is_set():
+            metrics.incr("pregeneration.preempted")
+            await self._idle.wait()
+
+    async def _pregenerate(self, pdf_title: str) -> None:
+        question = self.question_template.format(title=pdf_title)
+        metrics.incr("pregeneration.jobs")
+        try:
+            async for output_type, result in self.generator.agenerate_contents(
+                question=question,
+                pdf_title=pdf_title,
+                output_types=self.output_types,
+                pregenerated=True,
+                between_nodes=self._between_nodes
+            ):
+                if isinstance(result, Exception):
+                    metrics.incr(f"pregeneration.{output_type}.failed")
+                    log_error(logger, result, {'operation': 'pregeneration', 'pdf_title': pdf_title, 'output_type': output_type})
+                else:
+                    metrics.incr(f"pregeneration.{output_type}.generated")
+            logger.info(f"Pre-generated {', '.join(self.output_types)} for '{pdf_title}'")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.incr("pregeneration.failed")
+            log_error(logger, e, {'operation': 'pregeneration', 'pdf_title': pdf_title})
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state plus, per output type, how many pre-generated entries were later served from the cache."""
+        types: Dict[str, Dict[str, Any]] = {}
+        for output_type in self.output_types:
+            generated = metrics.counter(f"pregeneration.{output_type}.generated")
+            hits = metrics.counter(f"pregeneration.{output_type}.hits")
+            types[output_type] = {
+                "generated": generated,
+                "failed": metrics.counter(f"pregeneration.{output_type}.failed"),
+                "hits": hits,
+                "hits_per_generated": hits / generated if generated else None,
+            }
+        return {
+            "enabled": self._worker is not None,
+            "queued": list(self._queue),
+            "running": self._current is not None and not self._current.done(),
+            "interactive_in_flight": self._interactive,
+            "jobs": metrics.counter("pregeneration.jobs"),
+            "preempted": metrics.counter("pregeneration.preempted"),
+            "types": types,
+        }
+
+
+# Global instance
+pregeneration_service = PregenerationService()
@@ -19,7 +19,7 @@ class QuestionService:
     def __init__(self, db: Session):
         self.db = db
 
-    async def create_question(self, quiz_id: UUID, question_data: QuestionCreate) -> Question:
+    def create_question(self, quiz_id: UUID, question_data: QuestionCreate) -> Question:
         """Create a new question with associated concepts and answers"""
         logger.info(f"Creating question for quiz {quiz_id}")
         
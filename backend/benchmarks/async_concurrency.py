@@ -0,0 +1,178 @@
+"""
+Concurrency benchmark: thread-per-generation vs. one event loop.
+
+The old router ran each generation as a BackgroundTasks thread that called
+the synchronous graph, so N concurrent podcasts held N OS threads for the
+whole run. agenerate_content drives the same graph with ainvoke on one
+event loop. Node bodies are replaced by sleeps of realistic shape (short
+blocking lookups, long LLM/TTS waits) so only the execution model differs.
+
+Each mode runs in its own subprocess so peak RSS is measured cleanly.
+Run from backend/ with the usual .env in place:
+    python -m benchmarks.async_concurrency --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+from langchain_core.runnables import RunnableConfig
+from agents.podcast_agent.learn_lab_assistant_agent import (
+    PodcastGenerator,
+    EnhancedGraphState,
+    RAGContext
+)
+
+# Simulated seconds spent in each step
+LOOKUP_LATENCY = 0.05
+OUTLINE_LATENCY = 0.3
+SCRIPT_LATENCY = 0.6
+TTS_LATENCY = 0.6
+
+
+class SimulatedGenerator(PodcastGenerator):
+    """PodcastGenerator with external clients skipped and sleeping nodes."""
+
+    def __init__(self):
+        self.graph = self.create_graph()
+        self.multi_graph = self.create_multi_graph()
+
+    def prepare_shared_context(self, question, pdf_title, output_types):
+        time.sleep(LOOKUP_LATENCY)
+        return RAGContext(question=question, pdf_title=pdf_title, answer="answer", evidence=["evidence"]), {}
+
+    def check_cache(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        time.sleep(LOOKUP_LATENCY)
+        return state
+
+    def retrieve_context(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        return state
+
+    def expand_topic(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        time.sleep(OUTLINE_LATENCY)
+        return state
+
+    async def aexpand_topic(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        await asyncio.sleep(OUTLINE_LATENCY)
+        return state
+
+    def generate_script(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        time.sleep(SCRIPT_LATENCY)
+        return state
+
+    async def agenerate_script(self, state: EnhancedGraphState) -> EnhancedGraphState:
+        await asyncio.sleep(SCRIPT_LATENCY)
+        return state
+
+    def generate_tts(self, state: EnhancedGraphState, config: Optional[RunnableConfig] = None) -> EnhancedGraphState:
+        time.sleep(TTS_LATENCY)
+        return state
+
+    async def agenerate_tts(self, state: EnhancedGraphState, config: Optional[RunnableConfig] = None) -> EnhancedGraphState:
+        await asyncio.sleep(TTS_LATENCY)
+        return state
+
+
+class ThreadSampler:
+    """Samples the live thread count in the background and keeps the peak."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def current_rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_threads(generator: SimulatedGenerator, concurrency: int):
+    threads = [
+        threading.Thread(target=generator.generate_content, args=(f"question {i}", "bench", "podcast"))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_async(generator: SimulatedGenerator, concurrency: int):
+    async def main():
+        await asyncio.gather(*(
+            generator.agenerate_content(f"question {i}", "bench", "podcast")
+            for i in range(concurrency)
+        ))
+    asyncio.run(main())
+
+
+def measure(mode: str, concurrency: int) -> dict:
+    generator = SimulatedGenerator()
+    # Warm up imports and graph compilation so they don't count towards the run
+    run_threads(generator, 1) if mode == "threads" else run_async(generator, 1)
+
+    rss_before = current_rss_kb()
+    start = time.perf_counter()
+    with ThreadSampler() as sampler:
+        run_threads(generator, concurrency) if mode == "threads" else run_async(generator, concurrency)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "wall_seconds": round(elapsed, 3),
+        "peak_threads": sampler.peak - 1,  # exclude the sampler itself
+        "peak_rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mode", choices=["threads", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: measure one mode and report back as JSON
+        print(json.dumps(measure(args.mode, args.concurrency)))
+        return
+
+    ideal = LOOKUP_LATENCY * 2 + OUTLINE_LATENCY + SCRIPT_LATENCY + TTS_LATENCY
+    print(f"{args.concurrency} concurrent podcast generations (single run ~{ideal:.2f}s of simulated waits)")
+    for mode in ("threads", "async"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.async_concurrency", "--mode", mode, "--concurrency", str(args.concurrency)],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(output)
+        print(
+            f"{mode:<8} wall {result['wall_seconds']:7.2f} s   "
+            f"peak threads {result['peak_threads']:5d}   "
+            f"peak RSS growth {result['peak_rss_growth_mb']:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import struct
+from agents.utils.mp3_frames import Mp3Assembler
+from agents.utils.audio_probe import PROBE_BYTES, probe_duration, probe_file
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo, no CRC: 417-byte frames
+HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+FRAME_SECONDS = 1152 / 44100
+
+
+def cbr_mp3(frames: int) -> bytes:
+    return b"ID3\x04\x00\x00\x00\x00\x00\x0a" + bytes(10) + (HEADER + bytes([0x55]) * 413) * frames
+
+
+def test_mp3_info_frame_gives_exact_duration(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    with Mp3Assembler(path) as assembler:
+        assembler.append(cbr_mp3(300))
+        assembler.append_silence(1000)
+
+    duration = probe_file(path)
+    assert abs(duration - assembler.duration_seconds) < 1e-9
+
+    # A ranged read of the first few KB is enough
+    head = open(path, "rb").read()[:4096]
+    assert abs(probe_duration(head) - assembler.duration_seconds) < 1e-9
+
+
+def test_mp3_without_tag_is_estimated_from_size():
+    data = cbr_mp3(1000)
+    duration = probe_duration(data[:4096], data[-4096:], len(data))
+    # Nominal bitrate; these unpadded frames run slightly under 128 kbps
+    assert abs(duration - 1000 * FRAME_SECONDS) < 0.005 * duration
+    assert probe_duration(data[:4096]) is None  # size unknown
+
+
+def test_wav_header():
+    byte_rate = 16000 * 2
+    fmt = struct.pack("<HHIIHH", 1, 1, 16000, byte_rate, 2, 16)
+    data = (
+        b"RIFF" + struct.pack("<I", 0) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", byte_rate * 3) + bytes(byte_rate * 3)
+    )
+    assert probe_duration(data[:1024], total_size=len(data)) == 3.0
+
+
+def test_ogg_opus_last_granule():
+    def page(granule: int, payload: bytes) -> bytes:
+        return b"OggS\x00\x00" + struct.pack("<q", granule) + bytes(12) + payload
+
+    head = page(0, b"OpusHead\x01\x01" + struct.pack("<H", 312) + bytes(8))
+    tail = page(48000 * 5, bytes(100)) + page(48000 * 10 + 312, bytes(100))
+    assert probe_duration(head, tail) == 10.0
+
+
+def test_ogg_larger_than_head_needs_tail():
+    def page(granule: int, payload: bytes) -> bytes:
+        return b"OggS\x00\x00" + struct.pack("<q", granule) + bytes(12) + payload
+
+    data = page(0, b"OpusHead\x01\x01" + struct.pack("<H", 312) + bytes(8)) + b"".join(
+        page(48000 * second + 312, bytes(4000)) for second in range(1, 61)
+    )
+    head = data[:PROBE_BYTES]
+    assert len(data) > PROBE_BYTES
+    # The head alone ends mid-file, so its last granule is not the duration
+    assert probe_duration(head, total_size=len(data)) is None
+    assert probe_duration(head, data[-PROBE_BYTES:], len(data)) == 60.0
+
+
+def test_unknown_data_returns_none():
+    assert probe_duration(b"not audio at all" * 100, total_size=1600) is None
@@ -0,0 +1,30 @@
+import os
+import json
+import pytest
+from agents.utils import cache_payload
+from agents.utils.cache_payload import encode_payload, decode_payload, PayloadTooLarge
+
+
+def test_round_trip():
+    data = {"topic": "Entropy", "s3_url": "https://bucket/podcast/a.mp3", "cached_at": "2024-01-01T00:00:00"}
+    encoded = encode_payload(data)
+    assert encoded.startswith("c1:")
+    assert decode_payload(encoded) == data
+
+
+def test_zlib_fallback_round_trip(monkeypatch):
+    monkeypatch.setattr(cache_payload, "zstandard", None)
+    monkeypatch.setattr(cache_payload, "orjson", None)
+    encoded = encode_payload({"quiz": {"title": "T", "questions": []}})
+    assert encoded.startswith("c1:d:")
+    assert decode_payload(encoded) == {"quiz": {"title": "T", "questions": []}}
+
+
+def test_reads_legacy_json_entries():
+    assert decode_payload(json.dumps({"script": "Speaker 1: hi"})) == {"script": "Speaker 1: hi"}
+
+
+def test_rejects_payloads_over_metadata_limit():
+    incompressible = os.urandom(60 * 1024).hex()
+    with pytest.raises(PayloadTooLarge):
+        encode_payload({"blob": incompressible})
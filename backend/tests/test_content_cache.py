@@ -0,0 +1,199 @@
+import time
+from types import SimpleNamespace
+from agents.utils.upstash_cache import ContentCache
+from agents.utils.upstash_semantic_cache.local_tier import LocalCacheTier
+from agents.podcast_agent.learn_lab_assistant_agent import PodcastGenerator
+
+
+class FakeIndex:
+    """Exact-match stand-in for the Upstash index, scoring a fixed similarity."""
+
+    def __init__(self, score=1.0):
+        self.score = score
+        self.namespaces = {}  # namespace -> {id: (data, metadata)}
+        self.calls = []
+
+    def upsert(self, vectors, namespace=""):
+        self.calls.append(("upsert", namespace, len(vectors)))
+        for vector_id, data, metadata in vectors:
+            self.namespaces.setdefault(namespace, {})[vector_id] = (data, dict(metadata))
+
+    def query(self, data, top_k, include_metadata, namespace=""):
+        for vector_id, (stored, metadata) in self.namespaces.get(namespace, {}).items():
+            if stored == data:
+                return [SimpleNamespace(id=vector_id, score=self.score, metadata=metadata)]
+        return []
+
+    def query_many(self, queries, namespace=""):
+        self.calls.append(("query_many", namespace, len(queries)))
+        return [self.query(q["data"], q["top_k"], q["include_metadata"], namespace) for q in queries]
+
+    def update(self, vector_id, metadata=None, namespace="", metadata_update_mode=None):
+        self.namespaces[namespace][vector_id][1].update(metadata)
+
+    def range(self, cursor="", limit=1, include_metadata=False, namespace=""):
+        items = sorted(self.namespaces.get(namespace, {}).items())
+        start = int(cursor or 0)
+        page = items[start:start + limit]
+        next_cursor = str(start + limit) if start + limit < len(items) else ""
+        return SimpleNamespace(
+            vectors=[SimpleNamespace(id=i, metadata=m) for i, (_, m) in page],
+            next_cursor=next_cursor
+        )
+
+    def delete(self, ids, namespace=""):
+        for vector_id in ids:
+            self.namespaces.get(namespace, {}).pop(vector_id, None)
+
+    def reset(self, namespace=""):
+        self.namespaces.pop(namespace, None)
+
+    def list_namespaces(self):
+        return list(self.namespaces)
+
+
+def make_cache(monkeypatch, score=1.0):
+    monkeypatch.setenv("UPSTASH_VECTOR_REST_URL", "https://example.upstash.io")
+    monkeypatch.setenv("UPSTASH_VECTOR_REST_TOKEN", "token")
+    cache = ContentCache(resolve_document_hash=lambda title: f"{title}-hash")
+    cache.cache.index = FakeIndex(score)
+    cache.cache.local_tier = None
+    return cache
+
+
+def test_entries_are_separated_by_type_and_params(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set("What is entropy?", "physics", "quiz", {"quiz": "q"}, {"num_questions": 5})
+    assert cache.get("What is entropy?", "physics", "quiz", {"num_questions": 5})["quiz"] == "q"
+    assert cache.get("What is entropy?", "physics", "quiz", {"num_questions": 10}) is None
+    assert cache.get("What is entropy?", "physics", "flashcards") is None
+    assert cache.get("What is entropy?", "chemistry", "quiz", {"num_questions": 5}) is None
+
+
+def test_per_type_threshold(monkeypatch):
+    cache = make_cache(monkeypatch, score=0.96)
+    cache.set("What is entropy?", "physics", "quiz", {"quiz": "q"})
+    cache.set("What is entropy?", "physics", "podcast", {"script": "s"})
+    assert cache.get("What is entropy?", "physics", "quiz") is not None  # 0.95 threshold
+    assert cache.get("What is entropy?", "physics", "podcast") is None  # 0.97 threshold
+
+
+def stored_metadata(cache, pdf_title, output_type):
+    namespace = cache.document_namespace(pdf_title, output_type=output_type)
+    return dict(cache.cache.index.namespaces[namespace].values())
+
+
+def test_expired_entries_are_misses_and_swept(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set("What is entropy?", "physics", "tweet", {"tweet_content": "t"})
+    cache.set("What is enthalpy?", "physics", "tweet", {"tweet_content": "t"})
+    metadata = stored_metadata(cache, "physics", "tweet")
+    assert all(m["expires_at"] for m in metadata.values())  # tweets have a TTL
+    metadata["What is entropy?"]["expires_at"] = time.time() - 1
+    metadata["What is enthalpy?"]["expires_at"] = time.time() - 1
+    assert cache.get("What is entropy?", "physics", "tweet") is None  # expired on read
+    metadata["What is enthalpy?"]["expires_at"] = None
+    cache.set("What is entropy?", "physics", "tweet", {"tweet_content": "t"})
+    stored_metadata(cache, "physics", "tweet")["What is entropy?"]["expires_at"] = time.time() - 1
+
+    namespace = cache.document_namespace("physics", output_type="tweet")
+    assert cache.cache.sweep(namespace)["entries"] == 1
+    assert len(stored_metadata(cache, "physics", "tweet")) == 1
+
+
+def test_sweep_evicts_least_recently_used(monkeypatch):
+    cache = make_cache(monkeypatch)
+    for i, question in enumerate(["first", "second", "third"]):
+        cache.set(question, "physics", "podcast", {"script": "s"})
+        stored_metadata(cache, "physics", "podcast")[question]["accessed_at"] = i
+    cache.cache.touch_interval = 0
+    cache.get("first", "physics", "podcast")  # refreshes its access time
+
+    namespace = cache.document_namespace("physics", output_type="podcast")
+    assert cache.cache.sweep(namespace, max_entries=2)["entries"] == 2
+    assert cache.get("second", "physics", "podcast") is None
+    assert cache.get("first", "physics", "podcast") is not None
+    assert cache.get("third", "physics", "podcast") is not None
+
+
+def test_invalidate_document(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set("What is entropy?", "physics", "quiz", {"quiz": "q"})
+    cache.set("What is entropy?", "physics", "blog", {"blog_content": "b"})
+    cache.set("What is entropy?", "chemistry", "quiz", {"quiz": "q"})
+    cache.invalidate_document("physics")
+    assert cache.get("What is entropy?", "physics", "quiz") is None
+    assert cache.get("What is entropy?", "physics", "blog") is None
+    assert cache.get("What is entropy?", "chemistry", "quiz") is not None
+
+
+def test_batched_lookups_and_writes(monkeypatch):
+    cache = make_cache(monkeypatch)
+    questions = [f"question {i}" for i in range(250)]
+    assert cache.set_many([(q, "physics", "quiz", {"quiz": q}, None) for q in questions])
+    assert [c[2] for c in cache.cache.index.calls] == [100, 100, 50]
+
+    cache.cache.index.calls.clear()
+    results = cache.get_many([(q, "physics", "quiz", None) for q in ["missing"] + questions])
+    assert results[0] is None
+    assert [r["quiz"] for r in results[1:]] == questions
+    assert [c[2] for c in cache.cache.index.calls] == [100, 100, 51]
+
+
+def test_get_many_across_output_types(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.set("What is entropy?", "physics", "blog", {"blog_content": "b"})
+    results = cache.get_many([
+        ("What is entropy?", "physics", output_type, None) for output_type in ("quiz", "blog", "tweet")
+    ])
+    assert [r and r["blog_content"] for r in results] == [None, "b", None]
+
+
+class RememberingHashes:
+    """PDFProcessor's hash lookup: the indexed hash, remembered until forgotten."""
+
+    def __init__(self, indexed):
+        self.indexed = indexed
+        self._doc_hash_cache = {}
+
+    def get_document_hash(self, pdf_title):
+        return self._doc_hash_cache.setdefault(pdf_title, self.indexed[pdf_title])
+
+    def forget_document_hash(self, pdf_title):
+        self._doc_hash_cache.pop(pdf_title, None)
+
+
+def test_reindex_then_generate_misses_cache(monkeypatch):
+    monkeypatch.setenv("UPSTASH_VECTOR_REST_URL", "https://example.upstash.io")
+    monkeypatch.setenv("UPSTASH_VECTOR_REST_TOKEN", "token")
+    indexed = {"physics": "v1"}
+    pdf_processor = RememberingHashes(indexed)
+    cache = ContentCache(resolve_document_hash=pdf_processor.get_document_hash)
+    cache.cache.index = FakeIndex()
+    cache.cache.local_tier = LocalCacheTier()
+    generator = SimpleNamespace(cache=cache, rag_app=SimpleNamespace(pdf_processor=pdf_processor))
+
+    cache.set("What is entropy?", "physics", "quiz", {"quiz": "old"})
+    assert cache.get("What is entropy?", "physics", "quiz")["quiz"] == "old"
+
+    # Re-upload: the index now holds a new version of the document
+    indexed["physics"] = "v2"
+    PodcastGenerator.invalidate_document(generator, "physics", doc_hash="v1")
+    assert cache.get("What is entropy?", "physics", "quiz") is None
+    assert cache.document_namespace("physics") == cache.document_namespace(doc_hash="v2")
+
+
+def test_invalidate_matching_drops_only_entries_pointing_at_deleted_audio(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.cache.local_tier = LocalCacheTier()
+    params = {"tts_model": "eleven_turbo_v2", "output_format": "mp3_44100_128"}
+    cache.set("What is entropy?", "physics", "podcast", {"s3_url": "https://b.s3.amazonaws.com/p/a.mp3"}, params)
+    cache.set("What is enthalpy?", "physics", "podcast", {"s3_url": "https://b.s3.amazonaws.com/p/b.mp3"}, params)
+    cache.set("What is entropy?", "physics", "quiz", {"s3_url": "https://b.s3.amazonaws.com/p/a.mp3"})
+    assert cache.get("What is entropy?", "physics", "podcast", params) is not None  # now in the local tier
+
+    dropped = cache.invalidate_matching("physics", "podcast", lambda data: data["s3_url"].endswith("/p/a.mp3"))
+    assert dropped == 1
+    assert cache.get("What is entropy?", "physics", "podcast", params) is None
+    assert cache.get("What is enthalpy?", "physics", "podcast", params) is not None
+    assert cache.get("What is entropy?", "physics", "quiz") is not None
@@ -0,0 +1,52 @@
+from agents.utils.frame_index import FrameIndex
+from agents.utils.mp3_frames import Mp3Assembler, iter_frames
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo, no CRC: 417-byte frames
+HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+FRAME_SECONDS = 1152 / 44100
+
+
+def assemble(path: str, frames: int) -> Mp3Assembler:
+    with Mp3Assembler(path) as assembler:
+        assembler.append((HEADER + bytes([0x55]) * 413) * frames)
+    return assembler
+
+
+def test_index_from_assembler_matches_scanned_file(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    assembler = assemble(path, 1000)
+    data = open(path, "rb").read()
+
+    built = FrameIndex.from_offsets(assembler.frame_offsets, 44100, 1152, len(data))
+    scanned = FrameIndex.build(path)
+    assert list(built.offsets) == list(scanned.offsets)
+    assert scanned.frame_count == 1000 and scanned.total_bytes == len(data)
+    assert abs(scanned.duration_seconds - 1000 * FRAME_SECONDS) < 1e-9
+
+    restored = FrameIndex.from_bytes(scanned.to_bytes())
+    assert list(restored.offsets) == list(scanned.offsets)
+    assert (restored.sample_rate, restored.samples_per_frame, restored.stride) == (44100, 1152, 4)
+
+
+def test_byte_range_starts_on_frame_boundary(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    assemble(path, 1000)
+    data = open(path, "rb").read()
+    index = FrameIndex.build(path)
+
+    start, end, actual_start = index.byte_range(10.0, 15.0)
+    assert actual_start <= 10.0 < actual_start + index.entry_seconds
+    chunk = data[start:end]
+    assert chunk[:4] == HEADER
+    frames = len(list(iter_frames(chunk)))
+    assert (15.0 - actual_start) / FRAME_SECONDS <= frames <= (15.0 - actual_start) / FRAME_SECONDS + index.stride
+
+    # Past the end: the last entry through the end of the file
+    start, end, _ = index.byte_range(10_000.0)
+    assert start == index.offsets[-1] and end == len(data)
+
+
+def test_build_rejects_non_mp3(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not audio " * 100)
+    assert FrameIndex.build(str(path)) is None
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from app.services.generation_scheduler import GenerationScheduler, QueueFullError, PRIORITY_HIGH, PRIORITY_LOW
+
+
+class Tracker:
+    """Job factory recording start order and peak concurrency."""
+
+    def __init__(self):
+        self.running = {}
+        self.peak = 0
+        self.peak_per_user = 0
+        self.started = []
+
+    def job(self, user, name, delay=0.02):
+        async def run():
+            self.started.append(name)
+            self.running[user] = self.running.get(user, 0) + 1
+            self.peak = max(self.peak, sum(self.running.values()))
+            self.peak_per_user = max(self.peak_per_user, self.running[user])
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self.running[user] -= 1
+        return run
+
+
+async def _drain(scheduler, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while any(job.status in ("queued", "running") for job in scheduler._jobs.values()):
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def _scheduler(workers=4, per_user=2, pending=10):
+    scheduler = GenerationScheduler()
+    scheduler.max_workers, scheduler.max_jobs_per_user, scheduler.max_pending_per_user = workers, per_user, pending
+    return scheduler
+
+
+def test_burst_respects_global_and_per_user_limits():
+    async def run():
+        scheduler, tracker = _scheduler(), Tracker()
+        jobs = [scheduler.submit(user, tracker.job(user, f"{user}-{n}")) for user in range(50) for n in range(3)]
+        await _drain(scheduler)
+        await scheduler.stop()
+        return jobs, tracker
+
+    jobs, tracker = asyncio.run(run())
+    assert all(job.status == "completed" for job in jobs)
+    assert tracker.peak == 4
+    assert tracker.peak_per_user <= 2
+
+
+def test_priority_dedupe_and_cancel():
+    async def run():
+        scheduler, tracker = _scheduler(workers=1), Tracker()
+        blocker = scheduler.submit("a", tracker.job("a", "blocker", delay=0.05))
+        await asyncio.sleep(0.01)  # let it start
+        low = scheduler.submit("b", tracker.job("b", "low"), priority=PRIORITY_LOW)
+        high = scheduler.submit("c", tracker.job("c", "high"), priority=PRIORITY_HIGH, dedupe_key="same")
+        assert scheduler.submit("c", tracker.job("c", "dupe"), dedupe_key="same") is high
+        cancelled = scheduler.submit("d", tracker.job("d", "cancelled"))
+        assert scheduler.queue_position(low) == 2
+        assert scheduler.cancel(cancelled.id)
+
+        await _drain(scheduler)
+        # A finished job no longer absorbs duplicates
+        again = scheduler.submit("c", tracker.job("c", "again"), dedupe_key="same")
+        await _drain(scheduler)
+        await scheduler.stop()
+        return tracker, blocker, cancelled, again, high
+
+    tracker, blocker, cancelled, again, high = asyncio.run(run())
+    assert tracker.started == ["blocker", "high", "low", "again"]
+    assert cancelled.status == "cancelled" and again is not high
+
+
+def test_rejects_users_with_too_many_queued_jobs():
+    async def run():
+        scheduler, tracker = _scheduler(workers=1, pending=2), Tracker()
+        scheduler.submit("a", tracker.job("a", "1"))
+        scheduler.submit("a", tracker.job("a", "2"))
+        with pytest.raises(QueueFullError):
+            scheduler.submit("a", tracker.job("a", "3"))
+        scheduler.submit("b", tracker.job("b", "other user"))
+        failing = scheduler.submit("b", _fail)
+        await _drain(scheduler)
+        await scheduler.stop()
+        return failing
+
+    failing = asyncio.run(run())
+    assert failing.status == "failed" and failing.error == "boom"
+
+
+async def _fail():
+    raise RuntimeError("boom")
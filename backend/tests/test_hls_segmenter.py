@@ -0,0 +1,50 @@
+from agents.utils.hls_segmenter import HlsSegmenter, PLAYLIST_NAME
+from agents.utils.mp3_frames import iter_frames
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz: 417-byte frames of 1152 samples
+HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+FRAME_SECONDS = 1152 / 44100
+
+
+def make_line(frames: int) -> bytes:
+    return (HEADER + bytes([0x55]) * 413) * frames
+
+
+def test_publishes_each_line_and_playlist_progressively():
+    published = {}
+    ready = []
+
+    def publish(name, data, content_type):
+        published[name] = data
+        return f"https://bucket/{name}"
+
+    segmenter = HlsSegmenter(
+        publish=publish,
+        target_duration=2.0,
+        on_segment=lambda index, url, playlist: ready.append((index, url, playlist))
+    )
+    segmenter.append(make_line(10))
+    segmenter.end_line(500)
+
+    # The first line is playable before the rest of the episode exists
+    assert ready == [(0, "https://bucket/segment_00000.mp3", f"https://bucket/{PLAYLIST_NAME}")]
+    assert "#EXT-X-ENDLIST" not in published[PLAYLIST_NAME].decode()
+
+    segmenter.append(make_line(100))  # ~2.6s, longer than the target duration
+    segmenter.end_line(500)
+    playlist_url = segmenter.finish()
+
+    playlist = published[PLAYLIST_NAME].decode()
+    assert playlist_url == f"https://bucket/{PLAYLIST_NAME}"
+    assert playlist.strip().endswith("#EXT-X-ENDLIST")
+    assert all(duration <= 2.0 for _, duration in segmenter.segments)
+    assert len(segmenter.segments) == 3
+
+    total_frames = sum(len(list(iter_frames(published[name]))) for name, _ in segmenter.segments)
+    assert total_frames == 10 + 20 + 100 + 20
+
+    # Each segment starts with its packed-audio timestamp
+    second = published["segment_00001.mp3"]
+    assert second.startswith(b"ID3") and b"com.apple.streaming.transportStreamTimestamp" in second
+    pts = int.from_bytes(second[65:73], "big")
+    assert pts == round(30 * FRAME_SECONDS * 90000)
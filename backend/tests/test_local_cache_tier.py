@@ -0,0 +1,65 @@
+from agents.utils.upstash_semantic_cache.local_tier import LocalCacheTier, HIT, NEGATIVE, MISS
+
+
+def test_exact_and_near_duplicate_hits():
+    tier = LocalCacheTier()
+    tier.put("What is gradient descent?", "podcast", "intro")
+    assert tier.lookup("what is gradient descent", "intro") == (HIT, "podcast")
+    assert tier.lookup("What is gradient descent??", "intro") == (HIT, "podcast")
+    assert tier.lookup("Explain backpropagation", "intro") == (MISS, None)
+
+
+def test_lookup_threshold_only_tightens():
+    tier = LocalCacheTier(min_similarity=0.5)
+    tier.put("What is gradient descent?", "podcast", "intro")
+    assert tier.lookup("What is gradient descent, briefly?", "intro") == (HIT, "podcast")
+    assert tier.lookup("What is gradient descent, briefly?", "intro", min_similarity=0.97) == (MISS, None)
+    assert tier.lookup("what is gradient descent", "intro", min_similarity=0.97) == (HIT, "podcast")  # exact key
+    assert tier.lookup("What is gradient descent, briefly?", "intro", min_similarity=0.1) == (HIT, "podcast")
+
+
+def test_never_matches_across_partitions():
+    tier = LocalCacheTier()
+    tier.put("What is gradient descent?", "podcast", "intro")
+    assert tier.lookup("What is gradient descent?", "other") == (MISS, None)
+    tier.put("What is gradient descent?", "other podcast", "other")
+    assert tier.lookup("What is gradient descent?", "intro") == (HIT, "podcast")
+
+
+def test_negative_entries_expire_and_clear_on_put():
+    tier = LocalCacheTier(negative_ttl_seconds=60)
+    tier.put_negative("What is entropy?", "intro")
+    assert tier.lookup("what is entropy", "intro") == (NEGATIVE, None)
+    tier.put("What is entropy?", "podcast", "intro")
+    assert tier.lookup("what is entropy", "intro") == (HIT, "podcast")
+
+    expired = LocalCacheTier(negative_ttl_seconds=0)
+    expired.put_negative("What is entropy?", "intro")
+    assert expired.lookup("What is entropy?", "intro") == (MISS, None)
+
+
+def test_evicts_least_recently_used():
+    tier = LocalCacheTier(max_entries=2)
+    tier.put("first question", "1")
+    tier.put("second question", "2")
+    tier.lookup("first question")
+    tier.put("third question", "3")
+    assert len(tier) == 2
+    assert tier.lookup("second question") == (MISS, None)
+    assert tier.lookup("first question") == (HIT, "1")
+
+
+def test_invalidate_and_clear():
+    tier = LocalCacheTier()
+    tier.put("first question", "1", "a")
+    tier.put("second question", "2", "b")
+    tier.invalidate("First question", "a")
+    assert tier.lookup("first question", "a") == (MISS, None)
+
+    tier.put("first question", "1", "a")
+    tier.invalidate_partition("a")
+    assert tier.lookup("first question", "a") == (MISS, None)
+    assert tier.lookup("second question", "b") == (HIT, "2")
+
+    tier.clear()
+    assert len(tier) == 0
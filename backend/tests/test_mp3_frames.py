@@ -0,0 +1,49 @@
+from agents.utils.mp3_frames import Mp3Assembler, iter_frames, parse_header
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo, no CRC: 417-byte frames
+HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])
+
+
+def make_segment(frames: int, fill: int = 0x55, id3: bool = True) -> bytes:
+    data = b""
+    if id3:
+        data += b"ID3\x04\x00\x00\x00\x00\x00\x0a" + bytes(10)
+    info = bytearray(HEADER + bytes(413))
+    info[36:40] = b"Info"
+    data += bytes(info)
+    for _ in range(frames):
+        data += HEADER + bytes([fill]) * 413
+    return data + b"TAG" + bytes(125)
+
+
+def test_iter_frames_skips_tags_and_info_frame():
+    frames = list(iter_frames(make_segment(5)))
+    assert len(frames) == 5
+    assert all(len(frame) == 417 and frame[4] == 0x55 for _, frame in frames)
+
+
+def test_assembler_concatenates_frames_with_silence(tmp_path):
+    path = str(tmp_path / "episode.mp3")
+    with Mp3Assembler(path) as assembler:
+        first = assembler.append(make_segment(10))
+        assembler.append_silence(500)
+        second = assembler.append(make_segment(20, fill=0x66))
+
+    frame_seconds = 1152 / 44100
+    silence_frames = 20  # ceil(0.5s / 26.1ms)
+    assert first == (0.0, 10 * frame_seconds)
+    assert abs(second[0] - (10 + silence_frames) * frame_seconds) < 1e-9
+    assert assembler.frame_count == 10 + silence_frames + 20
+
+    data = open(path, "rb").read()
+    header = parse_header(data)
+    assert header.bitrate == 128 and header.sample_rate == 44100
+    assert data[36:40] == b"Info"
+    assert int.from_bytes(data[44:48], "big") == assembler.frame_count
+    assert int.from_bytes(data[48:52], "big") == len(data)
+    assert len(data) == 417 * (1 + assembler.frame_count)
+
+    # Silence frames carry zeroed side info and main data
+    silence = data[417 * 11:417 * 12]
+    assert silence[:4] == HEADER and not any(silence[4:])
+    assert len(list(iter_frames(data))) == assembler.frame_count
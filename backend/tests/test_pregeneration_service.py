@@ -0,0 +1,70 @@
+import asyncio
+from app.services.pregeneration_service import PregenerationService
+
+
+class FakeGenerator:
+    """Yields one result per output type after `delay` seconds each, one node per output."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.started = []
+        self.finished = []
+        self.nodes_run = []
+
+    async def agenerate_contents(self, question, pdf_title, output_types, pregenerated=False, between_nodes=None):
+        assert pregenerated
+        self.started.append(pdf_title)
+        for output_type in output_types:
+            if between_nodes is not None:
+                await between_nodes()
+            await asyncio.sleep(self.delay)
+            self.nodes_run.append(output_type)
+            yield output_type, {"topic": question}
+        self.finished.append(pdf_title)
+
+
+async def _drain(service, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while service._queue or (service._current is not None and not service._current.done()):
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_pregenerates_queued_documents_once():
+    async def run():
+        service = PregenerationService()
+        generator = FakeGenerator(delay=0)
+        service.start(generator)
+        assert service.enqueue("Paper")
+        assert not service.enqueue("Paper")  # already queued
+        await _drain(service)
+        await service.stop()
+        return generator
+
+    generator = asyncio.run(run())
+    assert generator.finished == ["Paper"]
+
+
+def test_interactive_request_pauses_job_between_nodes():
+    async def run():
+        service = PregenerationService()
+        generator = FakeGenerator(delay=0.05)
+        service.start(generator)
+        service.enqueue("Paper")
+        await asyncio.sleep(0.02)  # first node is running
+
+        async with service.interactive():
+            await asyncio.sleep(0.15)
+            # The running node finishes; the next one waits for the user's generation
+            assert generator.nodes_run == ["quiz"]
+            assert generator.finished == []
+
+        await _drain(service)
+        await service.stop()
+        return generator
+
+    generator = asyncio.run(run())
+    # Resumed, not restarted: no node ran twice
+    assert generator.started == ["Paper"]
+    assert generator.nodes_run == ["quiz", "flashcards"]
+    assert generator.finished == ["Paper"]
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+import pytest
+from app.services.podcast_service.range_cache import RangeCache, parse_byte_range, is_not_modified, if_range_matches
+
+OBJECT = bytes(range(256)) * 40  # 10240 bytes
+
+
+class CountingFetch:
+    def __init__(self, data: bytes = OBJECT):
+        self.data = data
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return self.data[start:end + 1]
+
+
+def test_reads_are_served_from_cached_blocks(tmp_path):
+    cache = RangeCache(str(tmp_path), max_bytes=1 << 20, block_size=1024)
+    fetch = CountingFetch()
+
+    assert cache.read("a.mp3", '"v1"', len(OBJECT), 100, 2999, fetch) == OBJECT[100:3000]
+    assert fetch.calls == [(0, 2047 + 1024)]  # one request for the three missing blocks
+
+    assert cache.read("a.mp3", '"v1"', len(OBJECT), 1500, 2500, fetch) == OBJECT[1500:2501]
+    assert len(fetch.calls) == 1
+
+    # Only the gap after the cached blocks is fetched; the short final block is handled
+    assert cache.read("a.mp3", '"v1"', len(OBJECT), 0, len(OBJECT) - 1, fetch) == OBJECT
+    assert fetch.calls[1] == (3072, len(OBJECT) - 1)
+
+    # A new version never sees the old blocks, and the cache survives a restart
+    cache.read("a.mp3", '"v2"', len(OBJECT), 0, 10, fetch)
+    assert len(fetch.calls) == 3
+    restarted = RangeCache(str(tmp_path), max_bytes=1 << 20, block_size=1024)
+    assert b"".join(restarted.iter_range("a.mp3", '"v1"', len(OBJECT), 0, len(OBJECT) - 1, fetch, 4000)) == OBJECT
+    assert len(fetch.calls) == 3
+
+
+def test_evicts_least_recently_used_blocks(tmp_path):
+    cache = RangeCache(str(tmp_path), max_bytes=2048, block_size=1024)
+    fetch = CountingFetch()
+    cache.read("a.mp3", "v", len(OBJECT), 0, 0, fetch)
+    cache.read("a.mp3", "v", len(OBJECT), 1024, 1024, fetch)
+    cache.read("a.mp3", "v", len(OBJECT), 0, 0, fetch)
+    cache.read("a.mp3", "v", len(OBJECT), 2048, 2048, fetch)  # evicts block 1
+    calls = len(fetch.calls)
+    cache.read("a.mp3", "v", len(OBJECT), 0, 0, fetch)
+    assert len(fetch.calls) == calls
+    cache.read("a.mp3", "v", len(OBJECT), 1024, 1024, fetch)
+    assert len(fetch.calls) == calls + 1
+
+
+def test_parse_byte_range():
+    assert parse_byte_range(None, 100) is None
+    assert parse_byte_range("bytes=0-49", 100) == (0, 49)
+    assert parse_byte_range("bytes=50-", 100) == (50, 99)
+    assert parse_byte_range("bytes=90-500", 100) == (90, 99)
+    assert parse_byte_range("bytes=-10", 100) == (90, 99)
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("bytes=abc", 100) is None
+    with pytest.raises(ValueError):
+        parse_byte_range("bytes=100-", 100)
+
+
+def test_conditional_headers():
+    modified = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert is_not_modified({"if-none-match": '"x", W/"abc"'}, '"abc"', modified)
+    assert not is_not_modified({"if-none-match": '"x"'}, '"abc"', modified)
+    assert is_not_modified({"if-modified-since": "Wed, 01 May 2024 12:00:00 GMT"}, '"abc"', modified)
+    assert not is_not_modified({"if-modified-since": "Tue, 30 Apr 2024 12:00:00 GMT"}, '"abc"', modified)
+
+    assert if_range_matches(None, '"abc"', modified)
+    assert if_range_matches('"abc"', '"abc"', modified)
+    assert not if_range_matches('W/"abc"', '"abc"', modified)
+    assert if_range_matches("Wed, 01 May 2024 12:00:00 GMT", '"abc"', modified)
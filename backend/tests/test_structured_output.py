@@ -0,0 +1,88 @@
+from typing import List
+from pydantic import BaseModel
+from langchain.output_parsers import PydanticOutputParser
+from agents.utils.structured_output import (
+    repair_json,
+    salvage_json,
+    parse_structured_output
+)
+
+
+class Card(BaseModel):
+    front: str
+    back: str
+
+
+class Deck(BaseModel):
+    title: str
+    cards: List[Card]
+
+
+def test_repair_code_fence_and_prose():
+    text = 'Sure! Here you go:\n```json\n{"title": "Deck", "cards": []}\n```\nHope this helps.'
+    assert repair_json(text) == {"title": "Deck", "cards": []}
+
+
+def test_repair_trailing_commas():
+    text = '{"title": "Deck", "cards": [{"front": "a", "back": "b",},],}'
+    assert repair_json(text) == {"title": "Deck", "cards": [{"front": "a", "back": "b"}]}
+
+
+def test_repair_truncated_string():
+    text = '{"title": "Deck", "cards": [{"front": "a", "back": "unfinish'
+    assert repair_json(text) == {
+        "title": "Deck",
+        "cards": [{"front": "a", "back": "unfinish"}]
+    }
+
+
+def test_repair_returns_none_without_json():
+    assert repair_json("I cannot answer this.") is None
+
+
+def test_salvage_drops_incomplete_trailing_element():
+    text = '{"title": "Deck", "cards": [{"front": "a", "back": "b"}, {"front": "c", "ba'
+    candidates = salvage_json(text)
+    assert {"title": "Deck", "cards": [{"front": "a", "back": "b"}]} in candidates
+
+
+def test_parse_structured_output_salvages_truncated_array():
+    parser = PydanticOutputParser(pydantic_object=Deck)
+    text = '```json\n{"title": "Deck", "cards": [{"front": "a", "back": "b"}, {"front": "c", "ba'
+    deck = parse_structured_output(parser, text, name="test_deck")
+    assert deck.title == "Deck"
+    assert [card.front for card in deck.cards] == ["a"]
+
+
+def test_parse_structured_output_uses_defaults_for_lost_fields():
+    parser = PydanticOutputParser(pydantic_object=Deck)
+    text = '{"cards": [{"front": "a", "back": "b"}'
+    deck = parse_structured_output(
+        parser,
+        text,
+        name="test_deck",
+        defaults=lambda data: {"title": "Fallback"}
+    )
+    assert deck.title == "Fallback"
+    assert len(deck.cards) == 1
+
+
+def test_repair_skips_brackets_in_preamble():
+    assert repair_json('text with [brackets] then {"a": 1}') == {"a": 1}
+    assert repair_json('Here is the [result]: {"title": "Deck", "cards": [{"front": "a"') == {
+        "title": "Deck",
+        "cards": [{"front": "a"}]
+    }
+
+
+def test_repair_drops_incomplete_trailing_token():
+    assert repair_json('{"a": 1, "b": tru') == {"a": 1}
+    assert repair_json('{"a": [1, 2, 1.') == {"a": [1, 2]}
+    assert repair_json('{"a": "line\\') == {"a": "line"}
+    assert repair_json('{"a": "caf\\u00') == {"a": "caf"}
+    assert repair_json('{"a": 1, "b": ') == {"a": 1}
+
+
+def test_repair_prefers_outer_value_over_inner_fragment():
+    assert repair_json('[{"x":1},{"x":') == [{"x": 1}]
+    assert repair_json('Sure [1] here: {"a": 1}') == {"a": 1}
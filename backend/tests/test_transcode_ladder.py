@@ -0,0 +1,33 @@
+from app.services.podcast_service.transcode_ladder import LADDER, TranscodePool, choose_rendition, manifest_key, rendition_key
+
+RENDITIONS = [
+    {"name": "opus_32k", "key": "a.opus_32k.opus", "content_type": "audio/ogg; codecs=opus", "bitrate_kbps": 32},
+    {"name": "aac_48k", "key": "a.aac_48k.m4a", "content_type": "audio/mp4", "bitrate_kbps": 48},
+]
+
+
+def test_keys_sit_next_to_the_original():
+    assert rendition_key("podcasts/u/episode.mp3", LADDER[0]) == "podcasts/u/episode.opus_32k.opus"
+    assert manifest_key("podcasts/u/episode.mp3") == "podcasts/u/episode.mp3.renditions.json"
+
+
+def test_unconstrained_clients_get_the_original():
+    assert choose_rendition(RENDITIONS, {"downlink": "10", "ect": "4g"}) is None
+    assert choose_rendition(RENDITIONS, {"save-data": "on"}, quality="high") is None
+    assert choose_rendition([], {"save-data": "on"}) is None
+
+
+def test_constrained_clients_get_the_lowest_supported_rendition():
+    assert choose_rendition(RENDITIONS, {"save-data": "on"})["name"] == "aac_48k"
+    assert choose_rendition(RENDITIONS, {"ect": "3g", "accept": "audio/ogg,audio/*;q=0.9"})["name"] == "opus_32k"
+    assert choose_rendition(RENDITIONS, {"downlink": "0.4"})["name"] == "aac_48k"
+    assert choose_rendition(RENDITIONS, {}, quality="low")["name"] == "aac_48k"
+    assert choose_rendition(RENDITIONS[:1], {"save-data": "on"}) is None  # Opus not accepted
+
+
+def test_ffmpeg_command():
+    command = TranscodePool(1, "/usr/bin/ffmpeg").command("in.mp3", "out.opus", LADDER[0])
+    assert command[0] == "/usr/bin/ffmpeg"
+    assert command[command.index("-c:a") + 1] == "libopus"
+    assert command[command.index("-b:a") + 1] == "32k"
+    assert command[-1] == "out.opus"
@@ -0,0 +1,39 @@
+from agents.utils.mp3_frames import Mp3Assembler
+from agents.utils.transcript_cues import TranscriptCue, format_timestamp, split_cue, to_txt, to_vtt
+
+HEADER = bytes([0xFF, 0xFB, 0x90, 0x44])  # 128 kbps, 44.1 kHz: 417-byte frames
+FRAME_SECONDS = 1152 / 44100
+
+
+def test_cues_follow_assembled_audio(tmp_path):
+    lines = [("Speaker 1", "Welcome back.", 100), ("Speaker 2", "Thanks for having me.", 250)]
+    cues = []
+    with Mp3Assembler(str(tmp_path / "episode.mp3")) as assembler:
+        for speaker, text, frames in lines:
+            start, end = assembler.append((HEADER + bytes(413)) * frames)
+            cues.append(TranscriptCue(start, end, speaker, text))
+            assembler.append_silence(500)
+
+    assert cues[0].start == 0 and abs(cues[0].end - 100 * FRAME_SECONDS) < 1e-9
+    assert cues[1].start > cues[0].end + 0.45  # after the gap of silence
+    assert abs(cues[1].end - cues[1].start - 250 * FRAME_SECONDS) < 1e-9
+
+    vtt = to_vtt(cues)
+    assert vtt.startswith("WEBVTT\n")
+    assert f"{format_timestamp(cues[1].start)} --> {format_timestamp(cues[1].end)}\n<v Speaker 2>Thanks for having me." in vtt
+    assert to_txt(cues).splitlines() == ["[00:00] Speaker 1: Welcome back.", "[00:03] Speaker 2: Thanks for having me."]
+
+
+def test_long_turns_split_within_their_window():
+    text = "First sentence is here. " * 10
+    parts = split_cue(TranscriptCue(10.0, 30.0, "Speaker 1", text.strip()), max_chars=50)
+    assert len(parts) > 1
+    assert all(len(part.text) <= 50 for part in parts)
+    assert parts[0].start == 10.0 and abs(parts[-1].end - 30.0) < 1e-9
+    assert all(a.end == b.start for a, b in zip(parts, parts[1:]))
+    assert " ".join(part.text for part in parts) == text.strip()
+
+
+def test_format_timestamp():
+    assert format_timestamp(0) == "00:00:00.000"
+    assert format_timestamp(3725.4567) == "01:02:05.457"
@@ -0,0 +1,28 @@
+from agents.utils.tts_cache import TTSCache
+
+
+def test_key_ignores_whitespace_differences():
+    a = TTSCache.make_key("voice", "model", "Welcome  to the\nshow. ")
+    b = TTSCache.make_key("voice", "model", "Welcome to the show.")
+    assert a == b
+    assert a != TTSCache.make_key("other-voice", "model", "Welcome to the show.")
+
+
+def test_round_trip_and_persistence(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=1024)
+    key = TTSCache.make_key("voice", "model", "hello")
+    assert cache.get(key) is None
+    cache.put(key, b"audio")
+    assert cache.get(key) == b"audio"
+    assert TTSCache(str(tmp_path), max_bytes=1024).get(key) == b"audio"
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.put("a" * 64, b"12345")
+    cache.put("b" * 64, b"12345")
+    cache.get("a" * 64)
+    cache.put("c" * 64, b"12345")
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) == b"12345"
+    assert cache.get("c" * 64) == b"12345"
@@ -8,7 +8,7 @@ import { Progress } from "@/components/ui/progress";
 import { usePodcastStore } from '@/store/podcast-store';
 import { useToast } from "@/hooks/use-toast";
 import { fetchClient } from '@/lib/api/fetch-client';
-import { API_ROUTES } from '@/config';
+import { API_BASE_URL, API_ROUTES } from '@/config';
 import { 
   Play, 
   Pause, 
@@ -168,7 +168,7 @@ export function PodcastPlayer() {
       <CardContent className="p-6 space-y-6">
         <audio
           ref={audioRef}
-          src={currentPodcast.audio_url}
+          src={currentPodcast.stream_url ? `${API_BASE_URL}${currentPodcast.stream_url}` : currentPodcast.audio_url}
           preload="metadata"
         />
 
@@ -44,6 +44,7 @@ export interface Podcast {
   audio_url?: string;
   transcript_txt_url?: string;
   transcript_vtt_url?: string;
+  stream_url?: string;
   current_progress: number;
   current_speed: number;
 }